@@ -0,0 +1,69 @@
+"""
+Benchmark for batch recommendations.
+
+Compares a Python loop over get_collaborative_recommendations with
+RecommendationEngine.recommend_batch, which scores blocks of users with one
+sparse x dense product, and checks that both return the same results.
+
+Usage:
+    python benchmarks/bench_batch_recommendations.py [n_users] [n_products]
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from data_processor import DataProcessor
+from recommendation import RecommendationEngine
+
+RATINGS_PER_USER = 20
+TOP_N = 10
+
+def synthetic_data_processor(n_users, n_products, rng):
+    """Build a DataProcessor with random ratings and no backing file."""
+    data_processor = DataProcessor()
+    data_processor.product_data = {
+        f"prod{i}": {"name": f"Product {i}", "category": "misc", "price": 10.0, "avg_rating": 4.0}
+        for i in range(n_products)
+    }
+    for u in range(n_users):
+        products = rng.choice(n_products, size=RATINGS_PER_USER, replace=False)
+        data_processor.user_interactions[f"user{u}"] = [
+            {"product_id": f"prod{p}", "type": "rating", "rating": int(rng.integers(1, 6))}
+            for p in products
+        ]
+    data_processor.mark_changed()
+    return data_processor
+
+def run(n_users, n_products, rng):
+    data_processor = synthetic_data_processor(n_users, n_products, rng)
+    engine = RecommendationEngine(data_processor)
+    engine.train_collaborative_filter()
+    user_ids = list(engine.user_indices)
+
+    start = time.perf_counter()
+    single = [(user_id, engine.get_collaborative_recommendations(user_id, top_n=TOP_N)) for user_id in user_ids]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = [pair for block in engine.recommend_batch(user_ids, top_n=TOP_N) for pair in block]
+    batch_time = time.perf_counter() - start
+
+    print(f"{n_users} users x {n_products} products  "
+          f"loop {n_users / loop_time:10.0f} users/s  "
+          f"batch {n_users / batch_time:10.0f} users/s  "
+          f"speedup {loop_time / batch_time:6.1f}x  "
+          f"same results {single == batch}")
+
+if __name__ == '__main__':
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    n_products = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    run(n_users, n_products, np.random.default_rng(42))
@@ -0,0 +1,48 @@
+"""
+Benchmark for multi-process offline batch scoring.
+
+Trains and saves a model on synthetic data, then runs the sharded batch
+scoring job with an increasing number of worker processes and reports the
+throughput of each run. With enough cores, throughput should grow close to
+linearly with the number of workers.
+
+Usage:
+    python benchmarks/bench_batch_scoring.py [n_users] [n_products] [max_workers]
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from batch_score import run_batch_scoring
+from model_manager import ModelManager
+from bench_batch_recommendations import synthetic_data_processor
+
+def run(n_users, n_products, max_workers):
+    data_processor = synthetic_data_processor(n_users, n_products, np.random.default_rng(42))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_dir = os.path.join(temp_dir, 'model')
+        ModelManager(data_processor, retrain_interval=None, retrain_after=None, model_dir=model_dir).train()
+
+        shard_size = max(1, n_users // (4 * max_workers))
+        workers = 1
+        while workers <= max_workers:
+            output_dir = os.path.join(temp_dir, f'batch-{workers}')
+            summary = run_batch_scoring(model_dir, output_dir, top_n=10, workers=workers, shard_size=shard_size)
+            print(f"workers {workers:3d}  {summary['users'] / summary['seconds']:10.0f} users/s  "
+                  f"({summary['shards']} shards, {summary['seconds']:.2f} s)")
+            workers *= 2
+
+if __name__ == '__main__':
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    n_products = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+    run(n_users, n_products, max_workers)
@@ -0,0 +1,62 @@
+"""
+Benchmark for batched interaction ingestion.
+
+Measures how many events per second the /api/track_interactions request
+path (validate + enqueue) accepts and the latency of each request, while the
+background writer persists events to a temporary event log.
+
+Usage:
+    python benchmarks/bench_ingest.py [n_requests] [events_per_request]
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from ingest import IngestQueue, validate_event
+from user_tracker import UserTracker
+
+def run(n_requests, events_per_request):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tracker = UserTracker(os.path.join(temp_dir, 'data.json'), log_path=os.path.join(temp_dir, 'events.log'))
+        queue = IngestQueue(tracker, max_size=n_requests * events_per_request)
+        queue.start()
+
+        payload = [
+            {"user_id": f"user{i % 500}", "product_id": f"prod{i % 2000}", "type": "view"}
+            for i in range(events_per_request)
+        ]
+
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(n_requests):
+            request_start = time.perf_counter()
+            valid = [validate_event(event)[0] for event in payload]
+            queue.submit(valid)
+            latencies.append(time.perf_counter() - request_start)
+        accept_time = time.perf_counter() - start
+
+        queue.stop()
+        write_time = time.perf_counter() - start
+        tracker.close()
+
+        total = n_requests * events_per_request
+        latencies = np.array(latencies) * 1000
+        print(f"{total} events in {n_requests} requests of {events_per_request}")
+        print(f"  accepted {total / accept_time:10.0f} events/s  "
+              f"request p50 {np.percentile(latencies, 50):6.2f} ms  p99 {np.percentile(latencies, 99):6.2f} ms")
+        print(f"  persisted {queue.written} events, {total / write_time:10.0f} events/s end to end")
+
+if __name__ == '__main__':
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    events_per_request = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    run(n_requests, events_per_request)
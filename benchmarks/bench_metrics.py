@@ -0,0 +1,49 @@
+"""
+Benchmark for the cost of latency instrumentation.
+
+Calls an empty function with and without the timed decorator and reports
+the added time per span. With RECOMMENDER_METRICS=0 the decorator returns
+the function unchanged, so the overhead is zero.
+
+Usage:
+    python benchmarks/bench_metrics.py [calls]
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import time
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from metrics import ENABLED, LATENCY_METRIC, REGISTRY, timed
+
+def noop():
+    return None
+
+def time_calls(func, calls):
+    """Time calls to func and return nanoseconds per call."""
+    began = time.perf_counter_ns()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter_ns() - began) / calls
+
+if __name__ == '__main__':
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    instrumented = timed('noop')(noop)
+    bare_ns = min(time_calls(noop, calls) for _ in range(3))
+    timed_ns = min(time_calls(instrumented, calls) for _ in range(3))
+
+    print(f"metrics enabled: {ENABLED}")
+    print(f"bare call:         {bare_ns:8.1f} ns")
+    print(f"instrumented call: {timed_ns:8.1f} ns")
+    print(f"overhead per span: {timed_ns - bare_ns:8.1f} ns")
+    if ENABLED:
+        histogram = REGISTRY.histogram(LATENCY_METRIC, span='noop')
+        print(f"recorded spans: {sum(histogram.counts)}, p50 {histogram.percentile(50):.0f} ns, "
+              f"p99 {histogram.percentile(99):.0f} ns")
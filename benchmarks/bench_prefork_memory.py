@@ -0,0 +1,112 @@
+"""
+Benchmark for per-worker memory with and without pre-fork model sharing.
+
+Forks a number of worker processes in three modes and reports each worker's
+RSS, PSS (proportional set size: shared pages divided among the processes
+sharing them) and private memory after it has served a few requests:
+
+    private   every worker trains its own model (the old app.py behaviour)
+    prefork   the master trains once and workers inherit a read-only view
+    mmap      the master saves the model and workers memory-map it from disk
+
+PSS and private memory are what grow with the number of workers.
+Linux only (reads /proc/<pid>/smaps_rollup).
+
+Usage:
+    python benchmarks/bench_prefork_memory.py [n_workers] [n_products]
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import gc
+import os
+import sys
+import json
+import tempfile
+import numpy as np
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from data_processor import DataProcessor
+from model_manager import ModelManager
+from prefork import init_worker, prepare_master, process_memory
+
+RATINGS_PER_USER = 20
+
+def synthetic_data_processor(n_products, rng):
+    """Build a DataProcessor with random ratings and no backing file."""
+    data_processor = DataProcessor()
+    data_processor.product_data = {
+        f"prod{i}": {"name": f"Product {i}", "category": "misc", "price": 10.0, "avg_rating": 4.0}
+        for i in range(n_products)
+    }
+    for u in range(n_products):
+        products = rng.choice(n_products, size=RATINGS_PER_USER, replace=False)
+        data_processor.user_interactions[f"user{u}"] = [
+            {"product_id": f"prod{p}", "type": "rating", "rating": int(rng.integers(1, 6))}
+            for p in products
+        ]
+        data_processor.user_features[f"user{u}"] = {"name": f"User {u}"}
+    data_processor.mark_changed()
+    return data_processor
+
+def serve_requests(model_manager, n_requests=50):
+    """Score a few users the way the /recommendations route does."""
+    engine = model_manager.get_engine()
+    for user_id in list(engine.user_index)[:n_requests]:
+        engine.get_collaborative_recommendations(user_id, top_n=6)
+
+def run_worker(mode, model_manager, write_fd):
+    """Body of a forked worker; reports its memory through a pipe."""
+    if mode == 'private':
+        model_manager.train()
+    elif mode == 'mmap':
+        model_manager.load()
+    else:
+        init_worker(model_manager, poll_interval=3600)
+    serve_requests(model_manager)
+    os.write(write_fd, json.dumps(process_memory()).encode() + b'\n')
+    os._exit(0)
+
+def measure(mode, data_processor, model_dir, n_workers):
+    model_manager = ModelManager(data_processor, retrain_interval=None, retrain_after=None, model_dir=model_dir)
+    if mode == 'prefork':
+        prepare_master(model_manager)
+    elif mode == 'mmap':
+        model_manager.train()
+        model_manager.engine = None  # drop the master's private copy
+
+    read_fd, write_fd = os.pipe()
+    pids = []
+    for _ in range(n_workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            run_worker(mode, model_manager, write_fd)
+        pids.append(pid)
+    os.close(write_fd)
+
+    with os.fdopen(read_fd) as reader:
+        reports = [json.loads(line) for line in reader]
+    for pid in pids:
+        os.waitpid(pid, 0)
+
+    gc.unfreeze()
+    avg = {key: sum(r[key] for r in reports) / len(reports) / 1024 for key in ('rss', 'pss', 'private')}
+    print(f"{mode:>8}  workers {n_workers}  per-worker RSS {avg['rss']:7.1f} MB  "
+          f"PSS {avg['pss']:7.1f} MB  private {avg['private']:7.1f} MB  "
+          f"total PSS {avg['pss'] * n_workers:8.1f} MB")
+
+if __name__ == '__main__':
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    n_products = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    rng = np.random.default_rng(42)
+    data_processor = synthetic_data_processor(n_products, rng)
+    print(f"dense similarity matrix: {n_products * n_products * 8 / 2 ** 20:.1f} MB")
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        for mode in ('private', 'prefork', 'mmap'):
+            measure(mode, data_processor, os.path.join(model_dir, mode), n_workers)
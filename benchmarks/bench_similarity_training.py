@@ -0,0 +1,63 @@
+"""
+Benchmark for item similarity training.
+
+Trains the top-K neighbour model on synthetic interaction matrices of growing
+catalog size and reports training time, peak traced memory and model size.
+Users and ratings per user grow with the catalog so density stays constant.
+
+Usage:
+    python benchmarks/bench_similarity_training.py [n_items ...]
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from recommendation import RecommendationEngine
+from similarity import similarity_nbytes, top_k_neighbours
+
+RATINGS_PER_USER = 20
+USERS_PER_ITEM = 2
+N_NEIGHBORS = 50
+
+def synthetic_interactions(n_items, rng):
+    """Build a sparse user x item rating matrix with a fixed number of ratings per user."""
+    n_users = n_items * USERS_PER_ITEM
+    rows = np.repeat(np.arange(n_users), RATINGS_PER_USER)
+    cols = rng.integers(0, n_items, size=len(rows))
+    ratings = rng.integers(1, 6, size=len(rows)).astype(np.float64)
+    matrix = csr_matrix((ratings, (rows, cols)), shape=(n_users, n_items))
+    matrix.sum_duplicates()
+    return matrix
+
+def run(n_items, rng):
+    matrix = synthetic_interactions(n_items, rng)
+    matrix_norm = RecommendationEngine._normalize_rows(matrix)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    neighbours = top_k_neighbours(matrix_norm, N_NEIGHBORS)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    dense_mb = n_items * n_items * 8 / 2 ** 20
+    print(f"{n_items:>8} items  {matrix.nnz:>9} ratings  train {elapsed:7.2f} s  "
+          f"peak {peak / 2 ** 20:8.1f} MB  model {similarity_nbytes(neighbours) / 2 ** 20:7.1f} MB  "
+          f"(dense would be {dense_mb:10.1f} MB)")
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 50000, 200000]
+    rng = np.random.default_rng(42)
+    for n_items in sizes:
+        run(n_items, rng)
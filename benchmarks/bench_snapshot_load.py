@@ -0,0 +1,55 @@
+"""
+Benchmark for restarting from a binary data snapshot.
+
+Writes a synthetic data file, loads it once with DataProcessor.load_data and
+saves a snapshot, then compares the time of parsing the data file with
+loading the snapshot.
+
+Usage:
+    python benchmarks/bench_snapshot_load.py [n_users] [interactions_per_user]
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from data_processor import DataProcessor
+from bench_streaming_load import write_data_file
+
+def timed(label, func):
+    """Report the wall time of one call."""
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:>16}  {time.perf_counter() - start:7.2f} s")
+    return result
+
+if __name__ == '__main__':
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    interactions_per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'data.json')
+        snapshot_dir = os.path.join(temp_dir, 'snapshot')
+        write_data_file(path, n_users, interactions_per_user)
+        print(f"file size {os.path.getsize(path) / 2 ** 20:.1f} MB, "
+              f"{n_users * interactions_per_user} interactions")
+
+        processor = DataProcessor(path)
+        assert timed('load_data', processor.load_data), processor.last_error
+        assert timed('save_snapshot', lambda: processor.save_snapshot(snapshot_dir)), processor.last_error
+
+        restored = DataProcessor(path)
+        assert timed('load_snapshot', lambda: restored.load_snapshot(snapshot_dir)), restored.last_error
+        assert len(restored.interaction_store) == len(processor.interaction_store)
+
+        # Same content with a new modification time: the file is hashed
+        os.utime(path)
+        assert timed('load (rehash)', lambda: DataProcessor(path).load_snapshot(snapshot_dir))
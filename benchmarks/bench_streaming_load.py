@@ -0,0 +1,85 @@
+"""
+Benchmark for streaming data loading.
+
+Writes a synthetic data file and compares the time and peak Python memory
+(tracemalloc) of json.load, the streaming record reader, and streaming the
+interactions straight into a compact InteractionStore.
+
+Usage:
+    python benchmarks/bench_streaming_load.py [n_users] [interactions_per_user]
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import tracemalloc
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from interaction_store import load_interaction_store
+from streaming_json import iter_records
+
+N_PRODUCTS = 5000
+
+def write_data_file(path, n_users, interactions_per_user):
+    """Write a data file in the format of data/sample_data.json, user by user."""
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('{"users": {')
+        for u in range(n_users):
+            user = {
+                "name": f"User {u}",
+                "preferences": ["electronics", "books"],
+                "interactions": [
+                    {"product_id": f"prod{(u * 7 + i) % N_PRODUCTS}", "type": "rating",
+                     "timestamp": "2025-04-01T10:30:15", "rating": (u + i) % 5 + 1,
+                     "product_name": "Wireless Headphones"}
+                    for i in range(interactions_per_user)
+                ]
+            }
+            file.write(('' if u == 0 else ', ') + json.dumps(f"user{u}") + ': ' + json.dumps(user))
+        file.write('}, "products": {')
+        file.write(', '.join(
+            f'"prod{p}": {{"name": "Product {p}", "category": "misc", "price": 10.0, "avg_rating": 4.0}}'
+            for p in range(N_PRODUCTS)
+        ))
+        file.write('}}')
+
+def measure(label, func):
+    """Report wall time and peak traced memory of one loader."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>24}  {elapsed:7.2f} s  peak {peak / 2 ** 20:8.1f} MB")
+    return result
+
+def count_records(path):
+    return sum(1 for _ in iter_records(path))
+
+def load_json(path):
+    with open(path) as file:
+        return json.load(file)
+
+if __name__ == '__main__':
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    interactions_per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'data.json')
+        write_data_file(path, n_users, interactions_per_user)
+        print(f"file size {os.path.getsize(path) / 2 ** 20:.1f} MB, "
+              f"{n_users * interactions_per_user} interactions")
+
+        measure('json.load', lambda: load_json(path))
+        measure('iter_records (discard)', lambda: count_records(path))
+        store = measure('load_interaction_store', lambda: load_interaction_store(path))
+        print(f"{'store arrays':>24}  {store.nbytes / 2 ** 20:17.1f} MB")
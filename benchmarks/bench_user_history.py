@@ -0,0 +1,60 @@
+"""
+Benchmark for reading the newest interactions of a power user.
+
+Tracks many events for one user, partly out of timestamp order, and compares
+sorting the whole history per call (the previous get_user_interactions) with
+reading the newest page off the time-ordered per-user index.
+
+Usage:
+    python benchmarks/bench_user_history.py [n_events] [calls]
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from user_tracker import UserTracker
+
+PAGE_SIZE = 10
+
+if __name__ == '__main__':
+    n_events = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    rng = np.random.default_rng(0)
+    start = datetime(2025, 1, 1)
+    # Mostly in order, with 5% of the events arriving up to a day late
+    offsets = np.arange(n_events) * 60 - (rng.random(n_events) < 0.05) * rng.integers(0, 86400, n_events)
+    tracker = UserTracker()
+    tracker.track_interactions([
+        {"user_id": "power_user", "product_id": f"prod{i % 500}", "type": "view",
+         "timestamp": (start + timedelta(seconds=int(offset))).isoformat()}
+        for i, offset in enumerate(offsets)
+    ])
+    records = list(tracker.user_interactions["power_user"])
+
+    began = time.perf_counter()
+    for _ in range(calls):
+        expected = sorted(records, key=lambda x: x.get('timestamp', ''), reverse=True)[:PAGE_SIZE]
+    sort_ms = (time.perf_counter() - began) / calls * 1000
+
+    tracker.get_user_interactions("power_user", limit=PAGE_SIZE)  # Builds the index
+    began = time.perf_counter()
+    for _ in range(calls):
+        newest = tracker.get_user_interactions("power_user", limit=PAGE_SIZE)
+    index_ms = (time.perf_counter() - began) / calls * 1000
+
+    assert [i["timestamp"] for i in newest] == [i["timestamp"] for i in expected]
+    print(f"{n_events} events, newest {PAGE_SIZE}")
+    print(f"  sort whole history  {sort_ms:8.3f} ms/call")
+    print(f"  time-ordered index  {index_ms:8.3f} ms/call")
@@ -0,0 +1,60 @@
+"""
+Gunicorn configuration for the Product Recommendation Engine.
+
+The application is preloaded in the master process, which loads or trains
+the model once and keeps retraining it in the background. Workers are forked
+with a read-only view of the master's model and afterwards memory-map every
+new version the master saves, so N workers share one copy of the model.
+Workers append tracked interactions to the shared event log, which the
+master reads to count and train on them. Every process writes its metrics
+to a shared directory, and a scrape of /metrics on any worker merges them.
+
+Usage:
+    gunicorn -c gunicorn.conf.py
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+
+pythonpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+wsgi_app = 'app:app'
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+# Request threads per worker; the served model and the tracker are safe to
+# share between threads, so fewer processes are needed for the same load
+threads = int(os.environ.get('THREADS', 4))
+preload_app = True
+
+# Seconds between worker checks for a newly saved model version
+MODEL_POLL_INTERVAL = 5.0
+# Seconds between master reads of the events logged by workers
+LOG_POLL_INTERVAL = 5.0
+
+def when_ready(server):
+    """Share the preloaded model with all workers forked from now on."""
+    import prefork
+    from app import metrics_exporter, model_manager, user_tracker
+
+    if not prefork.prepare_master(model_manager, user_tracker, LOG_POLL_INTERVAL):
+        server.log.warning("No model available to share: %s", model_manager.last_error)
+
+    # Training latencies are recorded here, so the master publishes too
+    metrics_exporter.clear()
+    metrics_exporter.start()
+
+def post_fork(server, worker):
+    """Make the worker follow models saved by the master instead of training."""
+    import prefork
+    from app import ingest_queue, metrics_exporter, model_manager
+    from metrics import REGISTRY
+
+    prefork.init_worker(model_manager, MODEL_POLL_INTERVAL)
+
+    # Threads do not survive fork; each worker needs its own event writer
+    ingest_queue.start()
+
+    # Counts recorded before the fork are the master's, which publishes them
+    REGISTRY.reset()
+    metrics_exporter.start()
@@ -11,44 +11,188 @@ Date: May 11, 2025
 from flask import Flask, render_template, request, jsonify, redirect, url_for
 import os
 import json
+import atexit
 from datetime import datetime
 
 # Import custom modules
 from data_processor import DataProcessor
-from recommendation import RecommendationEngine
+from ingest import IngestQueue, validate_event
+from interaction_store import InteractionStore
+from metrics import REGISTRY, MetricsExporter
+from model_manager import ModelManager
+from page_cache import PageCache
+from product_payloads import ProductPayloads, parse_fields
+from recommendation import STRATEGIES
+from result_cache import RecommendationCache, cache_weight
 from user_tracker import UserTracker
 
 app = Flask(__name__, static_folder='../static', template_folder='../templates')
 
-# Initialize data processor and recommendation engine
-DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'sample_data.json')
-data_processor = DataProcessor(DATA_PATH)
-data_processor.load_data()
-recommendation_engine = RecommendationEngine(data_processor)
-recommendation_engine.train_collaborative_filter()
+# Initialize data processor and recommendation engine. Every file the app
+# reads or writes lives in DATA_DIR, set by RECOMMENDER_DATA_DIR if given.
+DATA_DIR = os.environ.get('RECOMMENDER_DATA_DIR') or os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+DATA_PATH = os.path.join(DATA_DIR, 'sample_data.json')
+# The data processor and the user tracker share one columnar interaction store.
+# Startup reads a binary snapshot of DATA_PATH when it is still current and
+# otherwise parses the file once and writes a new snapshot.
+SNAPSHOT_DIR = os.path.join(DATA_DIR, 'snapshot')
+interaction_store = InteractionStore()
+data_processor = DataProcessor(DATA_PATH, interaction_store=interaction_store)
+if not data_processor.load_snapshot(SNAPSHOT_DIR) and data_processor.load_data():
+    data_processor.save_snapshot(SNAPSHOT_DIR)
 
-# Initialize user tracker
-user_tracker = UserTracker(DATA_PATH)
-user_tracker.load_interactions()
+# Initialize user tracker; new interactions go to an append-only log that
+# is periodically compacted into DATA_PATH
+EVENT_LOG_PATH = os.path.join(DATA_DIR, 'interactions.log')
+user_tracker = UserTracker(DATA_PATH, log_path=EVENT_LOG_PATH, interaction_store=interaction_store)
+# The data file is already loaded; only add the events logged since then
+user_tracker.replay_log()
+atexit.register(user_tracker.close)
+
+def data_fingerprint():
+    """Describe the loaded data as the data file plus the log bytes replayed onto it."""
+    source = data_processor.source_fingerprint()
+    return dict(source, log_bytes=user_tracker.log_offset) if source else None
+
+# Retrain in the background every RETRAIN_INTERVAL seconds or after
+# RETRAIN_AFTER new interactions, whichever comes first. Trained models are
+# saved to MODEL_DIR and memory-mapped from there on the next start, as
+# long as they were trained from the data loaded now.
+RETRAIN_INTERVAL = 300
+RETRAIN_AFTER = 100
+MODEL_DIR = os.path.join(DATA_DIR, 'model')
+model_manager = ModelManager(
+    data_processor,
+    retrain_interval=RETRAIN_INTERVAL,
+    retrain_after=RETRAIN_AFTER,
+    model_dir=MODEL_DIR,
+    data_fingerprint=data_fingerprint
+)
+model_manager.load_or_train()
+model_manager.start()
+
+# Every tracked interaction also updates the served model in place
+user_tracker.add_listener(model_manager.on_stored_interaction)
+
+# Repeat visits are served from a per-user cache of top-N results. A user's
+# entries are dropped when they interact, results of older model versions
+# are never served, and RESULT_CACHE_TTL bounds how long a user's results
+# can miss in-place model updates caused by other users.
+RECOMMENDATION_COUNT = 6
+COLLAB_WEIGHT = 0.7
+RESULT_CACHE_ENTRIES = 10000
+RESULT_CACHE_BYTES = 16 * 1024 * 1024
+RESULT_CACHE_TTL = 60
+recommendation_cache = RecommendationCache(
+    max_entries=RESULT_CACHE_ENTRIES,
+    max_bytes=RESULT_CACHE_BYTES,
+    ttl=RESULT_CACHE_TTL
+)
+user_tracker.add_listener(recommendation_cache.on_interaction)
+
+# Batched events are validated in the request and written by a background
+# thread; MAX_BATCH_EVENTS bounds one request, INGEST_QUEUE_SIZE the backlog
+MAX_BATCH_EVENTS = 1000
+INGEST_QUEUE_SIZE = 100000
+ingest_queue = IngestQueue(user_tracker, max_size=INGEST_QUEUE_SIZE)
+ingest_queue.start()
+atexit.register(ingest_queue.stop)
+
+# Interaction history is paged newest first
+HISTORY_PAGE_SIZE = 10
+MAX_HISTORY_PAGE_SIZE = 100
+
+# The JSON recommendations API answers with product payloads serialized
+# once per catalog version; MAX_RECOMMENDATION_COUNT bounds ?top_n=
+MAX_RECOMMENDATION_COUNT = 100
+product_payloads = ProductPayloads(data_processor)
+
+# The home page lists CATALOG_PAGE_SIZE products per page. Rendered pages
+# are cached by (catalog version, category, page); since the key changes
+# with the catalog, entries never go stale and only LRU eviction applies.
+CATALOG_PAGE_SIZE = 24
+CATALOG_CACHE_PAGES = 256
+catalog_page_cache = PageCache(max_entries=CATALOG_CACHE_PAGES)
+
+def cached_recommendations(engine, user_id, top_n, strategy):
+    """Get recommendations of one strategy through the result cache."""
+    return recommendation_cache.get_or_compute(
+        user_id, top_n, cache_weight(strategy, COLLAB_WEIGHT), engine.model_version,
+        lambda: engine.get_recommendations(user_id, top_n=top_n, strategy=strategy, collab_weight=COLLAB_WEIGHT)
+    )
+
+def render_catalog_page(page, category):
+    """Render the home page for one page of the catalog."""
+    products, total = data_processor.get_catalog_page(page, CATALOG_PAGE_SIZE, category)
+    pages = max(1, -(-total // CATALOG_PAGE_SIZE))
+    return render_template(
+        'index.html',
+        users=list(data_processor.user_features.keys()),
+        products=products,
+        categories=data_processor.get_categories(),
+        category=category,
+        page=page,
+        pages=pages,
+        total=total
+    )
+
+# Model size and cache effectiveness are read when /metrics is scraped;
+# latencies of the instrumented calls are recorded as they happen
+def _model_stat(name):
+    engine = model_manager.get_engine()
+    return engine.model_stats()[name] if engine is not None else 0
+
+def _hit_ratio(cache):
+    stats = cache.stats()
+    lookups = stats['hits'] + stats['misses']
+    return stats['hits'] / lookups if lookups else 0.0
+
+REGISTRY.gauge('recommender_model_bytes', 'Bytes held by the served model matrices.',
+               func=lambda: _model_stat('bytes'))
+REGISTRY.gauge('recommender_interaction_matrix_nnz', 'Stored entries of the served interaction matrix.',
+               func=lambda: _model_stat('nnz'))
+REGISTRY.gauge('recommender_model_version', 'Version of the served model.',
+               func=lambda: model_manager.model_version)
+REGISTRY.gauge('recommender_interactions', 'Interactions in the interaction store.',
+               func=lambda: len(interaction_store))
+for cache_name, cache in (('results', recommendation_cache), ('catalog_pages', catalog_page_cache)):
+    REGISTRY.counter('recommender_cache_hits_total', 'Cache lookups answered from the cache.',
+                     func=lambda cache=cache: cache.stats()['hits'], cache=cache_name)
+    REGISTRY.counter('recommender_cache_misses_total', 'Cache lookups that had to compute.',
+                     func=lambda cache=cache: cache.stats()['misses'], cache=cache_name)
+    REGISTRY.gauge('recommender_cache_hit_ratio', 'Fraction of cache lookups answered from the cache.',
+                   func=lambda cache=cache: _hit_ratio(cache), cache=cache_name)
+
+# Under gunicorn every process publishes its metrics to METRICS_DIR, so a
+# scrape of any worker reports the whole server (see gunicorn.conf.py)
+METRICS_DIR = os.path.join(DATA_DIR, 'metrics')
+metrics_exporter = MetricsExporter(REGISTRY, METRICS_DIR)
 
 @app.route('/')
 def index():
-    """Render the home page with user selection and product catalog."""
-    # Load data if not already loaded
-    if not data_processor.product_data:
-        data_processor.load_data()
+    """
+    Render the home page with user selection and one page of the product catalog.
     
-    # Get users and products
-    users = list(data_processor.user_features.keys())
-    
-    # Format products for display
-    products = []
-    for product_id, product in data_processor.product_data.items():
-        product_copy = product.copy()
-        product_copy['id'] = product_id
-        products.append(product_copy)
+    Query parameters: page (starting at 1, clamped to the last page) and
+    category; an unknown category redirects to the whole catalog. Rendered
+    pages are cached per catalog version and carry an ETag, so a browser
+    revalidating an unchanged page gets 304 Not Modified.
+    """
+    category = request.args.get('category') or None
+    # Only pages that exist may reach the page cache
+    if category is not None and category not in data_processor.get_categories():
+        return redirect(url_for('index'))
+    pages = max(1, -(-data_processor.get_catalog_size(category) // CATALOG_PAGE_SIZE))
+    page = min(max(request.args.get('page', 1, type=int), 1), pages)
     
-    return render_template('index.html', users=users, products=products)
+    body, etag = catalog_page_cache.get_or_render(
+        (data_processor.catalog_version, category, page),
+        lambda: render_catalog_page(page, category)
+    )
+    response = app.response_class(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 @app.route('/recommendations')
 def recommendations():
@@ -61,11 +205,13 @@ def recommendations():
     # Get user name
     user_name = data_processor.user_features[user_id].get('name', user_id)
     
-    # Get recommendations
-    recommendation_engine.train_collaborative_filter()
-    
-    # Use hybrid recommendations
-    recommended_product_ids = recommendation_engine.get_hybrid_recommendations(user_id, top_n=6)
+    # Serve from the last completed model; training happens in the background
+    recommendation_engine = model_manager.get_engine()
+    recommended_product_ids = []
+    if recommendation_engine is not None:
+        recommended_product_ids = cached_recommendations(
+            recommendation_engine, user_id, RECOMMENDATION_COUNT, 'hybrid'
+        )
     
     # Format recommended products for display
     recommended_products = []
@@ -103,14 +249,100 @@ def track_interaction():
     else:
         return jsonify({'success': False, 'error': 'Failed to track interaction'})
 
+@app.route('/api/track_interactions', methods=['POST'])
+def track_interactions():
+    """
+    API endpoint to track a batch of user interactions.
+    
+    Accepts a JSON array of events (or {"events": [...]}). Valid events are
+    queued and written in the background; invalid ones are listed in errors
+    by their index in the request. If the queue fills up, the indices of the
+    valid events that were not queued are listed in dropped, and the
+    response is 429 with a Retry-After header.
+    """
+    data = request.get_json(silent=True)
+    events = data.get('events') if isinstance(data, dict) else data
+    
+    if not isinstance(events, list):
+        return jsonify({'success': False, 'error': 'Expected a list of events'}), 400
+    if len(events) > MAX_BATCH_EVENTS:
+        return jsonify({'success': False, 'error': f'At most {MAX_BATCH_EVENTS} events per request'}), 413
+    
+    valid, valid_indices, errors = [], [], []
+    for index, event in enumerate(events):
+        normalized, error = validate_event(event)
+        if error:
+            errors.append({'index': index, 'error': error})
+        else:
+            valid.append(normalized)
+            valid_indices.append(index)
+    
+    # The queue accepts a prefix of the valid events; the rest are dropped
+    accepted = ingest_queue.submit(valid)
+    dropped = valid_indices[accepted:]
+    response = {
+        'success': not errors and not dropped,
+        'accepted': accepted,
+        'invalid': len(errors),
+        'errors': errors,
+        'dropped': dropped
+    }
+    
+    if dropped:
+        # Queue full: the caller should resend the dropped events later
+        response['error'] = 'Ingestion queue full'
+        return jsonify(response), 429, {'Retry-After': '1'}
+    return jsonify(response), 202
+
+@app.route('/api/recommendations/<user_id>')
+def api_recommendations(user_id):
+    """
+    API endpoint to get recommendations for a user as JSON.
+    
+    Query parameters: top_n (default RECOMMENDATION_COUNT, at most
+    MAX_RECOMMENDATION_COUNT), strategy (collab, content or hybrid) and
+    fields, a comma-separated list of product fields to return.
+    """
+    if user_id not in data_processor.user_features:
+        return jsonify({'success': False, 'error': 'Unknown user'}), 404
+    
+    strategy = request.args.get('strategy', 'hybrid')
+    if strategy not in STRATEGIES:
+        return jsonify({'success': False, 'error': f"strategy must be one of {', '.join(STRATEGIES)}"}), 400
+    
+    top_n = request.args.get('top_n', RECOMMENDATION_COUNT, type=int)
+    top_n = min(max(top_n, 1), MAX_RECOMMENDATION_COUNT)
+    fields = parse_fields(request.args.get('fields'))
+    
+    recommendation_engine = model_manager.get_engine()
+    product_ids = []
+    if recommendation_engine is not None:
+        product_ids = cached_recommendations(recommendation_engine, user_id, top_n, strategy)
+    
+    body = product_payloads.encode_recommendations(user_id, strategy, product_ids, fields)
+    return app.response_class(body, mimetype='application/json')
+
 @app.route('/api/user_interactions/<user_id>')
 def get_user_interactions(user_id):
-    """API endpoint to get user interactions."""
+    """
+    API endpoint to get user interactions, newest first.
+    
+    Returns HISTORY_PAGE_SIZE interactions (or ?limit=, at most
+    MAX_HISTORY_PAGE_SIZE) and a next_cursor; pass it back as ?cursor= for
+    the next older page.
+    """
     if not user_id:
         return jsonify({'success': False, 'error': 'Missing user ID'})
     
+    limit = request.args.get('limit', HISTORY_PAGE_SIZE, type=int)
+    limit = min(max(limit, 1), MAX_HISTORY_PAGE_SIZE)
+    
     # Get recent interactions
-    interactions = user_tracker.get_user_interactions(user_id, limit=10)
+    interactions, next_cursor = user_tracker.get_user_interactions_page(
+        user_id, limit=limit, cursor=request.args.get('cursor')
+    )
+    if interactions is None:
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
     
     # Enhance with product names
     for interaction in interactions:
@@ -118,7 +350,12 @@ def get_user_interactions(user_id):
         if product_id in data_processor.product_data:
             interaction['product_name'] = data_processor.product_data[product_id].get('name')
     
-    return jsonify({'success': True, 'interactions': interactions})
+    return jsonify({'success': True, 'interactions': interactions, 'next_cursor': next_cursor})
+
+@app.route('/metrics')
+def metrics():
+    """Expose latency histograms, counters and gauges in the Prometheus text format."""
+    return app.response_class(metrics_exporter.render(), mimetype='text/plain; version=0.0.4')
 
 # Development server configuration
 if __name__ == '__main__':
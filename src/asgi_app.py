@@ -0,0 +1,361 @@
+"""
+Asynchronous Serving Path for Product Recommendation Engine
+
+This module serves the recommendation and tracking endpoints as a plain ASGI
+application, so one process can hold many thousands of open connections on
+an asyncio event loop instead of one blocked worker thread per request:
+
+    GET  /recommendations?user_id=<id>        rendered recommendations page
+    GET  /api/recommendations/<user_id>       recommendations as JSON
+    POST /api/track_interaction               track one interaction (JSON body)
+    GET  /api/user_interactions/<user_id>     interaction history, newest first
+
+The event loop never scores or touches the disk itself. Cached results are
+served straight from the loop; scoring and template rendering run on a
+bounded thread pool, and tracking (which appends and fsyncs the event log)
+runs on a separate one, so a slow disk never delays recommendations. When a
+pool already has max_pending calls queued the request is answered with 503
+and a Retry-After header instead of piling up more work.
+
+It shares the data, model, tracker and result cache built by app.py, so the
+Flask and ASGI paths can run side by side.
+
+Usage:
+    uvicorn --factory asgi_app:create_app --app-dir src
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote
+
+from product_payloads import ProductPayloads, parse_fields
+from recommendation import STRATEGIES
+from result_cache import cache_weight
+
+MAX_BODY_BYTES = 64 * 1024
+
+class Overloaded(Exception):
+    """Raised when a pool already has its maximum number of pending calls."""
+
+class BoundedExecutor:
+    def __init__(self, max_workers, max_pending, name):
+        """
+        Initialize the pool.
+
+        Args:
+            max_workers (int): Worker threads
+            max_pending (int): Maximum calls running or waiting for a thread
+            name (str): Prefix of the worker thread names
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.max_pending = max_pending
+        # Only changed on the event loop thread, so no lock is needed
+        self.pending = 0
+
+    async def run(self, func, *args):
+        """
+        Run a blocking call on the pool without blocking the event loop.
+
+        Raises:
+            Overloaded: If max_pending calls are already queued
+        """
+        if self.pending >= self.max_pending:
+            raise Overloaded()
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        """Stop the worker threads once queued calls are done."""
+        self.executor.shutdown(wait=True)
+
+class AsyncApp:
+    def __init__(self, data_processor, model_manager, user_tracker, recommendation_cache,
+                 render_recommendations, recommendation_count=6, collab_weight=0.7,
+                 history_page_size=10, max_history_page_size=100, max_recommendation_count=100,
+                 product_payloads=None, scoring_workers=4, io_workers=4, max_pending=1000):
+        """
+        Initialize the ASGI application.
+
+        Args:
+            data_processor (DataProcessor): Loaded product and user data
+            model_manager (ModelManager): Source of the served model
+            user_tracker (UserTracker): Tracker that records interactions
+            recommendation_cache (RecommendationCache): Cache of top-N results
+            render_recommendations (callable): Renders the recommendations page
+                from (user_id, user_name, products) and returns HTML
+            recommendation_count (int): Recommendations per page
+            collab_weight (float): Weight of collaborative filtering
+            history_page_size (int): Default interactions per history page
+            max_history_page_size (int): Largest history page a client can ask for
+            max_recommendation_count (int): Largest top_n a client can ask for
+            product_payloads (ProductPayloads, optional): Serialized product
+                payloads, typically shared with the Flask application
+            scoring_workers (int): Threads for scoring and rendering
+            io_workers (int): Threads for tracking
+            max_pending (int): Maximum queued calls per pool before answering 503
+        """
+        self.data_processor = data_processor
+        self.model_manager = model_manager
+        self.user_tracker = user_tracker
+        self.recommendation_cache = recommendation_cache
+        self.render_recommendations = render_recommendations
+        self.recommendation_count = recommendation_count
+        self.collab_weight = collab_weight
+        self.history_page_size = history_page_size
+        self.max_history_page_size = max_history_page_size
+        self.max_recommendation_count = max_recommendation_count
+        self.product_payloads = product_payloads or ProductPayloads(data_processor)
+
+        # Scoring is mostly NumPy/SciPy work that releases the GIL; tracking
+        # waits on the disk. Separate pools keep either from starving the other.
+        self.scoring = BoundedExecutor(scoring_workers, max_pending, 'scoring')
+        self.io = BoundedExecutor(io_workers, max_pending, 'tracking')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        path = scope['path']
+        method = scope['method']
+        if method == 'HEAD':
+            send = self._headers_only(send)
+        try:
+            if path == '/recommendations':
+                handler, allowed = self.recommendations, ('GET', 'HEAD')
+            elif path.startswith('/api/recommendations/'):
+                handler, allowed = self.api_recommendations, ('GET', 'HEAD')
+            elif path == '/api/track_interaction':
+                handler, allowed = self.track_interaction, ('POST',)
+            elif path.startswith('/api/user_interactions/'):
+                handler, allowed = self.user_interactions, ('GET', 'HEAD')
+            else:
+                await self._send_json(send, 404, {'success': False, 'error': 'Not found'})
+                return
+
+            if method not in allowed:
+                await self._send_json(send, 405, {'success': False, 'error': 'Method not allowed'},
+                                      [(b'allow', ', '.join(allowed).encode())])
+                return
+            await handler(scope, receive, send)
+
+        except Overloaded:
+            await self._send_json(send, 503, {'success': False, 'error': 'Server busy'},
+                                  [(b'retry-after', b'1')])
+
+    async def recommendations(self, scope, receive, send):
+        """Render recommendations for a specific user."""
+        user_id = self._query(scope).get('user_id')
+        user_features = self.data_processor.user_features.get(user_id) if user_id else None
+        if user_features is None:
+            await self._send(send, 302, b'', [(b'location', b'/')])
+            return
+
+        # Serve from the last completed model
+        product_ids = []
+        engine = self.model_manager.get_engine()
+        if engine is not None:
+            product_ids = await self._cached_recommendations(engine, user_id, self.recommendation_count, 'hybrid')
+
+        products = []
+        for product_id in product_ids:
+            product = self.data_processor.product_data.get(product_id)
+            if product is not None:
+                products.append(dict(product, id=product_id))
+
+        html = await self.scoring.run(
+            self.render_recommendations, user_id, user_features.get('name', user_id), products
+        )
+        await self._send(send, 200, html.encode('utf-8'), [(b'content-type', b'text/html; charset=utf-8')])
+
+    async def api_recommendations(self, scope, receive, send):
+        """Get recommendations for a user as JSON."""
+        user_id = unquote(scope['path'][len('/api/recommendations/'):])
+        if user_id not in self.data_processor.user_features:
+            await self._send_json(send, 404, {'success': False, 'error': 'Unknown user'})
+            return
+
+        query = self._query(scope)
+        strategy = query.get('strategy', 'hybrid')
+        if strategy not in STRATEGIES:
+            await self._send_json(send, 400, {'success': False,
+                                              'error': f"strategy must be one of {', '.join(STRATEGIES)}"})
+            return
+        try:
+            top_n = int(query.get('top_n', self.recommendation_count))
+        except ValueError:
+            top_n = self.recommendation_count
+        top_n = min(max(top_n, 1), self.max_recommendation_count)
+        fields = parse_fields(query.get('fields'))
+
+        product_ids = []
+        engine = self.model_manager.get_engine()
+        if engine is not None:
+            product_ids = await self._cached_recommendations(engine, user_id, top_n, strategy)
+
+        body = self.product_payloads.encode_recommendations(user_id, strategy, product_ids, fields)
+        await self._send(send, 200, body, [(b'content-type', b'application/json')])
+
+    async def _cached_recommendations(self, engine, user_id, top_n, strategy):
+        """
+        Get recommendations of one strategy through the result cache.
+
+        Uses the same cache keys as the Flask application; a cached result
+        skips the scoring pool.
+        """
+        return await self.recommendation_cache.get_or_compute_async(
+            user_id, top_n, cache_weight(strategy, self.collab_weight), engine.model_version,
+            lambda: self.scoring.run(engine.get_recommendations, user_id, top_n, strategy, self.collab_weight)
+        )
+
+    async def track_interaction(self, scope, receive, send):
+        """Track one user interaction from a JSON body."""
+        body = await self._read_body(receive)
+        if body is None:
+            await self._send_json(send, 413, {'success': False, 'error': 'Request body too large'})
+            return
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+
+        if not isinstance(data, dict) or 'user_id' not in data or 'product_id' not in data or 'type' not in data:
+            await self._send_json(send, 200, {'success': False, 'error': 'Missing required fields'})
+            return
+
+        # Appending to the event log may fsync, so it runs on the I/O pool
+        success = await self.io.run(
+            self.user_tracker.track_interaction, data['user_id'], data['product_id'], data['type'], data.get('value')
+        )
+        if success:
+            await self._send_json(send, 200, {'success': True})
+        else:
+            await self._send_json(send, 200, {'success': False, 'error': 'Failed to track interaction'})
+
+    async def user_interactions(self, scope, receive, send):
+        """Get one page of a user's interactions, newest first."""
+        user_id = unquote(scope['path'][len('/api/user_interactions/'):])
+        if not user_id:
+            await self._send_json(send, 200, {'success': False, 'error': 'Missing user ID'})
+            return
+
+        query = self._query(scope)
+        try:
+            limit = int(query.get('limit', self.history_page_size))
+        except ValueError:
+            limit = self.history_page_size
+        limit = min(max(limit, 1), self.max_history_page_size)
+
+        # Reading a page is O(limit) in memory, cheap enough for the loop
+        interactions, next_cursor = self.user_tracker.get_user_interactions_page(
+            user_id, limit=limit, cursor=query.get('cursor')
+        )
+        if interactions is None:
+            await self._send_json(send, 400, {'success': False, 'error': 'Invalid cursor'})
+            return
+
+        for interaction in interactions:
+            product = self.data_processor.product_data.get(interaction.get('product_id'))
+            if product is not None:
+                interaction['product_name'] = product.get('name')
+        await self._send_json(send, 200, {'success': True, 'interactions': interactions, 'next_cursor': next_cursor})
+
+    async def _lifespan(self, receive, send):
+        """Handle server startup and shutdown."""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.scoring.shutdown()
+                self.io.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    def _query(scope):
+        """Parse the query string, keeping the first value of each parameter."""
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        return {name: values[0] for name, values in query.items()}
+
+    @staticmethod
+    async def _read_body(receive):
+        """
+        Read the request body.
+
+        Returns:
+            bytes: The body, or None if it is larger than MAX_BODY_BYTES
+        """
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return b''
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    @staticmethod
+    def _headers_only(send):
+        """Wrap send so that a HEAD response keeps its headers but has an empty body."""
+        async def send_headers(message):
+            if message['type'] == 'http.response.body':
+                message = dict(message, body=b'')
+            await send(message)
+        return send_headers
+
+    @staticmethod
+    async def _send(send, status, body, headers=()):
+        """Send a complete response."""
+        headers = [(b'content-length', str(len(body)).encode())] + list(headers)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _send_json(self, send, status, data, headers=()):
+        """Send a JSON response."""
+        body = json.dumps(data).encode('utf-8')
+        await self._send(send, status, body, [(b'content-type', b'application/json')] + list(headers))
+
+def create_app():
+    """
+    Build the ASGI application around the objects app.py sets up.
+
+    Importing app loads the data, the model and the tracker once; the
+    Flask application is only used to render the page templates.
+
+    Returns:
+        AsyncApp: The ASGI application
+    """
+    import app as flask_module
+    from flask import render_template
+
+    def render_recommendations(user_id, user_name, products):
+        with flask_module.app.test_request_context('/recommendations'):
+            return render_template('recommendations.html', user_id=user_id, user_name=user_name, products=products)
+
+    return AsyncApp(
+        flask_module.data_processor,
+        flask_module.model_manager,
+        flask_module.user_tracker,
+        flask_module.recommendation_cache,
+        render_recommendations,
+        recommendation_count=flask_module.RECOMMENDATION_COUNT,
+        collab_weight=flask_module.COLLAB_WEIGHT,
+        history_page_size=flask_module.HISTORY_PAGE_SIZE,
+        max_history_page_size=flask_module.MAX_HISTORY_PAGE_SIZE,
+        max_recommendation_count=flask_module.MAX_RECOMMENDATION_COUNT,
+        product_payloads=flask_module.product_payloads
+    )
@@ -0,0 +1,236 @@
+"""
+Offline Batch Scoring for Product Recommendation Engine
+
+This module computes top-N collaborative recommendations for every user of
+a saved model without going through the web application. The users are
+split into shards that a pool of worker processes scores in parallel. Every
+worker memory-maps the same saved model, so the model arrays are shared
+through the page cache instead of being copied per process.
+
+Each shard is written as a pair of .npy files (product column indices and
+scores, one row per user) followed by a .done marker. A rerun skips shards
+that already have a marker, so an interrupted job resumes where it stopped.
+
+Output layout:
+
+    output_dir/
+        job.json                  model version, top_n and shard size
+        user_ids.json             user ID of every row, in shard order
+        product_ids.json          product ID of every column index
+        shard-00000.indices.npy   int32 array (users x top_n)
+        shard-00000.scores.npy    float32 array (users x top_n)
+        shard-00000.done
+
+Usage:
+    python src/batch_score.py --model-dir data/model --output-dir data/batch
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from data_processor import DataProcessor
+from model_store import ModelStoreError, get_current_version, load_model, pin_version
+
+JOB_FILE = 'job.json'
+
+# Engine loaded once per worker process by _init_worker
+_worker_engine = None
+
+def shard_ranges(n_users, shard_size):
+    """
+    Split the user rows into contiguous shards.
+
+    Args:
+        n_users (int): Number of users
+        shard_size (int): Users per shard
+
+    Returns:
+        list: (start, stop) row ranges
+    """
+    return [(start, min(start + shard_size, n_users)) for start in range(0, n_users, shard_size)]
+
+def shard_path(output_dir, shard, suffix):
+    """Get the path of one of a shard's files."""
+    return os.path.join(output_dir, f"shard-{shard:05d}.{suffix}")
+
+def _init_worker(model_dir, version):
+    """Memory-map the saved model once in each worker process."""
+    global _worker_engine
+    _worker_engine = load_model(model_dir, DataProcessor(), version=version)
+
+def _score_shard(shard, start, stop, top_n, output_dir, batch_size=None):
+    """
+    Score one shard and write its results.
+
+    Args:
+        shard (int): Shard number
+        start (int): First user row of the shard
+        stop (int): Row after the last user of the shard
+        top_n (int): Number of recommendations per user
+        output_dir (str): Output directory
+        batch_size (int, optional): Users scored per block
+
+    Returns:
+        tuple: (shard, number of users scored)
+    """
+    indices, scores = _worker_engine.score_batch(np.arange(start, stop), top_n, batch_size=batch_size)
+    for suffix, array in (('indices.npy', indices), ('scores.npy', scores)):
+        _save_array(shard_path(output_dir, shard, suffix), array)
+
+    # The marker is written last, so a shard is either done or rescored
+    with open(shard_path(output_dir, shard, 'done'), 'w') as file:
+        json.dump({'users': stop - start}, file)
+    return shard, stop - start
+
+def _save_array(path, array):
+    """Write an .npy file atomically."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        np.save(file, array)
+    os.replace(tmp_path, path)
+
+def _write_json(path, data):
+    """Write a JSON file atomically."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(data, file)
+    os.replace(tmp_path, path)
+
+def _prepare_output(output_dir, job, engine):
+    """
+    Create the output directory, or check that it belongs to the same job.
+
+    Raises:
+        ValueError: If the directory holds results of a different job
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    job_path = os.path.join(output_dir, JOB_FILE)
+    if os.path.exists(job_path):
+        with open(job_path) as file:
+            existing = json.load(file)
+        if existing != job:
+            raise ValueError(f"{output_dir} holds results of another job: {existing}")
+        return
+
+    _write_json(os.path.join(output_dir, 'user_ids.json'), engine.user_indices)
+    _write_json(os.path.join(output_dir, 'product_ids.json'), engine.product_indices)
+    _write_json(job_path, job)
+
+def run_batch_scoring(model_dir, output_dir, top_n=10, workers=None, shard_size=50000,
+                      batch_size=None, version=None):
+    """
+    Score every user of a saved model and write sharded results.
+
+    Args:
+        model_dir (str): Directory the model was saved to by ModelManager
+        output_dir (str): Directory for the results
+        top_n (int): Number of recommendations per user
+        workers (int, optional): Worker processes; defaults to the CPU count
+        shard_size (int): Users per shard
+        batch_size (int, optional): Users scored per block within a shard
+        version (str, optional): Model version; defaults to the current one
+
+    Returns:
+        dict: Number of shards scored and skipped, users scored and seconds taken
+
+    Raises:
+        ModelStoreError: If no model is saved in model_dir
+        ValueError: If output_dir holds results of a different job
+    """
+    started = time.time()
+    version = version or get_current_version(model_dir)
+    if not version:
+        raise ModelStoreError(f"No saved model in {model_dir}")
+
+    # Saving a newer model must not prune this version while workers map it
+    with pin_version(model_dir, version):
+        engine = load_model(model_dir, DataProcessor(), version=version)
+        job = {
+            'model_version': engine.model_version,
+            'version': version,
+            'top_n': top_n,
+            'shard_size': shard_size
+        }
+        _prepare_output(output_dir, job, engine)
+
+        shards = shard_ranges(len(engine.user_indices), shard_size)
+        pending = [
+            (shard, start, stop) for shard, (start, stop) in enumerate(shards)
+            if not os.path.exists(shard_path(output_dir, shard, 'done'))
+        ]
+
+        users = 0
+        workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_dir, version)) as executor:
+            futures = [
+                executor.submit(_score_shard, shard, start, stop, top_n, output_dir, batch_size)
+                for shard, start, stop in pending
+            ]
+            for future in as_completed(futures):
+                users += future.result()[1]
+
+    return {
+        'shards': len(pending),
+        'skipped': len(shards) - len(pending),
+        'users': users,
+        'seconds': time.time() - started
+    }
+
+def read_batch_results(output_dir):
+    """
+    Read the results of a completed batch scoring job.
+
+    Args:
+        output_dir (str): Output directory of run_batch_scoring
+
+    Yields:
+        tuple: (user_id, recommended product IDs) for every user, in row order
+    """
+    with open(os.path.join(output_dir, JOB_FILE)) as file:
+        job = json.load(file)
+    with open(os.path.join(output_dir, 'user_ids.json')) as file:
+        user_ids = json.load(file)
+    with open(os.path.join(output_dir, 'product_ids.json')) as file:
+        product_ids = json.load(file)
+
+    for shard, (start, stop) in enumerate(shard_ranges(len(user_ids), job['shard_size'])):
+        indices = np.load(shard_path(output_dir, shard, 'indices.npy'), mmap_mode='r')
+        for user_id, row in zip(user_ids[start:stop], indices):
+            yield user_id, [product_ids[idx] for idx in row]
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Score every user of a saved model offline.")
+    parser.add_argument('--model-dir', required=True, help="directory of the saved model")
+    parser.add_argument('--output-dir', required=True, help="directory for the sharded results")
+    parser.add_argument('--top-n', type=int, default=10, help="recommendations per user")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--shard-size', type=int, default=50000, help="users per shard")
+    parser.add_argument('--version', default=None, help="model version (default: current)")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = run_batch_scoring(
+            args.model_dir, args.output_dir, top_n=args.top_n, workers=args.workers,
+            shard_size=args.shard_size, version=args.version
+        )
+    except (ModelStoreError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Scored {summary['users']} users in {summary['shards']} shards "
+          f"({summary['skipped']} already done) in {summary['seconds']:.1f} s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
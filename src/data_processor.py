@@ -12,25 +12,50 @@ Date: May 11, 2025
 import json
 import os
 import numpy as np
-from collections import defaultdict
+from scipy.sparse import csr_matrix
+
+from data_snapshot import SnapshotError, file_fingerprint, load_snapshot, save_snapshot
+from interaction_store import InteractionStore, InteractionView
+from metrics import timed
+from streaming_json import iter_records
+
+# Highest rating a user or product can have
+RATING_SCALE = 5.0
 
 class DataProcessor:
-    def __init__(self, data_path=None):
+    def __init__(self, data_path=None, interaction_store=None):
         """
         Initialize the DataProcessor with optional data path.
         
         Args:
             data_path (str, optional): Path to the data file
+            interaction_store (InteractionStore, optional): Columnar store of
+                the user interactions, typically shared with a UserTracker
         """
         self.data_path = data_path
-        self.user_interactions = defaultdict(list)
+        self.interaction_store = interaction_store if interaction_store is not None else InteractionStore()
+        # Dict-of-lists view of the store; records are rebuilt on access
+        self.user_interactions = InteractionView(self.interaction_store)
         self.product_data = {}
         self.user_features = {}
         self.last_error = None
+        # Incremented whenever the loaded data changes so that consumers
+        # caching derived structures know when to rebuild them
+        self._version = 0
+        # Modification time of the data file when it was last loaded, to tie
+        # a snapshot to the data it was made from
+        self._loaded_mtime_ns = None
+        self._loaded_path = None
+        # (mtime, fingerprint) of the loaded data file, hashed on first use
+        self._source_fingerprint = None
+        # Product feature matrix and user preference masks for content-based
+        # scoring, built once per catalog and dropped by mark_changed
+        self._content_features = None
         
+    @timed('load_data')
     def load_data(self, data_path=None):
         """
-        Load data from JSON file.
+        Load data from a JSON or newline-delimited JSON (.ndjson) file.
         
         Args:
             data_path (str, optional): Path to override the instance data_path
@@ -49,31 +74,116 @@ class DataProcessor:
                 self.last_error = f"Data file not found: {path}"
                 return False
                 
-            with open(path, 'r') as file:
-                data = json.load(file)
-                
-            # Validate data structure
-            if not isinstance(data, dict):
-                self.last_error = "Invalid data format: root must be a dictionary"
-                return False
-                
-            if 'users' not in data or 'products' not in data:
-                self.last_error = "Invalid data format: missing 'users' or 'products' keys"
-                return False
+            # Stream the file one user or product at a time into a new
+            # store, so a failed load leaves the current data untouched
+            loaded_mtime_ns = os.stat(path).st_mtime_ns
+            store = InteractionStore()
+            user_features, products = {}, {}
+            for section, record_id, record in iter_records(path):
+                if not isinstance(record, dict):
+                    self.last_error = f"Invalid data format: {section} entry {record_id} must be a dictionary"
+                    return False
+                if section == 'users':
+                    if 'interactions' in record:
+                        store.extend_interactions(record_id, record['interactions'])
+                    user_features[record_id] = {k: v for k, v in record.items() if k != 'interactions'}
+                else:
+                    products[record_id] = record
                 
             # Process and store data
-            self._process_user_data(data['users'])
-            self._process_product_data(data['products'])
+            self.interaction_store.replace(store)
+            self.user_features.update(user_features)
+            self._process_product_data(products)
+            self._loaded_mtime_ns = loaded_mtime_ns
+            self._loaded_path = path
+            self.mark_changed()
             
             return True
             
         except json.JSONDecodeError:
             self.last_error = "Invalid JSON format in data file"
             return False
+        except ValueError as e:
+            self.last_error = str(e)
+            return False
         except Exception as e:
             self.last_error = f"Error loading data: {str(e)}"
             return False
     
+    def save_snapshot(self, snapshot_dir, data_path=None):
+        """
+        Save the loaded data as a binary snapshot for a fast restart.
+        
+        The snapshot records the data file's modification time, size and
+        hash, and is only loaded again while the file is unchanged.
+        
+        Args:
+            snapshot_dir (str): Directory of the snapshot
+            data_path (str, optional): Path to override the instance data_path
+            
+        Returns:
+            bool: True if the snapshot was saved, False otherwise
+        """
+        path = data_path or self.data_path
+        
+        if not path or not os.path.exists(path):
+            self.last_error = f"Data file not found: {path}"
+            return False
+            
+        try:
+            save_snapshot(snapshot_dir, self.interaction_store, self.product_data, self.user_features,
+                          path, loaded_mtime_ns=self._loaded_mtime_ns)
+            return True
+            
+        except SnapshotError as e:
+            self.last_error = str(e)
+            return False
+        except Exception as e:
+            self.last_error = f"Error saving snapshot: {str(e)}"
+            return False
+    
+    def load_snapshot(self, snapshot_dir, data_path=None):
+        """
+        Load data from a binary snapshot instead of parsing the data file.
+        
+        The interaction columns are memory-mapped, so this costs little more
+        than reading the ID and catalog tables.
+        
+        Args:
+            snapshot_dir (str): Directory of the snapshot
+            data_path (str, optional): Data file the snapshot must still match;
+                defaults to the instance data_path
+            
+        Returns:
+            bool: True if the snapshot was loaded, False if it is missing,
+                stale or unreadable
+        """
+        path = data_path or self.data_path
+        
+        if not path:
+            self.last_error = "No data path provided"
+            return False
+            
+        try:
+            loaded_mtime_ns = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+            store, products, users = load_snapshot(snapshot_dir, source_path=path)
+            
+            self.interaction_store.replace(store)
+            self.user_features.update(users)
+            self._process_product_data(products)
+            self._loaded_mtime_ns = loaded_mtime_ns
+            self._loaded_path = path
+            self.mark_changed()
+            
+            return True
+            
+        except SnapshotError as e:
+            self.last_error = str(e)
+            return False
+        except Exception as e:
+            self.last_error = f"Error loading snapshot: {str(e)}"
+            return False
+    
     def _process_user_data(self, users):
         """
         Process user data and extract interactions.
@@ -83,7 +193,8 @@ class DataProcessor:
         """
         for user_id, user_data in users.items():
             if 'interactions' in user_data:
-                self.user_interactions[user_id] = user_data['interactions']
+                self.interaction_store.remove_user(user_id)
+                self.interaction_store.extend_interactions(user_id, user_data['interactions'])
             
             # Extract user features
             features = {k: v for k, v in user_data.items() if k != 'interactions'}
@@ -98,35 +209,96 @@ class DataProcessor:
         """
         self.product_data = products
     
-    def get_user_interaction_matrix(self):
+    def source_fingerprint(self):
+        """
+        Describe the data file the loaded data was read from.
+        
+        The file is hashed once per load, so a saved model can be matched
+        against the data it was trained from.
+        
+        Returns:
+            dict: Size and SHA-256 hash of the file, or None if no file was
+                loaded or it has been modified since
+        """
+        path = self._loaded_path
+        try:
+            if path is None or os.stat(path).st_mtime_ns != self._loaded_mtime_ns:
+                return None
+            cached = self._source_fingerprint
+            if cached is None or cached[0] != self._loaded_mtime_ns:
+                fingerprint = file_fingerprint(path)
+                cached = self._source_fingerprint = (
+                    self._loaded_mtime_ns, {'bytes': fingerprint['bytes'], 'sha256': fingerprint['sha256']}
+                )
+            return dict(cached[1])
+        except OSError:
+            return None
+    
+    @property
+    def version(self):
+        """int: Data version, also advanced by every write to the interaction store."""
+        return self._version + self.interaction_store.version
+    
+    @property
+    def catalog_version(self):
+        """int: Version of product_data and user_features; tracked interactions leave it unchanged."""
+        return self._version
+    
+    def mark_changed(self):
+        """
+        Record that the loaded data has been modified.
+        
+        Call this after mutating user_interactions, user_features or
+        product_data directly so that cached matrices are rebuilt.
+        
+        Returns:
+            int: The new data version
+        """
+        self._content_features = None
+        self._version += 1
+        return self.version
+    
+    def add_interaction(self, user_id, interaction):
+        """
+        Add one interaction record to the loaded data.
+        
+        Args:
+            user_id (str): User ID
+            interaction (dict): Interaction record as built by UserTracker
+            
+        Returns:
+            int: The new data version
+        """
+        # New interactions leave product features and preferences unchanged
+        self.interaction_store.append_interaction(user_id, interaction)
+        return self.version
+    
+    @timed('get_user_interaction_matrix')
+    def get_user_interaction_matrix(self, sparse=False):
         """
         Create a user-product interaction matrix.
         
+        The matrix is exported from the interaction store's columns without
+        a Python loop over the interactions. Repeated (user, product) pairs
+        keep the last rating.
+        
+        Args:
+            sparse (bool): Return a scipy.sparse.csr_matrix instead of a dense
+                array. The sparse matrix only stores non-zero ratings.
+        
         Returns:
             tuple: (matrix, user_indices, product_indices)
         """
         if not self.user_interactions or not self.product_data:
             return None, None, None
             
-        # Create mappings for users and products
-        user_ids = list(self.user_interactions.keys())
+        # Snapshot the users; interactions may be added while training
+        user_ids = list(self.interaction_store.users)
         product_ids = list(self.product_data.keys())
         
-        user_idx = {uid: i for i, uid in enumerate(user_ids)}
-        product_idx = {pid: i for i, pid in enumerate(product_ids)}
-        
-        # Create interaction matrix
-        matrix = np.zeros((len(user_ids), len(product_ids)))
-        
-        for user_id, interactions in self.user_interactions.items():
-            for interaction in interactions:
-                if 'product_id' in interaction and 'rating' in interaction:
-                    product_id = interaction['product_id']
-                    if product_id in product_idx:
-                        u_idx = user_idx[user_id]
-                        p_idx = product_idx[product_id]
-                        matrix[u_idx, p_idx] = float(interaction['rating'])
-        
+        matrix = self.interaction_store.to_csr(product_ids, n_users=len(user_ids))
+        if not sparse:
+            matrix = matrix.toarray()
         return matrix, user_ids, product_ids
         
     def get_user_product_features(self, user_id):
@@ -173,6 +345,203 @@ class DataProcessor:
             
         return features
     
+    def get_product_feature_matrix(self):
+        """
+        Get the product feature matrix used for content-based scoring.
+        
+        Columns are a one-hot encoding of the product category followed by the
+        price and average rating, both scaled to [0, 1] so that no feature
+        dominates the others. Missing values are 0. The matrix is built once
+        and reused until mark_changed is called.
+        
+        Returns:
+            tuple: (features, product_ids, category_index) where features has
+                one row per product in product_ids and category_index maps a
+                category to its column
+        """
+        content = self._get_content_features()
+        return content['features'], content['product_ids'], content['category_index']
+    
+    def get_catalog_page(self, page=1, page_size=24, category=None):
+        """
+        Get one page of the product catalog, in catalog order.
+        
+        Args:
+            page (int): Page number, starting at 1
+            page_size (int): Products per page
+            category (str, optional): Only list products of this category
+            
+        Returns:
+            tuple: (products, total) where products are copies of the product
+                dicts with an added 'id' and total counts all matching products
+        """
+        content = self._get_content_features()
+        if category is None:
+            product_ids = content['product_ids']
+        else:
+            product_ids = content['category_products'].get(category, [])
+        
+        start = (max(page, 1) - 1) * page_size
+        products = [dict(self.product_data[pid], id=pid) for pid in product_ids[start:start + page_size]]
+        return products, len(product_ids)
+    
+    def get_catalog_size(self, category=None):
+        """
+        Count the products get_catalog_page pages through.
+        
+        Args:
+            category (str, optional): Only count products of this category
+            
+        Returns:
+            int: Number of matching products
+        """
+        content = self._get_content_features()
+        if category is None:
+            return len(content['product_ids'])
+        return len(content['category_products'].get(category, ()))
+    
+    def get_categories(self):
+        """
+        Get the product categories.
+        
+        Returns:
+            list: Category names in the order they first appear in the catalog
+        """
+        return list(self._get_content_features()['category_index'])
+    
+    def _get_content_features(self):
+        """
+        Get the cached content features, building them if needed.
+        
+        Callers keep the returned dict for the whole computation, since
+        mark_changed may drop the cache from another thread at any time.
+        
+        Returns:
+            dict: As built by _build_content_features
+        """
+        content = self._content_features
+        if content is None:
+            content = self._build_content_features()
+            self._content_features = content
+        return content
+    
+    def _build_content_features(self):
+        """
+        Build the product feature matrix and an empty preference mask cache.
+        
+        Returns:
+            dict: Feature matrix, product IDs, category index, product IDs by
+                category and mask cache
+        """
+        product_ids = list(self.product_data.keys())
+        products = [self.product_data[pid] for pid in product_ids]
+        
+        category_index = {}
+        for product in products:
+            if 'category' in product:
+                category_index.setdefault(product['category'], len(category_index))
+        
+        features = np.zeros((len(products), len(category_index) + 2))
+        for row, product in enumerate(products):
+            if 'category' in product:
+                features[row, category_index[product['category']]] = 1.0
+        
+        n_categories = len(category_index)
+        features[:, n_categories] = self._min_max_scale(products, 'price')
+        features[:, n_categories + 1] = np.array(
+            [float(product.get('avg_rating', 0.0)) for product in products]
+        ) / RATING_SCALE
+        
+        category_products = {category: [] for category in category_index}
+        for product_id, product in zip(product_ids, products):
+            if 'category' in product:
+                category_products[product['category']].append(product_id)
+        
+        return {
+            'features': features,
+            'product_ids': product_ids,
+            'category_index': category_index,
+            'category_products': category_products,
+            'product_index': {pid: i for i, pid in enumerate(product_ids)},
+            'preference_masks': {}
+        }
+    
+    @staticmethod
+    def _min_max_scale(products, field):
+        """
+        Scale a numeric product field to [0, 1] across the catalog.
+        
+        Args:
+            products (list): Product dicts
+            field (str): Name of the numeric field
+            
+        Returns:
+            np.ndarray: Scaled values, 0 where the field is missing
+        """
+        values = np.array([float(product.get(field, np.nan)) for product in products])
+        present = ~np.isnan(values)
+        scaled = np.zeros(len(values))
+        if present.any():
+            low, high = values[present].min(), values[present].max()
+            if high > low:
+                scaled[present] = (values[present] - low) / (high - low)
+        return scaled
+    
+    def get_user_preference_mask(self, user_id):
+        """
+        Get the categories a user prefers as a mask over the feature columns.
+        
+        Args:
+            user_id (str): User ID
+            
+        Returns:
+            np.ndarray: Boolean mask with one entry per category, or None if
+                the user is unknown
+        """
+        if user_id not in self.user_features:
+            return None
+            
+        content = self._get_content_features()
+        mask = content['preference_masks'].get(user_id)
+        if mask is None:
+            category_index = content['category_index']
+            mask = np.zeros(len(category_index), dtype=bool)
+            for category in self.user_features[user_id].get('preferences', []):
+                if category in category_index:
+                    mask[category_index[category]] = True
+            content['preference_masks'][user_id] = mask
+        return mask
+    
+    def get_user_rating_row(self, user_id):
+        """
+        Get a user's ratings as a sparse row aligned with the feature matrix.
+        
+        Costs O(interactions of the user); the last rating of a product wins.
+        
+        Args:
+            user_id (str): User ID
+            
+        Returns:
+            scipy.sparse.csr_matrix: Matrix of shape (1, n_products)
+        """
+        product_index = self._get_content_features()['product_index']
+        
+        store = self.interaction_store
+        # Arrival order, like the interaction matrix, not timestamp order
+        rows = np.sort(store.user_rows(user_id))
+        products = store.column('product')[rows]
+        ratings = {}
+        for code, rating in zip(products.tolist(), store.column('rating')[rows].tolist()):
+            p_idx = product_index.get(store.products[code])
+            if p_idx is not None and not np.isnan(rating):
+                ratings[p_idx] = rating
+        
+        columns = np.array(sorted(ratings), dtype=np.int64)
+        values = np.array([ratings[i] for i in columns.tolist()], dtype=np.float64)
+        row = csr_matrix((values, columns, [0, len(columns)]), shape=(1, len(product_index)))
+        row.eliminate_zeros()
+        return row
+    
     def validate_data_integrity(self):
         """
         Validate the integrity of the loaded data.
@@ -185,17 +554,20 @@ class DataProcessor:
             self.last_error = "No data loaded or empty data"
             return False
             
+        # Interactions without a product_id are dropped by the store when
+        # loaded, so only their count is left to report
+        store = self.interaction_store
+        if store.skipped:
+            self.last_error = f"Missing product_id in {store.skipped} interaction(s); they were skipped"
+            return False
+            
         # Validate user interaction references to products
-        for user_id, interactions in self.user_interactions.items():
-            for i, interaction in enumerate(interactions):
-                if 'product_id' not in interaction:
-                    self.last_error = f"Missing product_id in interaction {i} for user {user_id}"
-                    return False
-                    
-                product_id = interaction['product_id']
-                if product_id not in self.product_data:
-                    self.last_error = f"Interaction references non-existent product: {product_id}"
-                    return False
+        referenced = np.unique(store.column('product'))
+        for code in referenced.tolist():
+            product_id = store.products[code]
+            if product_id not in self.product_data:
+                self.last_error = f"Interaction references non-existent product: {product_id}"
+                return False
         
         return True
     
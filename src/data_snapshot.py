@@ -0,0 +1,268 @@
+"""
+Data Snapshot Module for Product Recommendation Engine
+
+This module writes the data loaded by a DataProcessor to a binary snapshot
+and reads it back without parsing JSON, so a restart no longer pays for
+decoding the whole data file. The snapshot is tied to the data file it was
+made from and is rejected once that file changes.
+
+Layout:
+    <snapshot_dir>/manifest.json                 source mtime, size and hash, field kinds
+    <snapshot_dir>/interactions_<column>.npy     InteractionStore columns
+    <snapshot_dir>/<strings>_offsets.npy         int64 byte offsets, one more than strings
+    <snapshot_dir>/<strings>_blob.bin            UTF-8 strings back to back
+
+Interaction columns are memory-mapped. User, product and interaction type
+IDs are string tables. Product records and user features are stored column
+by column. A field holding only int64-sized integers or only floats becomes
+one .npy array. A field holding only strings becomes a string table. Any
+other field, including one mixing integers and floats, becomes a string
+table of JSON values. Every field also has a boolean
+"present" array, because records may omit fields.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from interaction_store import COLUMNS, InteractionStore
+
+# 2: interaction sequence numbers, 3: UTC offsets of interaction timestamps,
+# 4: mixed int and float fields kept as JSON
+FORMAT_VERSION = 4
+MANIFEST_FILE = 'manifest.json'
+INT64_MIN = int(np.iinfo(np.int64).min)
+INT64_MAX = int(np.iinfo(np.int64).max)
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, incompatible or stale."""
+
+def file_fingerprint(path):
+    """
+    Describe a data file so a snapshot can detect changes to it.
+
+    Args:
+        path (str): Path of the data file
+
+    Returns:
+        dict: Modification time in nanoseconds, size in bytes and SHA-256 hash
+    """
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'bytes': stat.st_size, 'sha256': _file_checksum(path)}
+
+def _file_checksum(path):
+    """Compute the SHA-256 checksum of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def is_snapshot_fresh(manifest, source_path):
+    """
+    Check whether a snapshot still matches its data file.
+
+    An unchanged modification time and size is trusted without reading the
+    file. Otherwise the file is hashed, so a touched or copied file with the
+    same content still matches.
+
+    Args:
+        manifest (dict): Snapshot manifest
+        source_path (str): Path of the data file
+
+    Returns:
+        bool: True if the data file has the content the snapshot was made from
+    """
+    source = manifest.get('source')
+    if not source or not os.path.exists(source_path):
+        return False
+    stat = os.stat(source_path)
+    if stat.st_size != source['bytes']:
+        return False
+    if stat.st_mtime_ns == source['mtime_ns']:
+        return True
+    return _file_checksum(source_path) == source['sha256']
+
+def _save_strings(snapshot_dir, name, strings):
+    """Write a string table as byte offsets and a UTF-8 blob."""
+    encoded = [value.encode('utf-8') for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    np.save(os.path.join(snapshot_dir, f"{name}_offsets.npy"), offsets)
+    with open(os.path.join(snapshot_dir, f"{name}_blob.bin"), 'wb') as file:
+        file.write(b''.join(encoded))
+
+def _load_strings(snapshot_dir, name):
+    """Read a string table written by _save_strings."""
+    offsets = np.load(os.path.join(snapshot_dir, f"{name}_offsets.npy")).tolist()
+    with open(os.path.join(snapshot_dir, f"{name}_blob.bin"), 'rb') as file:
+        blob = file.read()
+    return [blob[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+def _field_kind(values):
+    """Pick the storage kind for the values of one record field."""
+    # Mixed ints and floats, or ints beyond int64, would not reload as parsed
+    if all(isinstance(v, int) and not isinstance(v, bool) and INT64_MIN <= v <= INT64_MAX for v in values):
+        return 'int'
+    if all(isinstance(v, float) for v in values):
+        return 'float'
+    if all(isinstance(v, str) for v in values):
+        return 'str'
+    return 'json'
+
+def _save_records(snapshot_dir, name, records):
+    """
+    Write a mapping of ID to record dict column by column.
+
+    Returns:
+        list: Name and kind of every field, for the manifest
+    """
+    ids = list(records.keys())
+    _save_strings(snapshot_dir, f"{name}_ids", ids)
+
+    field_names = []
+    for record in records.values():
+        for field in record:
+            if field not in field_names:
+                field_names.append(field)
+
+    fields = []
+    for i, field in enumerate(field_names):
+        prefix = os.path.join(snapshot_dir, f"{name}_f{i}")
+        present = np.array([field in records[record_id] for record_id in ids], dtype=bool)
+        values = [records[record_id][field] for record_id in ids if field in records[record_id]]
+        kind = _field_kind(values)
+
+        np.save(f"{prefix}_present.npy", present)
+        if kind in ('int', 'float'):
+            np.save(f"{prefix}_values.npy", np.array(values, dtype=np.int64 if kind == 'int' else np.float64))
+        elif kind == 'str':
+            _save_strings(snapshot_dir, f"{name}_f{i}", values)
+        else:
+            _save_strings(snapshot_dir, f"{name}_f{i}", [json.dumps(value) for value in values])
+        fields.append({'name': field, 'kind': kind})
+    return fields
+
+def _load_records(snapshot_dir, name, fields):
+    """Read a mapping of ID to record dict written by _save_records."""
+    ids = _load_strings(snapshot_dir, f"{name}_ids")
+    records = [{} for _ in ids]
+
+    for i, field in enumerate(fields):
+        prefix = os.path.join(snapshot_dir, f"{name}_f{i}")
+        rows = np.flatnonzero(np.load(f"{prefix}_present.npy")).tolist()
+        if field['kind'] in ('int', 'float'):
+            values = np.load(f"{prefix}_values.npy").tolist()
+        else:
+            values = _load_strings(snapshot_dir, f"{name}_f{i}")
+            if field['kind'] == 'json':
+                values = [json.loads(value) for value in values]
+        for row, value in zip(rows, values):
+            records[row][field['name']] = value
+
+    return dict(zip(ids, records))
+
+def save_snapshot(snapshot_dir, store, products, users, source_path, loaded_mtime_ns=None):
+    """
+    Write a snapshot, replacing any previous one in snapshot_dir.
+
+    Args:
+        snapshot_dir (str): Directory of the snapshot
+        store (InteractionStore): Interactions to save
+        products (dict): Product records by product ID
+        users (dict): User features by user ID
+        source_path (str): Data file the data was loaded from
+        loaded_mtime_ns (int, optional): Modification time of the data file
+            when it was loaded
+
+    Returns:
+        dict: The manifest written
+
+    Raises:
+        SnapshotError: If the data file changed after it was loaded
+    """
+    source = file_fingerprint(source_path)
+    if loaded_mtime_ns is not None and source['mtime_ns'] != loaded_mtime_ns:
+        raise SnapshotError(f"{source_path} has changed since it was loaded")
+
+    temp_dir = f"{snapshot_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+
+    columns, user_ids, product_ids, types = store.export()
+    for name, array in columns.items():
+        np.save(os.path.join(temp_dir, f"interactions_{name}.npy"), array)
+    _save_strings(temp_dir, 'interaction_users', user_ids)
+    _save_strings(temp_dir, 'interaction_products', product_ids)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'created': datetime.now().isoformat(),
+        'source': source,
+        'interactions': len(columns['user']),
+        'skipped_interactions': store.skipped,
+        # Only a handful of types, and one of them may be None
+        'interaction_types': types,
+        'product_fields': _save_records(temp_dir, 'products', products),
+        'user_fields': _save_records(temp_dir, 'users', users)
+    }
+    with open(os.path.join(temp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file)
+
+    # Swap the directories; a crash in between leaves no snapshot, which
+    # only costs a reload from the data file
+    old_dir = f"{snapshot_dir}.{os.getpid()}.old"
+    if os.path.exists(snapshot_dir):
+        os.rename(snapshot_dir, old_dir)
+    os.rename(temp_dir, snapshot_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return manifest
+
+def load_snapshot(snapshot_dir, source_path=None, mmap_mode='r'):
+    """
+    Read a snapshot.
+
+    Args:
+        snapshot_dir (str): Directory of the snapshot
+        source_path (str, optional): Data file the snapshot must match; no
+            staleness check when omitted
+        mmap_mode (str, optional): Passed to np.load for the interaction
+            columns; None reads them into memory
+
+    Returns:
+        tuple: (store, products, users) as passed to save_snapshot
+
+    Raises:
+        SnapshotError: If the snapshot is missing, incompatible or stale
+    """
+    manifest_path = os.path.join(snapshot_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise SnapshotError(f"Snapshot not found: {snapshot_dir}")
+    with open(manifest_path, 'r', encoding='utf-8') as file:
+        manifest = json.load(file)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format version: {manifest.get('format_version')}")
+    if source_path and not is_snapshot_fresh(manifest, source_path):
+        raise SnapshotError(f"Snapshot is stale: {source_path} has changed")
+
+    columns = {
+        name: np.load(os.path.join(snapshot_dir, f"interactions_{name}.npy"), mmap_mode=mmap_mode)
+        for name, _ in COLUMNS
+    }
+    store = InteractionStore.from_columns(
+        columns,
+        _load_strings(snapshot_dir, 'interaction_users'),
+        _load_strings(snapshot_dir, 'interaction_products'),
+        manifest['interaction_types']
+    )
+    store.skipped = manifest.get('skipped_interactions', 0)
+    products = _load_records(snapshot_dir, 'products', manifest['product_fields'])
+    users = _load_records(snapshot_dir, 'users', manifest['user_fields'])
+    return store, products, users
@@ -0,0 +1,373 @@
+"""
+Event Log Module for Product Recommendation Engine
+
+This module implements an append-only interaction log stored as newline
+delimited JSON. Each event costs one append to the end of the file instead
+of a rewrite of the whole dataset. fsync calls are batched, and the log is
+periodically compacted into the base JSON data file.
+
+Unsynced events are synced after fsync_every further events or, at the
+latest, fsync_interval seconds after the first of them, by a timer thread
+when no further append comes along.
+
+Writers open the file with O_APPEND and write every batch with a single
+os.write call, so concurrent writers in several processes never overwrite
+each other. Compaction takes an exclusive file lock on the log only to
+rename it to <log>.compacting; appends take a shared one and reopen the log
+if it was renamed meanwhile, so every event lands in exactly one of the two
+files. The renamed file is then merged into the base file and deleted while
+appends to a fresh log go on. A compaction interrupted after the rename
+leaves <log>.compacting behind; its events are replayed before the log's
+and merged by the next compaction. Compactions, and readers that must not
+see one halfway, serialize on a lock file, <log>.lock.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - file locking is POSIX only
+    fcntl = None
+
+class EventLog:
+    def __init__(self, path, fsync_every=100, fsync_interval=1.0):
+        """
+        Initialize the event log.
+
+        Args:
+            path (str): Path of the log file; created on first append
+            fsync_every (int): fsync after this many unsynced events
+            fsync_interval (float): fsync when the oldest unsynced event is
+                older than this many seconds
+        """
+        self.path = path
+        self.rotated_path = f"{path}.compacting"
+        self.lock_path = f"{path}.lock"
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        self._fd = None
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._flush_timer = None
+
+        # flock locks belong to the open file description, which a forked
+        # child shares with its parent; children reopen the file instead
+        if hasattr(os, 'register_at_fork'):
+            log_ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: log_ref() and log_ref()._reset_after_fork())
+
+    def _reset_after_fork(self):
+        """Drop the parent's file descriptor and lock in a forked child."""
+        if self._fd is not None:
+            os.close(self._fd)
+        self._fd = None
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._flush_timer = None
+
+    def _open(self):
+        """Open the log file for appending if it is not open yet."""
+        if self._fd is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        return self._fd
+
+    def _lock_current(self, shared):
+        """
+        Open and lock the log, reopening it if a compaction renamed it away.
+
+        The check runs after the lock is taken: the compaction renames the
+        log under the exclusive lock, so nothing is written to a renamed log
+        once it has been renamed.
+
+        Returns:
+            int: File descriptor of the log, locked
+        """
+        while True:
+            fd = self._open()
+            self._file_lock(fd, shared=shared)
+            try:
+                current = os.stat(self.path)
+            except FileNotFoundError:
+                current = None
+            opened = os.fstat(fd)
+            if current is not None and (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino):
+                return fd
+
+            self._file_unlock(fd)
+            if self._unsynced:
+                self._sync(fd)
+            os.close(fd)
+            self._fd = None
+
+    @staticmethod
+    def encode(record):
+        """Encode one record as a compact JSON line."""
+        return json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    def append(self, record):
+        """
+        Append one event to the log.
+
+        Args:
+            record (dict): JSON-serializable event
+
+        Returns:
+            int: Number of bytes written
+        """
+        return self.append_many([record])
+
+    def append_many(self, records):
+        """
+        Append a batch of events with a single write.
+
+        Args:
+            records (list): JSON-serializable events
+
+        Returns:
+            int: Number of bytes written
+        """
+        payload = b''.join(self.encode(record) for record in records)
+        if not payload:
+            return 0
+
+        with self._lock:
+            fd = self._lock_current(shared=True)
+            try:
+                os.write(fd, payload)
+            finally:
+                self._file_unlock(fd)
+
+            self._unsynced += len(records)
+            if (self._unsynced >= self.fsync_every or
+                    time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync(fd)
+            elif self._flush_timer is None:
+                # Bound how long these events stay unsynced if the log goes idle
+                self._flush_timer = threading.Timer(self.fsync_interval, self._timed_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return len(payload)
+
+    def _timed_flush(self):
+        """Sync events that waited fsync_interval seconds for another append."""
+        with self._lock:
+            self._flush_timer = None
+            if self._fd is not None and self._unsynced:
+                self._sync(self._fd)
+
+    def flush(self):
+        """Force every appended event to stable storage."""
+        with self._lock:
+            if self._fd is not None and self._unsynced:
+                self._sync(self._fd)
+
+    def _sync(self, fd):
+        """fsync the log and reset the batching counters."""
+        os.fsync(fd)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def size(self):
+        """
+        Get the current size of the log file, without a renamed log being merged.
+
+        Returns:
+            int: Size in bytes, 0 if the log does not exist
+        """
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def file_id(self):
+        """
+        Identify the log file, which a compaction replaces with a fresh one.
+
+        Returns:
+            tuple: Device and inode of the log, None if it does not exist
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_dev, stat.st_ino
+
+    def replay(self):
+        """
+        Read every event not compacted yet, oldest first.
+
+        Events of an interrupted compaction come before those in the log. A
+        partially written last line (e.g. after a crash) is skipped.
+
+        Yields:
+            dict: Logged events
+        """
+        yield from self.replay_rotated()
+        yield from self._replay_file(self.path)
+
+    def replay_rotated(self):
+        """
+        Read the events of a compaction that has not merged them yet.
+
+        Yields:
+            dict: Logged events, oldest first
+        """
+        return self._replay_file(self.rotated_path)
+
+    @staticmethod
+    def _replay_file(path):
+        """Read the complete events of one log file."""
+        if not os.path.exists(path):
+            return
+
+        try:
+            with open(path, 'rb') as file:
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return  # Merged and deleted meanwhile
+
+    @contextmanager
+    def shared_lock(self):
+        """
+        Hold a shared lock so that no compaction starts or finishes meanwhile.
+
+        Appends go on; they are only held up for the rename that starts a
+        compaction.
+        """
+        with self._compaction_lock(shared=True):
+            yield
+
+    @contextmanager
+    def _compaction_lock(self, shared):
+        """Hold the lock file that serializes compactions across processes."""
+        directory = os.path.dirname(self.lock_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            self._file_lock(fd, shared=shared)
+            yield
+        finally:
+            os.close(fd)
+
+    def read_from(self, offset=0):
+        """
+        Read the complete events logged after a byte offset.
+
+        A partially written last line is left for the next call.
+
+        Args:
+            offset (int): Byte offset to start at, e.g. the end of a previous read
+
+        Returns:
+            tuple: (events, end) where end is the offset just past the last
+                complete line read
+        """
+        try:
+            with open(self.path, 'rb') as file:
+                file.seek(offset)
+                data = file.read()
+        except FileNotFoundError:
+            return [], offset
+
+        complete = data.rfind(b'\n') + 1
+        events = []
+        for line in data[:complete].splitlines():
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+        return events, offset + complete
+
+    def compact(self, merge):
+        """
+        Fold the log into a base snapshot.
+
+        The log is renamed to rotated_path under the exclusive lock, which
+        decides which events this compaction merges; appends then go to a
+        fresh log while merge runs. The renamed file is deleted once merge
+        returns. If an interrupted compaction left a renamed file behind,
+        that file is merged instead and the log waits for the next call.
+
+        Args:
+            merge (callable): Called with the list of logged events; must
+                persist them (e.g. into the base JSON file) before returning
+
+        Returns:
+            int: Number of events compacted
+        """
+        with self._compaction_lock(shared=False):
+            if not os.path.exists(self.rotated_path) and not self._rotate():
+                return 0
+
+            events = list(self.replay_rotated())
+            if events:
+                merge(events)
+            os.remove(self.rotated_path)
+            return len(events)
+
+    def _rotate(self):
+        """
+        Rename a non-empty log to rotated_path.
+
+        Returns:
+            bool: True if the log was renamed
+        """
+        with self._lock:
+            fd = self._lock_current(shared=False)
+            try:
+                if not os.fstat(fd).st_size:
+                    return False
+                if self._unsynced:
+                    self._sync(fd)
+                os.rename(self.path, self.rotated_path)
+            finally:
+                self._file_unlock(fd)
+
+            # The next append creates a fresh log
+            os.close(fd)
+            self._fd = None
+            return True
+
+    def close(self):
+        """Flush and close the log file."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._fd is not None:
+                if self._unsynced:
+                    self._sync(self._fd)
+                os.close(self._fd)
+                self._fd = None
+
+    @staticmethod
+    def _file_lock(fd, shared):
+        """Take a shared or exclusive advisory lock on the log file."""
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+
+    @staticmethod
+    def _file_unlock(fd):
+        """Release the advisory lock on the log file."""
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
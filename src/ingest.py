@@ -0,0 +1,213 @@
+"""
+Ingestion Module for Product Recommendation Engine
+
+This module accepts interaction events in batches without touching the disk
+in the request path. Validated events go into a bounded in-memory queue that
+a background writer thread drains in groups, persisting each group with one
+call to UserTracker.track_interactions. When the queue is full, callers are
+told how many events were not accepted so they can retry later.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import math
+import os
+import threading
+import weakref
+from collections import deque
+from datetime import datetime
+from numbers import Number
+
+MAX_ID_LENGTH = 128
+
+def validate_event(event):
+    """
+    Validate and normalize one interaction event.
+
+    Args:
+        event (dict): Event with user_id, product_id, type and optional value
+
+    Returns:
+        tuple: (normalized event, None) if valid, otherwise (None, error message)
+    """
+    if not isinstance(event, dict):
+        return None, "Event must be an object"
+
+    for field in ('user_id', 'product_id', 'type'):
+        value = event.get(field)
+        if not isinstance(value, str) or not value:
+            return None, f"Missing or invalid field: {field}"
+        if len(value) > MAX_ID_LENGTH:
+            return None, f"Field too long: {field}"
+
+    value = event.get('value')
+    if value is not None and (isinstance(value, bool) or not isinstance(value, Number)):
+        return None, "Field 'value' must be a number"
+    # json parses Infinity and NaN, which would poison the model's similarities
+    if value is not None and not math.isfinite(value):
+        return None, "Field 'value' must be finite"
+    if event['type'] == 'rating' and value is None:
+        return None, "Rating events require a value"
+
+    return {
+        'user_id': event['user_id'],
+        'product_id': event['product_id'],
+        'type': event['type'],
+        'value': value,
+        # Stamp on arrival so queueing delay does not shift event times
+        'timestamp': datetime.now().isoformat()
+    }, None
+
+class IngestQueue:
+    def __init__(self, user_tracker, max_size=100000, batch_size=1000, flush_interval=0.05,
+                 on_batch=None):
+        """
+        Initialize the ingestion queue.
+
+        Args:
+            user_tracker (UserTracker): Tracker that persists the events
+            max_size (int): Maximum number of queued events
+            batch_size (int): Maximum number of events written per group
+            flush_interval (float): Seconds the writer waits for more events
+                before writing a partial group
+            on_batch (callable, optional): Called with the number of events
+                after each group has been written
+        """
+        self.user_tracker = user_tracker
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_batch = on_batch
+
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.last_error = None
+        self._init_threading()
+
+        # Forked workers must not inherit the master's queued events or a
+        # condition variable locked by its writer thread
+        if hasattr(os, 'register_at_fork'):
+            queue_ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: queue_ref() and queue_ref()._init_threading())
+
+    def _init_threading(self):
+        """Create the queue, condition variable and thread handle."""
+        self._events = deque()
+        self._not_empty = threading.Condition(threading.Lock())
+        self._stopped = False
+        self._thread = None
+
+    def submit(self, events):
+        """
+        Queue validated events for writing.
+
+        Events are accepted in order until the queue is full; the rest are
+        rejected and should be retried by the caller.
+
+        Args:
+            events (list): Events returned by validate_event
+
+        Returns:
+            int: Number of events accepted
+        """
+        with self._not_empty:
+            room = max(0, self.max_size - len(self._events))
+            accepted = events[:room]
+            self._events.extend(accepted)
+            self.accepted += len(accepted)
+            self.rejected += len(events) - len(accepted)
+            if accepted:
+                self._not_empty.notify()
+        return len(accepted)
+
+    def qsize(self):
+        """
+        Get the number of events waiting to be written.
+
+        Returns:
+            int: Queue length
+        """
+        return len(self._events)
+
+    def start(self):
+        """
+        Start the background writer thread.
+
+        Returns:
+            bool: True if the thread was started, False if already running
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return False
+
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='ingest-writer', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout=None):
+        """
+        Stop the writer thread after it has written every queued event.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the thread to exit
+        """
+        with self._not_empty:
+            self._stopped = True
+            self._not_empty.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def drain(self):
+        """
+        Write every queued event in the calling thread.
+
+        Returns:
+            int: Number of events written
+        """
+        written = 0
+        while True:
+            with self._not_empty:
+                batch = self._take_batch()
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def _take_batch(self):
+        """Pop up to batch_size events; the condition lock must be held."""
+        count = min(self.batch_size, len(self._events))
+        return [self._events.popleft() for _ in range(count)]
+
+    def _write(self, batch):
+        """Persist one group of events and notify the batch callback."""
+        try:
+            written = self.user_tracker.track_interactions(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            self.last_error = f"Error writing events: {str(e)}"
+            return 0
+
+        self.written += written
+        if self.on_batch and written:
+            self.on_batch(written)
+        return written
+
+    def _run(self):
+        """Background loop that writes queued events in groups."""
+        while True:
+            with self._not_empty:
+                while not self._events and not self._stopped:
+                    self._not_empty.wait()
+                if self._stopped and not self._events:
+                    return
+
+                # Give a burst a moment to fill the group before writing
+                if len(self._events) < self.batch_size and not self._stopped:
+                    self._not_empty.wait(self.flush_interval)
+                batch = self._take_batch()
+
+            if batch:
+                self._write(batch)
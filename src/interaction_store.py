@@ -0,0 +1,739 @@
+"""
+Interaction Store Module for Product Recommendation Engine
+
+This module keeps user interactions in compact parallel NumPy arrays instead
+of one dict per event. User IDs, product IDs and interaction types are
+interned once and referenced by integer codes:
+
+    user        int32    index into the user IDs
+    product     int32    index into the product IDs
+    type        int16    index into the interaction types
+    rating      float32  NaN when the event has no rating
+    value       float32  NaN when the event has no value
+    timestamp   int64    microseconds since the epoch, -1 when unknown
+    utc_offset  int32    seconds east of UTC, NAIVE_OFFSET for naive timestamps
+    sequence    int64    order in which the event was stored
+
+An event costs 38 bytes instead of several hundred for a dict of strings.
+Timestamps keep microseconds and their UTC offset, so that ISO timestamps
+written by UserTracker or found in a data file round-trip exactly. Unlike a row position, an event's sequence number does
+not change when other users' events are removed, so it can identify the
+event in a history cursor.
+
+One store is shared by DataProcessor and UserTracker; InteractionView exposes
+it through the dict-of-lists interface the rest of the code expects, and
+to_csr builds the rating matrix straight from the columns.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import bisect
+import heapq
+import os
+import threading
+import weakref
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from scipy.sparse import coo_matrix
+
+from streaming_json import iter_records
+
+COLUMNS = (
+    ('user', np.int32),
+    ('product', np.int32),
+    ('type', np.int16),
+    ('rating', np.float32),
+    ('value', np.float32),
+    ('timestamp', np.int64),
+    ('utc_offset', np.int32),
+    ('sequence', np.int64)
+)
+MISSING_TIMESTAMP = -1
+NAIVE_OFFSET = np.iinfo(np.int32).min
+INITIAL_CAPACITY = 1024
+
+class StringIndex:
+    """Interned strings with dense integer codes."""
+
+    def __init__(self, values=()):
+        self.values = []
+        self.codes = {}
+        for value in values:
+            self.add(value)
+
+    def add(self, value):
+        """
+        Get the code of a string, assigning the next code if it is new.
+
+        Args:
+            value (str): String to intern
+
+        Returns:
+            int: Code of the string
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def get(self, value, default=None):
+        """Get the code of a string without adding it."""
+        return self.codes.get(value, default)
+
+    def __contains__(self, value):
+        return value in self.codes
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+def parse_timestamp(timestamp):
+    """
+    Convert an ISO timestamp to microseconds since the epoch.
+
+    Args:
+        timestamp (str): ISO 8601 timestamp; naive timestamps are local time
+
+    Returns:
+        int: Microseconds, or MISSING_TIMESTAMP if missing or invalid
+    """
+    return parse_timestamp_offset(timestamp)[0]
+
+def parse_timestamp_offset(timestamp):
+    """
+    Convert an ISO timestamp to microseconds since the epoch and its UTC offset.
+
+    Args:
+        timestamp (str): ISO 8601 timestamp; naive timestamps are local time
+
+    Returns:
+        tuple: (microseconds or MISSING_TIMESTAMP, offset in seconds or
+            NAIVE_OFFSET if the timestamp has none)
+    """
+    if not isinstance(timestamp, str):
+        return MISSING_TIMESTAMP, NAIVE_OFFSET
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return MISSING_TIMESTAMP, NAIVE_OFFSET
+    offset = moment.utcoffset()
+    offset = NAIVE_OFFSET if offset is None else int(offset.total_seconds())
+    return round(moment.timestamp() * 1000000), offset
+
+def format_timestamp(micros, offset=NAIVE_OFFSET):
+    """
+    Convert microseconds since the epoch back to an ISO timestamp.
+
+    Args:
+        micros (int): Microseconds since the epoch
+        offset (int): Seconds east of UTC to render the time in; NAIVE_OFFSET
+            gives a naive local timestamp
+
+    Returns:
+        str: ISO timestamp, or None if missing
+    """
+    if micros == MISSING_TIMESTAMP:
+        return None
+    seconds, micros = divmod(int(micros), 1000000)
+    zone = None if offset == NAIVE_OFFSET else timezone(timedelta(seconds=int(offset)))
+    return datetime.fromtimestamp(seconds, zone).replace(microsecond=micros).isoformat()
+
+class InteractionStore:
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        """
+        Initialize an empty store.
+
+        Args:
+            capacity (int): Number of events to allocate room for up front
+        """
+        self.capacity = max(capacity, 1)
+        self.version = 0
+        self._reset()
+        self._lock = threading.Lock()
+
+        # A writer holding the lock at fork time would leave it locked
+        # forever in the child
+        if hasattr(os, 'register_at_fork'):
+            store_ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: store_ref() and store_ref()._init_lock())
+
+    @classmethod
+    def from_columns(cls, columns, users, products, types):
+        """
+        Build a store around existing column arrays.
+
+        The arrays are used as they are, so memory-mapped (even read-only)
+        columns stay on disk until the first append grows them into memory.
+
+        Args:
+            columns (dict): Array of every column in COLUMNS, all of one length
+            users (list): User ID of every user code
+            products (list): Product ID of every product code
+            types (list): Interaction type of every type code
+
+        Returns:
+            InteractionStore: Store holding the given events
+        """
+        size = len(columns['user'])
+        store = cls(capacity=size)
+        store.users, store.products, store.types = StringIndex(users), StringIndex(products), StringIndex(types)
+        store._columns = {name: columns[name] for name, _ in COLUMNS}
+        store.size = size
+        store.next_sequence = int(columns['sequence'][-1]) + 1 if size else 0
+        return store
+
+    def _init_lock(self):
+        """Create a fresh lock in a forked child."""
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        """Drop every event and interned string."""
+        self.users = StringIndex()
+        self.products = StringIndex()
+        self.types = StringIndex()
+        self.size = 0
+        self.next_sequence = 0
+        # Interaction records dropped for lacking a product_id
+        self.skipped = 0
+        self._columns = {name: np.empty(self.capacity, dtype=dtype) for name, dtype in COLUMNS}
+        self._reset_user_index()
+
+    def _reset_user_index(self):
+        """Forget the per-user index; it is rebuilt on the next lookup."""
+        self._indexed = 0
+        self._order = np.empty(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._tail = {}
+        self._tail_size = 0
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name):
+        """
+        Get a read-only view of one column.
+
+        Args:
+            name (str): One of user, product, type, rating, value, timestamp
+
+        Returns:
+            np.ndarray: The first len(self) entries of the column
+        """
+        view = self._columns[name][:self.size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def nbytes(self):
+        """Bytes used by the column arrays, including spare capacity."""
+        return sum(array.nbytes for array in self._columns.values())
+
+    def _reserve(self, count):
+        """Grow the columns geometrically so that count more events fit."""
+        capacity = len(self._columns['user'])
+        needed = self.size + count
+        if needed <= capacity:
+            return
+        capacity = max(capacity, 1)
+        while capacity < needed:
+            capacity *= 2
+        for name, array in self._columns.items():
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self._columns[name] = grown
+
+    def _appended(self, user_code, start, count):
+        """Number new rows and record them in the per-user index and the version."""
+        sequences = self._columns['sequence']
+        sequences[start:start + count] = np.arange(self.next_sequence, self.next_sequence + count)
+        self.next_sequence += count
+        if self._indexed:
+            tail = self._tail.setdefault(user_code, [])
+            timestamps = self._columns['timestamp']
+            for row in range(start, start + count):
+                # Usually the newest event, so inserted at the end
+                bisect.insort(tail, (int(timestamps[row]), int(sequences[row]), row))
+            self._tail_size += count
+        self.version += 1
+
+    def append(self, user_id, product_id, interaction_type=None, rating=None, value=None,
+               timestamp=None):
+        """
+        Append one event.
+
+        Args:
+            user_id (str): User ID
+            product_id (str): Product ID
+            interaction_type (str, optional): Type of interaction
+            rating (float, optional): Rating given with the event
+            value (float, optional): Value associated with the event
+            timestamp (str, optional): ISO timestamp of the event
+
+        Returns:
+            int: Position of the event in the store
+        """
+        return self._append(user_id, product_id, interaction_type, rating, value, timestamp)[0]
+
+    def _append(self, user_id, product_id, interaction_type, rating, value, timestamp):
+        """Append one event; returns its row and the store version it produced."""
+        with self._lock:
+            self._reserve(1)
+            row = self.size
+            columns = self._columns
+            user_code = self.users.add(user_id)
+            columns['user'][row] = user_code
+            columns['product'][row] = self.products.add(product_id)
+            columns['type'][row] = self.types.add(interaction_type)
+            columns['rating'][row] = _to_float(rating)
+            columns['value'][row] = _to_float(value)
+            columns['timestamp'][row], columns['utc_offset'][row] = parse_timestamp_offset(timestamp)
+            self.size += 1
+            self._appended(user_code, row, 1)
+            return row, self.version
+
+    def append_interaction(self, user_id, interaction):
+        """
+        Append an interaction record as stored in the JSON data files.
+
+        Fields other than product_id, type, rating, value and timestamp (for
+        example a denormalized product_name) are not kept.
+
+        Args:
+            user_id (str): User ID
+            interaction (dict): Interaction record
+
+        Returns:
+            int: Store version produced by the write, or None if the record
+                has no product_id (counted in skipped). Concurrent writers
+                each get their own version, so a listener can tell which
+                write it was told of.
+        """
+        product_id = interaction.get('product_id')
+        if product_id is None:
+            self.skipped += 1
+            return None
+        return self._append(
+            user_id, product_id, interaction.get('type'), interaction.get('rating'),
+            interaction.get('value'), interaction.get('timestamp')
+        )[1]
+
+    def extend_interactions(self, user_id, interactions):
+        """
+        Append all interaction records of one user at once.
+
+        Args:
+            user_id (str): User ID
+            interactions (list): Interaction records; entries without a
+                product_id are skipped and counted in skipped
+
+        Returns:
+            int: Number of events appended
+        """
+        interactions = list(interactions)
+        given = len(interactions)
+        interactions = [i for i in interactions if isinstance(i, dict) and i.get('product_id') is not None]
+        count = len(interactions)
+        with self._lock:
+            self.skipped += given - count
+            user_code = self.users.add(user_id)
+            if not count:
+                return 0
+
+            self._reserve(count)
+            start = self.size
+            rows = slice(start, start + count)
+            columns = self._columns
+            columns['user'][rows] = user_code
+            columns['product'][rows] = [self.products.add(i['product_id']) for i in interactions]
+            columns['type'][rows] = [self.types.add(i.get('type')) for i in interactions]
+            columns['rating'][rows] = [_to_float(i.get('rating')) for i in interactions]
+            columns['value'][rows] = [_to_float(i.get('value')) for i in interactions]
+            timestamps = [parse_timestamp_offset(i.get('timestamp')) for i in interactions]
+            columns['timestamp'][rows] = [micros for micros, _ in timestamps]
+            columns['utc_offset'][rows] = [offset for _, offset in timestamps]
+            self.size += count
+            self._appended(user_code, start, count)
+            return count
+
+    def add_user(self, user_id):
+        """
+        Register a user without events.
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            int: Code of the user
+        """
+        with self._lock:
+            return self.users.add(user_id)
+
+    def clear(self):
+        """Remove every event and user."""
+        with self._lock:
+            self._reset()
+            self.version += 1
+
+    def replace(self, other):
+        """
+        Take over the contents of another store.
+
+        Used to swap in freshly loaded data while every holder of this store
+        keeps its reference.
+
+        Args:
+            other (InteractionStore): Store whose contents are moved here
+        """
+        with self._lock:
+            self.users, self.products, self.types = other.users, other.products, other.types
+            self._columns, self.size = other._columns, other.size
+            self.next_sequence, self.skipped = other.next_sequence, other.skipped
+            self._reset_user_index()
+            self.version += 1
+
+    def remove_user(self, user_id):
+        """
+        Remove every event of a user; the user stays registered.
+
+        This rewrites all columns and is meant for rare bulk updates.
+
+        Args:
+            user_id (str): User ID
+        """
+        with self._lock:
+            user_code = self.users.get(user_id)
+            if user_code is None:
+                return
+            keep = np.flatnonzero(self._columns['user'][:self.size] != user_code)
+            # New arrays rather than an in-place shift; the columns may be
+            # read-only memory maps of a snapshot
+            self._columns = {name: array[keep] for name, array in self._columns.items()}
+            self.size = len(keep)
+            self._reset_user_index()
+            self.version += 1
+
+    def export(self):
+        """
+        Get a consistent view of the whole store for saving.
+
+        Returns:
+            tuple: (columns, user IDs, product IDs, interaction types) where
+                columns maps every column name to an array of len(self) events
+        """
+        with self._lock:
+            columns = {name: array[:self.size] for name, array in self._columns.items()}
+            return columns, list(self.users), list(self.products), list(self.types)
+
+    def user_rows(self, user_id):
+        """
+        Get the positions of a user's events, oldest first.
+
+        Events are ordered by timestamp, events without one first, and
+        events with equal timestamps in the order they were appended.
+
+        The store keeps a time-ordered index over its rows (CSR-style offsets
+        per user into a permutation sorted by user and timestamp) plus a small
+        per-user tail of rows appended since the index was built, kept sorted
+        by inserting out-of-order events in place. The index is rebuilt once
+        the tail grows past an eighth of the store.
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            np.ndarray: Row positions of the user's events
+        """
+        with self._lock:
+            user_code = self._indexed_user(user_id)
+            if user_code is None:
+                return np.empty(0, dtype=np.int64)
+
+            rows = self._indexed_rows(user_code)
+            tail = self._tail.get(user_code)
+            if not tail:
+                return rows
+            rows = np.concatenate((rows, np.array([row for _, _, row in tail], dtype=np.int64)))
+            timestamps = self._columns['timestamp'][rows]
+            return rows[np.lexsort((rows, timestamps))]
+
+    def newest_rows(self, user_id, count, before=None):
+        """
+        Get the positions of a user's newest events, newest first.
+
+        Costs O(count + log n): both the indexed rows and the tail are
+        already in time order, so only their ends are read.
+
+        Args:
+            user_id (str): User ID
+            count (int): Maximum number of events
+            before (tuple, optional): (timestamp, sequence) key of an event;
+                only older events are returned, for paging through the history
+
+        Returns:
+            list: Row positions, newest first
+        """
+        with self._lock:
+            user_code = self._indexed_user(user_id)
+            if user_code is None or count <= 0:
+                return []
+
+            timestamps, sequences = self._columns['timestamp'], self._columns['sequence']
+            rows = self._indexed_rows(user_code)
+            tail = self._tail.get(user_code, [])
+            stop, tail_stop = len(rows), len(tail)
+            if before is not None:
+                # Both are sorted by (timestamp, sequence): sequence numbers
+                # grow with the row, and the index sort is stable
+                stop = bisect.bisect_left(range(len(rows)), tuple(before),
+                                          key=lambda i: (int(timestamps[rows[i]]), int(sequences[rows[i]])))
+                tail_stop = bisect.bisect_left(tail, tuple(before))
+
+            candidates = [(int(timestamps[row]), int(sequences[row]), int(row))
+                          for row in rows[max(stop - count, 0):stop]]
+            candidates += tail[max(tail_stop - count, 0):tail_stop]
+            return [row for _, _, row in heapq.nlargest(count, candidates)]
+
+    def event_key(self, row):
+        """
+        Get the (timestamp, sequence) key that orders an event in its user's history.
+
+        The key stays valid when rows move, e.g. after remove_user.
+
+        Args:
+            row (int): Position of the event
+
+        Returns:
+            tuple: (timestamp in microseconds, sequence number)
+        """
+        return int(self._columns['timestamp'][row]), int(self._columns['sequence'][row])
+
+    def _indexed_user(self, user_id):
+        """Get a user's code, rebuilding the index if needed; the lock must be held."""
+        user_code = self.users.get(user_id)
+        if user_code is not None and (self._indexed == 0 or self._tail_size > max(1024, self.size // 8)):
+            self._build_user_index()
+        return user_code
+
+    def _indexed_rows(self, user_code):
+        """Get a user's rows covered by the index; the lock must be held."""
+        if user_code + 1 < len(self._offsets):
+            return self._order[self._offsets[user_code]:self._offsets[user_code + 1]]
+        return np.empty(0, dtype=np.int64)
+
+    def _build_user_index(self):
+        """Sort the rows by user, then timestamp; the lock must be held."""
+        users = self._columns['user'][:self.size]
+        # lexsort is stable, so equal timestamps keep the append order
+        self._order = np.lexsort((self._columns['timestamp'][:self.size], users))
+        counts = np.bincount(users, minlength=len(self.users))
+        self._offsets = np.concatenate(([0], np.cumsum(counts)))
+        self._indexed = max(self.size, 1)
+        self._tail = {}
+        self._tail_size = 0
+
+    def records(self, rows):
+        """
+        Rebuild the interaction records of several events.
+
+        Args:
+            rows (iterable): Positions of the events
+
+        Returns:
+            list: Interaction records
+        """
+        return [self.record(row) for row in rows]
+
+    def record(self, row):
+        """
+        Rebuild the interaction record of one event.
+
+        Args:
+            row (int): Position of the event
+
+        Returns:
+            dict: Interaction record with the fields kept by the store
+        """
+        if not 0 <= row < self.size:
+            raise IndexError(row)
+        columns = self._columns
+        interaction = {
+            'product_id': self.products[columns['product'][row]],
+            'type': self.types[columns['type'][row]]
+        }
+        timestamp = format_timestamp(columns['timestamp'][row], columns['utc_offset'][row])
+        if timestamp is not None:
+            interaction['timestamp'] = timestamp
+        for name in ('value', 'rating'):
+            number = columns[name][row]
+            if not np.isnan(number):
+                interaction[name] = _from_float(number)
+        return interaction
+
+    def to_csr(self, product_ids, n_users=None):
+        """
+        Build the user x product rating matrix without a Python loop over events.
+
+        Rows are user codes, so row i belongs to self.users[i]. Events without
+        a rating or for a product not in product_ids are ignored, repeated
+        (user, product) pairs keep the last rating, and zero ratings are not
+        stored.
+
+        Args:
+            product_ids (list): Product ID of each matrix column
+            n_users (int, optional): Number of rows; defaults to every user
+
+        Returns:
+            scipy.sparse.csr_matrix: Matrix of shape (n_users, len(product_ids))
+        """
+        with self._lock:
+            size = self.size
+            users = self._columns['user'][:size]
+            products = self._columns['product'][:size]
+            ratings = self._columns['rating'][:size]
+            product_codes = list(self.products)
+        if n_users is None:
+            n_users = len(self.users)
+
+        # Map product codes to matrix columns; -1 for unknown products
+        product_columns = {pid: i for i, pid in enumerate(product_ids)}
+        column_of = np.array([product_columns.get(pid, -1) for pid in product_codes] or [-1],
+                             dtype=np.int64)
+
+        cols = column_of[products]
+        keep = np.flatnonzero((cols >= 0) & ~np.isnan(ratings) & (users < n_users))
+        rows, cols, ratings = users[keep].astype(np.int64), cols[keep], ratings[keep].astype(np.float64)
+
+        # Keep only the last occurrence of each (row, col) pair
+        shape = (n_users, len(product_ids))
+        keys = rows * shape[1] + cols
+        _, last = np.unique(keys[::-1], return_index=True)
+        keep = len(keys) - 1 - last
+
+        matrix = coo_matrix((ratings[keep], (rows[keep], cols[keep])), shape=shape).tocsr()
+        matrix.eliminate_zeros()
+        return matrix
+
+class UserInteractions:
+    """List-like view of one user's interactions in a store."""
+
+    def __init__(self, store, user_id):
+        self.store = store
+        self.user_id = user_id
+
+    def _records(self):
+        return self.store.records(self.store.user_rows(self.user_id).tolist())
+
+    def __iter__(self):
+        return iter(self._records())
+
+    def __len__(self):
+        return len(self.store.user_rows(self.user_id))
+
+    def __getitem__(self, index):
+        rows = self.store.user_rows(self.user_id)
+        if isinstance(index, slice):
+            return self.store.records(rows[index].tolist())
+        return self.store.record(int(rows[index]))
+
+    def __eq__(self, other):
+        if isinstance(other, (UserInteractions, list)):
+            return self._records() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(self._records())
+
+    def append(self, interaction):
+        """Append an interaction record for this user."""
+        self.store.append_interaction(self.user_id, interaction)
+
+    def extend(self, interactions):
+        """Append several interaction records for this user."""
+        self.store.extend_interactions(self.user_id, interactions)
+
+class InteractionView(MutableMapping):
+    """
+    Mapping of user ID to interaction records backed by a store.
+
+    Keeps the dict-of-lists interface of the original user_interactions
+    attribute; records are rebuilt from the store on access.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, user_id):
+        if user_id not in self.store.users:
+            raise KeyError(user_id)
+        return UserInteractions(self.store, user_id)
+
+    def __setitem__(self, user_id, interactions):
+        self.store.remove_user(user_id)
+        self.store.extend_interactions(user_id, list(interactions))
+
+    def __delitem__(self, user_id):
+        # Interned codes are never reused, so the user keeps an empty list
+        if user_id not in self.store.users:
+            raise KeyError(user_id)
+        self.store.remove_user(user_id)
+
+    def __contains__(self, user_id):
+        return user_id in self.store.users
+
+    def __iter__(self):
+        return iter(list(self.store.users))
+
+    def __len__(self):
+        return len(self.store.users)
+
+    def setdefault(self, user_id, default=None):
+        if user_id not in self.store.users:
+            self[user_id] = default or []
+        return self[user_id]
+
+    def clear(self):
+        self.store.clear()
+
+def load_interaction_store(path, chunk_size=None):
+    """
+    Stream the interactions of a data file straight into a store.
+
+    Only one user record is held as Python objects at a time, so memory is
+    bounded by the store's arrays rather than by the size of the file.
+
+    Args:
+        path (str): Path of a JSON or NDJSON data file
+        chunk_size (int, optional): Characters read from the file at a time
+
+    Returns:
+        InteractionStore: Interactions of every user, in file order
+    """
+    store = InteractionStore()
+    kwargs = {'chunk_size': chunk_size} if chunk_size else {}
+    for _, user_id, user_data in iter_records(path, sections=('users',), **kwargs):
+        store.extend_interactions(user_id, user_data.get('interactions', ()))
+    return store
+
+def _to_float(number):
+    """Convert an optional number to a float, NaN when missing or invalid."""
+    if number is None or isinstance(number, bool):
+        return np.nan
+    try:
+        return float(number)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _from_float(number):
+    """Convert a stored float32 back to the shortest Python number, int if integral."""
+    number = float(str(number))
+    return int(number) if number.is_integer() else number
@@ -0,0 +1,554 @@
+"""
+Metrics Module for Product Recommendation Engine
+
+This module records latency histograms, counters and gauges in process and
+renders them in the Prometheus text exposition format.
+
+Latencies are recorded in nanoseconds into HDR-style log-linear buckets:
+every power of two is split into 16 equal sub-buckets, so any recorded
+value is known to within 1/16 (6.25%) from 1 ns up to about 9 hours, in a
+fixed array of 672 counts. Recording is one index computation and two list
+updates, with no lock: under the GIL a concurrent update can very rarely
+be lost, which is accepted to keep a span well under a microsecond.
+
+Functions are instrumented with the timed decorator. Metrics are on unless
+the RECOMMENDER_METRICS environment variable is "0"; then timed returns the
+function unchanged, so instrumentation costs nothing at all.
+
+A registry only sees its own process. Under a pre-forking server each
+process runs a MetricsExporter that writes its registry to <pid>.json in a
+shared directory every few seconds, and a scrape of any worker renders the
+merge of all of them: histograms and counters are summed, gauges are kept
+per process with a pid label. Other processes' numbers are up to one write
+interval old.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import functools
+import json
+import math
+import os
+import threading
+import time
+import weakref
+
+ENABLED = os.environ.get('RECOMMENDER_METRICS', '1') != '0'
+
+# Name of the histogram family every timed span is recorded in
+LATENCY_METRIC = 'recommender_latency_seconds'
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_SHIFT = 40
+N_BUCKETS = (MAX_SHIFT + 2) * SUB_BUCKETS
+
+# Upper bounds in seconds of the buckets exported to Prometheus
+EXPORT_BOUNDS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+def bucket_index(value):
+    """
+    Get the histogram bucket of a value.
+
+    Args:
+        value (int): Non-negative value, e.g. nanoseconds
+
+    Returns:
+        int: Bucket index
+    """
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    if shift < 0:
+        shift = 0
+    return min((shift << SUB_BUCKET_BITS) + (value >> shift), N_BUCKETS - 1)
+
+def bucket_bounds(index):
+    """
+    Get the range of values counted in a histogram bucket.
+
+    Args:
+        index (int): Bucket index
+
+    Returns:
+        tuple: (low, high) with low inclusive and high exclusive
+    """
+    shift = max(index // SUB_BUCKETS - 1, 0)
+    low = (index - (shift << SUB_BUCKET_BITS)) << shift
+    return low, low + (1 << shift)
+
+def _format_labels(labels):
+    """Format a label dict as a Prometheus label set."""
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in sorted(labels.items())
+    )
+    return '{' + pairs + '}'
+
+def _format_value(value):
+    """Format a sample value."""
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    def __init__(self, labels=None):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            labels (dict, optional): Label values of this series
+        """
+        self.labels = labels or {}
+        self.counts = [0] * N_BUCKETS
+        self.sum_ns = 0
+
+    def record_ns(self, value):
+        """
+        Record one value in nanoseconds.
+
+        Args:
+            value (int): Duration in nanoseconds
+        """
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        if shift < 0:
+            shift = 0
+        index = (shift << SUB_BUCKET_BITS) + (value >> shift)
+        self.counts[index if index < N_BUCKETS else N_BUCKETS - 1] += 1
+        self.sum_ns += value
+
+    def percentile(self, q):
+        """
+        Estimate a percentile of the recorded values.
+
+        Args:
+            q (float): Percentile between 0 and 100
+
+        Returns:
+            float: Upper bound of the bucket holding the percentile in
+                nanoseconds, or 0.0 if nothing was recorded
+        """
+        counts = list(self.counts)
+        total = sum(counts)
+        if total == 0:
+            return 0.0
+        rank = max(math.ceil(total * q / 100.0), 1)
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank:
+                return float(bucket_bounds(index)[1] - 1)
+        return float(bucket_bounds(N_BUCKETS - 1)[1] - 1)
+
+    def cumulative_counts(self, bounds_ns):
+        """
+        Count recorded values at or below each bound.
+
+        A bucket is counted under the first bound its whole range fits
+        below, so a value may be attributed to the next higher bound.
+
+        Args:
+            bounds_ns (list): Ascending upper bounds in nanoseconds
+
+        Returns:
+            list: Cumulative count for each bound
+        """
+        result = []
+        seen, index = 0, 0
+        counts = list(self.counts)
+        for bound in bounds_ns:
+            while index < N_BUCKETS and bucket_bounds(index)[1] - 1 <= bound:
+                seen += counts[index]
+                index += 1
+            result.append(seen)
+        return result
+
+    def dump(self):
+        """Get the recorded values as JSON-serializable data."""
+        return {'counts': {index: count for index, count in enumerate(list(self.counts)) if count},
+                'sum_ns': self.sum_ns}
+
+    def merge(self, data):
+        """Add values dumped by another histogram."""
+        for index, count in data['counts'].items():
+            self.counts[int(index)] += count
+        self.sum_ns += data['sum_ns']
+
+    def reset(self):
+        """Forget every recorded value; timed keeps recording into the same list."""
+        self.counts[:] = [0] * N_BUCKETS
+        self.sum_ns = 0
+
+    def samples(self, name):
+        """Yield the Prometheus samples of this series."""
+        counts = self.cumulative_counts([bound * 1e9 for bound in EXPORT_BOUNDS])
+        total = sum(self.counts)
+        for bound, count in zip(EXPORT_BOUNDS, counts):
+            yield f"{name}_bucket", dict(self.labels, le=repr(bound)), count
+        yield f"{name}_bucket", dict(self.labels, le='+Inf'), total
+        yield f"{name}_sum", self.labels, self.sum_ns / 1e9
+        yield f"{name}_count", self.labels, total
+
+class Counter:
+    def __init__(self, labels=None, func=None):
+        """
+        Initialize a counter.
+
+        Args:
+            labels (dict, optional): Label values of this series
+            func (callable, optional): Returns the current total at scrape
+                time, for counts kept elsewhere (e.g. cache hits)
+        """
+        self.labels = labels or {}
+        self.func = func
+        self.value = 0
+
+    def inc(self, amount=1):
+        """Add to the counter."""
+        self.value += amount
+
+    def dump(self):
+        """Get the current total."""
+        return self.func() if self.func is not None else self.value
+
+    def merge(self, value):
+        """Add the total of another process."""
+        self.value += value
+
+    def reset(self):
+        """Set the counter back to zero."""
+        self.value = 0
+
+    def samples(self, name):
+        """Yield the Prometheus samples of this series."""
+        yield name, self.labels, self.func() if self.func is not None else self.value
+
+class Gauge:
+    def __init__(self, labels=None, func=None):
+        """
+        Initialize a gauge.
+
+        Args:
+            labels (dict, optional): Label values of this series
+            func (callable, optional): Returns the current value at scrape time
+        """
+        self.labels = labels or {}
+        self.func = func
+        self.value = 0
+
+    def set(self, value):
+        """Set the gauge."""
+        self.value = value
+
+    def dump(self):
+        """Get the current value."""
+        return self.func() if self.func is not None else self.value
+
+    def merge(self, value):
+        """Take the value of another process."""
+        self.value = value
+
+    def reset(self):
+        """Set the gauge back to zero."""
+        self.value = 0
+
+    def samples(self, name):
+        """Yield the Prometheus samples of this series."""
+        yield name, self.labels, self.func() if self.func is not None else self.value
+
+class Registry:
+    def __init__(self):
+        """Initialize an empty registry."""
+        # name -> (type, help, {label tuple: series}); in registration order
+        self._families = {}
+        self._init_lock()
+
+        # A scrape holding the lock at fork time would leave it locked
+        # forever in the child
+        if hasattr(os, 'register_at_fork'):
+            registry_ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: registry_ref() and registry_ref()._init_lock())
+
+    def _init_lock(self):
+        """Create the lock that guards the metric families."""
+        self._lock = threading.Lock()
+
+    def _all_series(self):
+        """List (name, type, help, series list) of every family."""
+        with self._lock:
+            return [(name, kind, help_text, list(series.values()))
+                    for name, (kind, help_text, series) in self._families.items()]
+
+    def _series(self, kind, name, help_text, labels, factory):
+        """Get or create one series of a metric family."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = (kind, help_text, {})
+            elif family[0] != kind:
+                raise ValueError(f"Metric {name} is already registered as a {family[0]}")
+            series = family[2].get(key)
+            if series is None:
+                series = family[2][key] = factory()
+            return series
+
+    def histogram(self, name, help_text='', **labels):
+        """
+        Get or create a latency histogram.
+
+        Args:
+            name (str): Metric name, in seconds as exported
+            help_text (str): Description for the HELP line
+            **labels: Label values of the series
+
+        Returns:
+            Histogram: The series
+        """
+        return self._series('histogram', name, help_text, labels, lambda: Histogram(labels))
+
+    def counter(self, name, help_text='', func=None, **labels):
+        """
+        Get or create a counter.
+
+        Args:
+            name (str): Metric name, conventionally ending in _total
+            help_text (str): Description for the HELP line
+            func (callable, optional): Returns the total at scrape time
+            **labels: Label values of the series
+
+        Returns:
+            Counter: The series
+        """
+        return self._series('counter', name, help_text, labels, lambda: Counter(labels, func))
+
+    def gauge(self, name, help_text='', func=None, **labels):
+        """
+        Get or create a gauge.
+
+        Args:
+            name (str): Metric name
+            help_text (str): Description for the HELP line
+            func (callable, optional): Returns the value at scrape time
+            **labels: Label values of the series
+
+        Returns:
+            Gauge: The series
+        """
+        return self._series('gauge', name, help_text, labels, lambda: Gauge(labels, func))
+
+    def dump(self):
+        """
+        Get every metric as JSON-serializable data, for merging elsewhere.
+
+        Returns:
+            list: [name, type, help, [[labels, values], ...]] per family
+        """
+        return [[name, kind, help_text, [[series.labels, series.dump()] for series in series_list]]
+                for name, kind, help_text, series_list in self._all_series()]
+
+    def merge(self, dump, pid=None, gauges=True):
+        """
+        Add the metrics another registry dumped.
+
+        Args:
+            dump (list): Result of Registry.dump
+            pid (int, optional): Process the dump came from; its gauges get
+                a pid label, since values of different processes do not add up
+            gauges (bool): Merge gauges too; False for a process that exited
+        """
+        for name, kind, help_text, series_list in dump:
+            if kind == 'gauge' and not gauges:
+                continue
+            factory = {'histogram': Histogram, 'counter': Counter, 'gauge': Gauge}[kind]
+            for labels, values in series_list:
+                if kind == 'gauge' and pid is not None:
+                    labels = dict(labels, pid=pid)
+                self._series(kind, name, help_text, labels, lambda: factory(labels)).merge(values)
+
+    def reset(self):
+        """
+        Set every recorded value back to zero.
+
+        Called in a freshly forked worker, whose parent publishes the values
+        recorded before the fork itself.
+        """
+        for _, _, _, series_list in self._all_series():
+            for series in series_list:
+                series.reset()
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text, version 0.0.4
+        """
+        lines = []
+        for name, kind, help_text, series_list in self._all_series():
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for series in series_list:
+                for sample_name, labels, value in series.samples(name):
+                    lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+class MetricsExporter:
+    def __init__(self, registry, directory, interval=5.0):
+        """
+        Initialize the exporter.
+
+        Args:
+            registry (Registry): Registry of this process
+            directory (str): Directory shared by all processes of the server
+            interval (float): Seconds between writes of this process's metrics
+        """
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self):
+        """bool: Whether this process is publishing its metrics."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def clear(self):
+        """Delete the metrics of earlier runs; call before any process starts."""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.directory, name))
+
+    def start(self):
+        """
+        Start writing this process's metrics in the background.
+
+        Also call it in every forked child: threads do not survive fork.
+
+        Returns:
+            bool: True if the thread was started, False if already running
+        """
+        if self.running:
+            return False
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.write()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-exporter', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout=None):
+        """Stop the background thread after a last write."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+            self.write()
+
+    def write(self):
+        """Write this process's metrics to <directory>/<pid>.json atomically."""
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(self.registry.dump(), file)
+        os.replace(temp_path, path)
+
+    def render(self):
+        """
+        Render the metrics of every process in the Prometheus text format.
+
+        Before start, only this process's registry is rendered.
+
+        Returns:
+            str: Metrics text, version 0.0.4
+        """
+        if not self.running:
+            return self.registry.render()
+
+        merged = Registry()
+        own_pid = os.getpid()
+        # This process's live values first, so family order stays stable
+        merged.merge(self.registry.dump(), own_pid)
+        for name in sorted(os.listdir(self.directory)):
+            pid = name[:-len('.json')] if name.endswith('.json') else ''
+            if not pid.isdigit() or int(pid) == own_pid:
+                continue
+            try:
+                with open(os.path.join(self.directory, name), 'r', encoding='utf-8') as file:
+                    dump = json.load(file)
+            except (OSError, ValueError):
+                continue  # Removed or replaced meanwhile
+            # An exited process still counted its events, but its gauges are gone
+            merged.merge(dump, int(pid), gauges=_process_alive(int(pid)))
+        return merged.render()
+
+    def _run(self):
+        """Background loop that writes the metrics every interval."""
+        while not self._stopped.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                pass  # Retried on the next interval
+
+def _process_alive(pid):
+    """Check whether a process exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, but belongs to another user
+    return True
+
+def timed(span, registry=None):
+    """
+    Decorate a function to record its latency.
+
+    Each call is recorded in the LATENCY_METRIC histogram with the label
+    span=<span>, including calls that raise. With metrics disabled the
+    function is returned unchanged.
+
+    Args:
+        span (str): Name of the instrumented operation
+        registry (Registry, optional): Registry to record in; defaults to REGISTRY
+
+    Returns:
+        callable: Decorator
+    """
+    def decorate(func):
+        if not ENABLED:
+            return func
+        histogram = (registry or REGISTRY).histogram(
+            LATENCY_METRIC, 'Latency of instrumented operations.', span=span
+        )
+        counts = histogram.counts
+        clock = time.perf_counter_ns
+
+        # Histogram.record_ns inlined to save a method call per span
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                shift = elapsed.bit_length() - SUB_BUCKET_BITS - 1
+                if shift < 0:
+                    shift = 0
+                index = (shift << SUB_BUCKET_BITS) + (elapsed >> shift)
+                counts[index if index < N_BUCKETS else N_BUCKETS - 1] += 1
+                histogram.sum_ns += elapsed
+        return wrapper
+    return decorate
@@ -0,0 +1,382 @@
+"""
+Model Manager Module for Product Recommendation Engine
+
+This module owns the lifecycle of the trained recommendation model. The model
+is trained once at startup and then retrained in a background thread, either
+on a fixed schedule or after a number of new interactions. Requests are always
+served from the last completed model, which is swapped in atomically.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import threading
+import time
+import weakref
+
+from model_store import ModelStoreError, get_current_version, load_model, save_model
+from recommendation import RecommendationEngine
+
+# Writes the live model holds back while waiting for an earlier one
+MAX_APPLIED_AHEAD = 1024
+
+class ModelManager:
+    def __init__(self, data_processor, retrain_interval=300, retrain_after=100,
+                 engine_factory=RecommendationEngine, model_dir=None, data_fingerprint=None,
+                 before_train=None):
+        """
+        Initialize the model manager.
+
+        Args:
+            data_processor: DataProcessor instance the models are trained from
+            retrain_interval (float, optional): Seconds between scheduled retrains,
+                None to disable scheduled retraining
+            retrain_after (int, optional): Number of new interactions that triggers
+                a retrain, None to disable interaction-triggered retraining
+            engine_factory (callable): Builds an untrained engine from a data processor
+            model_dir (str, optional): Directory where trained models are saved
+                after every successful training and loaded from at startup
+            data_fingerprint (callable, optional): Returns a JSON-serializable
+                description of the data currently loaded, or None if unknown.
+                It is saved with each model, and a saved model is only loaded
+                while it still matches.
+            before_train (callable, optional): Called before each training,
+                e.g. to read events that other processes logged
+        """
+        self.data_processor = data_processor
+        self.retrain_interval = retrain_interval
+        self.retrain_after = retrain_after
+        self.engine_factory = engine_factory
+        self.model_dir = model_dir
+        self.data_fingerprint = data_fingerprint
+        self.before_train = before_train
+
+        # Last completed model; replaced by a single reference assignment so
+        # readers never observe a partially trained engine
+        self.engine = None
+        self.model_version = 0
+        self.loaded_version = None
+        self.last_trained = None
+        self.last_error = None
+
+        self._pending_interactions = 0
+        # Data versions of writes applied to the live model ahead of an
+        # earlier write that has not been applied yet
+        self._applied_ahead = set()
+        self._init_threading()
+
+        # Locks held by the trainer thread at fork time would stay locked
+        # forever in the child, so give forked workers fresh ones
+        if hasattr(os, 'register_at_fork'):
+            manager_ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: manager_ref() and manager_ref()._init_threading())
+
+    def _init_threading(self):
+        """Create the locks, events and thread handle used by the manager."""
+        self._lock = threading.Lock()
+        self._train_lock = threading.Lock()
+        self._retrain_requested = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._feed_thread = None
+
+    def train(self):
+        """
+        Train a new model and publish it if training succeeds.
+
+        Concurrent calls are serialized; the current model keeps serving
+        requests until the new one is ready.
+
+        Returns:
+            bool: True if a new model was published
+        """
+        with self._train_lock:
+            with self._lock:
+                self._pending_interactions = 0
+
+            if self.before_train:
+                try:
+                    self.before_train()
+                except Exception as e:
+                    self.last_error = f"Error preparing training data: {str(e)}"
+
+            # Taken before training, so a model never claims data it may have missed
+            fingerprint = self.data_fingerprint() if self.data_fingerprint else None
+            engine = self.engine_factory(self.data_processor)
+            try:
+                trained = engine.train_collaborative_filter()
+            except Exception as e:
+                self.last_error = f"Error training model: {str(e)}"
+                return False
+
+            if not trained:
+                self.last_error = "Training failed: no interaction data"
+                return False
+
+            engine.model_version = self.model_version + 1
+            self._publish(engine)
+            self.last_trained = time.time()
+
+            if self.model_dir:
+                try:
+                    self.loaded_version = os.path.basename(save_model(
+                        engine, self.model_dir, data_fingerprint=fingerprint
+                    ))
+                except (OSError, ModelStoreError) as e:
+                    self.last_error = f"Error saving model: {str(e)}"
+            return True
+
+    def load(self, match_data=True):
+        """
+        Publish the current saved model from model_dir.
+
+        With a data_fingerprint, a model trained from other data is not
+        loaded, so load_or_train retrains instead. Without one the model is
+        published as out of date and its interactions are rebuilt from the
+        loaded data on first use.
+
+        Args:
+            match_data (bool): Check the data_fingerprint. Followers pass
+                False: the trainer's data differs from their own, so they
+                load every model as out of date.
+
+        Returns:
+            bool: True if a saved model was loaded
+        """
+        if not self.model_dir:
+            return False
+
+        try:
+            version = get_current_version(self.model_dir)
+            fingerprint = self.data_fingerprint() if match_data and self.data_fingerprint else None
+            engine = load_model(self.model_dir, self.data_processor, version=version,
+                                data_fingerprint=fingerprint)
+        except (OSError, ValueError, KeyError, ModelStoreError) as e:
+            self.last_error = f"Error loading model: {str(e)}"
+            return False
+
+        self._publish(engine)
+        self.loaded_version = version
+        return True
+
+    def load_or_train(self):
+        """
+        Load the saved model if there is one, otherwise train a new one.
+
+        Returns:
+            bool: True if a model is available
+        """
+        return self.load() or self.train()
+
+    def _publish(self, engine):
+        """Make a model the one served to requests."""
+        # Under the lock, so no write applied to the old model is counted for the new one
+        with self._lock:
+            self._applied_ahead.clear()
+            self.engine = engine
+        self.model_version = engine.model_version
+
+    def start(self):
+        """
+        Start the background retraining thread.
+
+        Returns:
+            bool: True if the thread was started, False if already running
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return False
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='model-retrainer', daemon=True)
+        self._thread.start()
+        return True
+
+    def start_follower(self, poll_interval=5.0):
+        """
+        Start a thread that loads each new model version saved by another process.
+
+        Used by pre-forked workers: one process trains and saves to model_dir,
+        every follower memory-maps the saved arrays instead of training. A
+        followed model is never in sync with the follower's own data, so its
+        interactions are rebuilt from that data on first use.
+
+        Args:
+            poll_interval (float): Seconds between checks of model_dir
+
+        Returns:
+            bool: True if the thread was started
+        """
+        if not self.model_dir or (self._thread is not None and self._thread.is_alive()):
+            return False
+
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._follow, args=(poll_interval,), name='model-follower', daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def start_feed(self, read_interactions, poll_interval=5.0):
+        """
+        Start a thread that reads interactions other processes recorded.
+
+        Used by a trainer that serves no requests, such as the pre-fork
+        master: the new interactions count towards retrain_after as if they
+        had been recorded here.
+
+        Args:
+            read_interactions (callable): Adds new interactions to the data
+                and returns how many, e.g. UserTracker.tail_log
+            poll_interval (float): Seconds between calls
+
+        Returns:
+            bool: True if the thread was started
+        """
+        if self._feed_thread is not None and self._feed_thread.is_alive():
+            return False
+
+        self._feed_thread = threading.Thread(
+            target=self._feed, args=(read_interactions, poll_interval), name='model-feed', daemon=True
+        )
+        self._feed_thread.start()
+        return True
+
+    def stop(self, timeout=None):
+        """
+        Stop the background threads.
+
+        Args:
+            timeout (float, optional): Seconds to wait for each thread to exit
+        """
+        self._stopped.set()
+        self._retrain_requested.set()
+        for thread in (self._thread, self._feed_thread):
+            if thread is not None:
+                thread.join(timeout)
+        self._thread = self._feed_thread = None
+
+    def request_retrain(self):
+        """Ask the background thread to retrain as soon as possible."""
+        self._retrain_requested.set()
+
+    def record_interaction(self, count=1):
+        """
+        Count new interactions and trigger a retrain once enough have arrived.
+
+        Args:
+            count (int): Number of interactions recorded
+        """
+        with self._lock:
+            self._pending_interactions += count
+            pending = self._pending_interactions
+
+        if self.retrain_after and pending >= self.retrain_after:
+            self.request_retrain()
+
+    def on_interaction(self, user_id, interaction, version=None):
+        """
+        Feed a newly tracked interaction into the data and the live model.
+
+        Ratings update the served model in place so recommendations change
+        immediately; the next retrain rebuilds it from the full data. Meant to
+        be registered with UserTracker.add_listener.
+
+        Args:
+            user_id (str): User ID
+            interaction (dict): Interaction record
+            version (int, optional): Version of the tracker's store; unused,
+                the interaction is written to the data processor here
+        """
+        with self._lock:
+            engine = self.engine
+            data_version = self.data_processor.add_interaction(user_id, interaction)
+            if engine is not None:
+                engine.apply_interaction(user_id, interaction)
+                self._advance_data_version(engine, data_version)
+
+        self.record_interaction()
+
+    def on_stored_interaction(self, user_id, interaction, version=None):
+        """
+        Feed an interaction that is already in the data into the live model.
+
+        The listener to register with a UserTracker that shares its
+        interaction store with the data processor, so the tracker's write
+        must not be repeated.
+
+        Args:
+            user_id (str): User ID
+            interaction (dict): Interaction record
+            version (int, optional): Interaction store version the write
+                produced; without it only the latest write can be matched
+        """
+        with self._lock:
+            engine = self.engine
+            if version is None:
+                version = self.data_processor.interaction_store.version
+            data_version = self.data_processor.catalog_version + version
+            if engine is not None:
+                engine.apply_interaction(user_id, interaction)
+                self._advance_data_version(engine, data_version)
+
+        self.record_interaction()
+
+    def _advance_data_version(self, engine, data_version):
+        """
+        Record that the live model reflects one more write; the lock must be held.
+
+        Writers for different users notify in any order, so a write that
+        arrives ahead of an earlier one is held back until the gap is filled.
+        Only a write the model never hears of leaves it out of date, which
+        costs one rebuild of its interactions.
+        """
+        if engine.data_version is None or data_version <= engine.data_version:
+            return
+        if data_version != engine.data_version + 1:
+            if len(self._applied_ahead) >= MAX_APPLIED_AHEAD:
+                # A write was missed for good; the rebuild will catch up
+                self._applied_ahead.clear()
+            self._applied_ahead.add(data_version)
+            return
+
+        while data_version + 1 in self._applied_ahead:
+            data_version += 1
+            self._applied_ahead.discard(data_version)
+        # The engine already reflects these changes; skip the matrix rebuild
+        engine.data_version = data_version
+
+    def get_engine(self):
+        """
+        Get the most recently published model.
+
+        Returns:
+            RecommendationEngine: Trained engine, or None before the first training
+        """
+        return self.engine
+
+    def _run(self):
+        """Background loop that retrains on schedule or on request."""
+        while not self._stopped.is_set():
+            self._retrain_requested.wait(self.retrain_interval)
+            if self._stopped.is_set():
+                break
+            self._retrain_requested.clear()
+            self.train()
+
+    def _feed(self, read_interactions, poll_interval):
+        """Background loop that counts interactions read from other processes."""
+        while not self._stopped.wait(poll_interval):
+            try:
+                count = read_interactions()
+            except Exception as e:
+                self.last_error = f"Error reading interactions: {str(e)}"
+                continue
+            if count:
+                self.record_interaction(count)
+
+    def _follow(self, poll_interval):
+        """Background loop that reloads the model when a new version is saved."""
+        while not self._stopped.wait(poll_interval):
+            if get_current_version(self.model_dir) != self.loaded_version:
+                self.load(match_data=False)
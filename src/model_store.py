@@ -0,0 +1,333 @@
+"""
+Model Store Module for Product Recommendation Engine
+
+This module saves a trained RecommendationEngine to disk and loads it back.
+Each saved model is a versioned directory of .npy arrays, id index files and
+a manifest with checksums. A CURRENT file in the model directory names the
+version to serve and is replaced atomically on every save.
+
+Loading memory-maps the arrays (np.load with mmap_mode='r'), so startup does
+not depend on model size and every process that loads the same version
+shares one page-cached copy.
+
+The manifest can record a fingerprint of the data the model was trained
+from. A loaded model only counts as up to date with the current data when
+that fingerprint matches; otherwise its interactions are rebuilt from the
+data on first use, or the caller retrains.
+
+Saving prunes old versions. A job that reads a version for a long time
+(e.g. batch scoring) pins it with pin_version, which holds a shared lock
+on its manifest; pruning skips versions it cannot lock exclusively.
+
+Layout:
+    <model_dir>/CURRENT
+    <model_dir>/<version>/manifest.json
+    <model_dir>/<version>/user_ids.json
+    <model_dir>/<version>/product_ids.json
+    <model_dir>/<version>/similarity.npy                 (dense model)
+    <model_dir>/<version>/similarity_{data,indices,indptr}.npy   (neighbour model)
+    <model_dir>/<version>/interactions_{data,indices,indptr}.npy
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix, issparse
+
+from recommendation import RecommendationEngine
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - file locking is POSIX only
+    fcntl = None
+
+FORMAT_VERSION = 1
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+
+class ModelStoreError(Exception):
+    """Raised when a saved model is missing, incompatible or corrupt."""
+
+def _file_checksum(path):
+    """Compute the SHA-256 checksum of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _write_json(path, data):
+    """Write JSON to a file."""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+
+def _read_json(path):
+    """Read JSON from a file."""
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def _write_current(model_dir, version_name):
+    """Point CURRENT at a version directory with an atomic rename."""
+    temp_path = os.path.join(model_dir, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        file.write(version_name)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, os.path.join(model_dir, CURRENT_FILE))
+
+def _save_sparse(version_dir, prefix, matrix):
+    """Save the component arrays of a compressed sparse matrix."""
+    np.save(os.path.join(version_dir, f"{prefix}_data.npy"), matrix.data)
+    np.save(os.path.join(version_dir, f"{prefix}_indices.npy"), matrix.indices)
+    np.save(os.path.join(version_dir, f"{prefix}_indptr.npy"), matrix.indptr)
+
+def _load_sparse(version_dir, prefix, shape, matrix_type, mmap_mode):
+    """Rebuild a compressed sparse matrix from its saved component arrays."""
+    data = np.load(os.path.join(version_dir, f"{prefix}_data.npy"), mmap_mode=mmap_mode)
+    indices = np.load(os.path.join(version_dir, f"{prefix}_indices.npy"), mmap_mode=mmap_mode)
+    indptr = np.load(os.path.join(version_dir, f"{prefix}_indptr.npy"), mmap_mode=mmap_mode)
+    return matrix_type((data, indices, indptr), shape=shape, copy=False)
+
+def get_current_version(model_dir):
+    """
+    Get the name of the version CURRENT points to.
+
+    Args:
+        model_dir (str): Model directory
+
+    Returns:
+        str: Version directory name, or None if no model has been saved
+    """
+    path = os.path.join(model_dir, CURRENT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.read().strip() or None
+
+def save_model(engine, model_dir, keep=2, data_fingerprint=None):
+    """
+    Save a trained engine as a new version and make it current.
+
+    Args:
+        engine (RecommendationEngine): Trained engine
+        model_dir (str): Model directory
+        keep (int): Number of most recent versions to keep on disk
+        data_fingerprint (dict, optional): JSON-serializable description of
+            the data the engine was trained from, checked by load_model
+
+    Returns:
+        str: Path of the saved version directory
+
+    Raises:
+        ModelStoreError: If the engine has not been trained
+    """
+    # Save one consistent state even if the engine is serving and updated meanwhile
+    state = engine.state
+    if state.similarity_matrix is None or state.interaction_matrix is None:
+        raise ModelStoreError("Cannot save an untrained model")
+
+    os.makedirs(model_dir, exist_ok=True)
+    version_name = f"v{engine.model_version:06d}-{int(time.time() * 1000)}"
+    version_dir = os.path.join(model_dir, version_name)
+    temp_dir = f"{version_dir}.tmp"
+    os.makedirs(temp_dir)
+
+    similarity = state.similarity_matrix
+    if issparse(similarity):
+        kind = 'neighbours'
+        _save_sparse(temp_dir, 'similarity', csc_matrix(similarity))
+    else:
+        kind = 'dense'
+        np.save(os.path.join(temp_dir, 'similarity.npy'), np.asarray(similarity))
+
+    interactions = csr_matrix(state.interaction_matrix)
+    user_ids = list(state.user_indices[:interactions.shape[0]])
+    _save_sparse(temp_dir, 'interactions', interactions)
+    _write_json(os.path.join(temp_dir, 'user_ids.json'), user_ids)
+    _write_json(os.path.join(temp_dir, 'product_ids.json'), list(state.product_indices))
+
+    files = {}
+    for name in sorted(os.listdir(temp_dir)):
+        path = os.path.join(temp_dir, name)
+        files[name] = {'sha256': _file_checksum(path), 'bytes': os.path.getsize(path)}
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'model_version': engine.model_version,
+        'kind': kind,
+        'n_users': len(user_ids),
+        'n_products': len(state.product_indices),
+        'created': datetime.now().isoformat(),
+        'data_fingerprint': data_fingerprint,
+        'files': files
+    }
+    _write_json(os.path.join(temp_dir, MANIFEST_FILE), manifest)
+
+    os.rename(temp_dir, version_dir)
+    _write_current(model_dir, version_name)
+    _prune_versions(model_dir, keep)
+    return version_dir
+
+def _saved_at(version_name):
+    """Get the save time in milliseconds encoded in a version name, 0 if there is none."""
+    try:
+        return int(version_name.rsplit('-', 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+def _prune_versions(model_dir, keep):
+    """Delete all but the `keep` most recently saved versions."""
+    current = get_current_version(model_dir)
+    # By save time, not name: model_version restarts at 1 in a process
+    # that could not reuse the saved model
+    versions = sorted(
+        (name for name in os.listdir(model_dir)
+         if name.startswith('v') and os.path.isdir(os.path.join(model_dir, name))),
+        key=lambda name: (_saved_at(name), name)
+    )
+    for name in versions[:-keep] if keep > 0 else []:
+        if name != current:
+            _remove_unpinned(os.path.join(model_dir, name))
+
+def _remove_unpinned(version_dir):
+    """Delete a saved version unless pin_version holds it."""
+    try:
+        manifest = open(os.path.join(version_dir, MANIFEST_FILE), 'rb')
+    except FileNotFoundError:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        return
+
+    with manifest:
+        if fcntl is not None:
+            try:
+                fcntl.flock(manifest.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # Pinned; a later save prunes it
+        shutil.rmtree(version_dir, ignore_errors=True)
+
+@contextmanager
+def pin_version(model_dir, version):
+    """
+    Keep a saved version from being pruned while it is in use.
+
+    The pin is a shared lock on the version's manifest, so it is released
+    when the pinning process exits, even after a crash.
+
+    Args:
+        model_dir (str): Model directory
+        version (str): Version directory name
+
+    Raises:
+        ModelStoreError: If the version does not exist (anymore)
+    """
+    path = os.path.join(model_dir, version, MANIFEST_FILE)
+    try:
+        manifest = open(path, 'rb')
+    except FileNotFoundError:
+        raise ModelStoreError(f"Saved model version not found: {version}")
+
+    with manifest:
+        if fcntl is not None:
+            fcntl.flock(manifest.fileno(), fcntl.LOCK_SH)
+        # Pruning may have deleted the version while we waited for the lock
+        if not os.path.exists(path):
+            raise ModelStoreError(f"Saved model version not found: {version}")
+        yield
+
+def verify_model(version_dir):
+    """
+    Check every file of a saved version against its manifest checksum.
+
+    Args:
+        version_dir (str): Saved version directory
+
+    Raises:
+        ModelStoreError: If a file is missing or its checksum does not match
+    """
+    manifest = _read_json(os.path.join(version_dir, MANIFEST_FILE))
+    for name, info in manifest['files'].items():
+        path = os.path.join(version_dir, name)
+        if not os.path.exists(path):
+            raise ModelStoreError(f"Model file missing: {name}")
+        if _file_checksum(path) != info['sha256']:
+            raise ModelStoreError(f"Checksum mismatch for model file: {name}")
+
+def load_model(model_dir, data_processor, version=None, mmap_mode='r', verify=False,
+               data_fingerprint=None, **engine_kwargs):
+    """
+    Load a saved model into a new RecommendationEngine.
+
+    Without a data_fingerprint the engine is published as out of date, so
+    its interaction matrix is rebuilt from the data processor before the
+    first recommendation; only the similarity model is reused as saved.
+
+    Args:
+        model_dir (str): Model directory
+        data_processor: DataProcessor the engine reads fresh data from
+        version (str, optional): Version directory name; defaults to CURRENT
+        mmap_mode (str, optional): Passed to np.load; 'r' shares pages across
+            processes, None reads the arrays into private memory
+        verify (bool): Check file checksums before loading (reads every file)
+        data_fingerprint (dict, optional): Fingerprint of the data currently
+            loaded; the saved model must have been trained from the same data
+        **engine_kwargs: Extra arguments for the RecommendationEngine constructor
+
+    Returns:
+        RecommendationEngine: Engine ready to serve recommendations
+
+    Raises:
+        ModelStoreError: If no model is saved, the saved model is invalid or
+            it does not match the loaded catalog or data_fingerprint
+    """
+    version = version or get_current_version(model_dir)
+    if not version:
+        raise ModelStoreError(f"No saved model in {model_dir}")
+
+    version_dir = os.path.join(model_dir, version)
+    manifest_path = os.path.join(version_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise ModelStoreError(f"Model manifest not found: {manifest_path}")
+
+    manifest = _read_json(manifest_path)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ModelStoreError(f"Unsupported model format version: {manifest.get('format_version')}")
+    if verify:
+        verify_model(version_dir)
+
+    user_ids = _read_json(os.path.join(version_dir, 'user_ids.json'))
+    product_ids = _read_json(os.path.join(version_dir, 'product_ids.json'))
+    n_users, n_products = len(user_ids), len(product_ids)
+    # Scores are indexed by product position, so a loaded catalog must list
+    # the same products in the same order; batch scoring loads no catalog
+    if data_processor.product_data and product_ids != list(data_processor.product_data):
+        raise ModelStoreError("Saved model products do not match the loaded catalog")
+    if data_fingerprint is not None and manifest.get('data_fingerprint') != data_fingerprint:
+        raise ModelStoreError("Saved model was trained from different data")
+
+    if manifest['kind'] == 'neighbours':
+        similarity = _load_sparse(version_dir, 'similarity', (n_products, n_products), csc_matrix, mmap_mode)
+    else:
+        similarity = np.load(os.path.join(version_dir, 'similarity.npy'), mmap_mode=mmap_mode)
+    interactions = _load_sparse(version_dir, 'interactions', (n_users, n_products), csr_matrix, mmap_mode)
+
+    engine = RecommendationEngine(data_processor, sparse=True, **engine_kwargs)
+    # Only a matching fingerprint shows the saved interactions are those of
+    # the loaded data; otherwise a None version makes the engine rebuild them
+    data_version = data_processor.version if data_fingerprint is not None else None
+    engine._publish(
+        similarity_matrix=similarity,
+        product_indices=product_ids,
+        product_index={pid: i for i, pid in enumerate(product_ids)},
+        **engine._interaction_fields(interactions, user_ids, data_version)
+    )
+    engine.model_version = manifest['model_version']
+    return engine
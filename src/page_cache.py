@@ -0,0 +1,78 @@
+"""
+Page Cache Module for Product Recommendation Engine
+
+This module keeps rendered HTML pages together with an ETag computed from
+their content. Callers key pages by everything the page depends on (such
+as the catalog version, category and page number), so an entry never goes
+stale and only the least recently used pages are evicted. The ETag lets a
+browser revalidate a page and get 304 Not Modified instead of the body.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+class PageCache:
+    def __init__(self, max_entries=256):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached pages
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # key -> (body, etag); least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        """
+        Return a cached page, rendering and caching it on a miss.
+
+        Args:
+            key (tuple): Everything the page content depends on
+            render (callable): Returns the page as a string
+
+        Returns:
+            tuple: (body, etag) with the UTF-8 encoded page and its
+                unquoted ETag
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Render outside the lock; two threads may render the same page once
+        body = render().encode('utf-8')
+        entry = (body, hashlib.sha256(body).hexdigest()[:32])
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        """Drop every cached page."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Hit and miss counts and the number of cached pages
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+    def __len__(self):
+        return len(self._entries)
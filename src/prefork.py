@@ -0,0 +1,126 @@
+"""
+Pre-fork Support Module for Product Recommendation Engine
+
+This module lets a pre-forking server (gunicorn with preload_app) build or
+load the model once in the master process and share it with every worker.
+
+The master loads the model, marks its NumPy buffers read-only and freezes
+the garbage collector's view of the heap, so forked workers keep sharing the
+master's pages instead of copying them on first touch. Workers then follow
+the model directory and memory-map each newly saved version, so all of them
+share a single page-cached copy of the retrained model.
+
+Only the master trains. Workers track interactions into the shared event
+log, and the master tails that log, so retraining is triggered by and
+trained on the events of every worker.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import gc
+import os
+
+from scipy.sparse import issparse
+
+def _model_arrays(engine):
+    """Collect the large NumPy buffers held by a trained engine."""
+    arrays = []
+    for matrix in (engine.similarity_matrix, engine.interaction_matrix):
+        if matrix is None:
+            continue
+        if issparse(matrix):
+            arrays.extend((matrix.data, matrix.indices, matrix.indptr))
+        else:
+            arrays.append(matrix)
+    return arrays
+
+def freeze_engine(engine):
+    """
+    Mark an engine's model arrays read-only.
+
+    Shared pages stay shared only while nobody writes to them; a read-only
+    flag turns an accidental in-place write in a worker into an error
+    instead of a silent private copy.
+
+    Args:
+        engine (RecommendationEngine): Trained engine
+    """
+    for array in _model_arrays(engine):
+        array.flags.writeable = False
+
+def prepare_master(model_manager, user_tracker=None, poll_interval=5.0):
+    """
+    Build or load the model in the master process before workers fork.
+
+    Args:
+        model_manager (ModelManager): Manager with a model_dir configured
+        user_tracker (UserTracker, optional): Tracker whose event log the
+            workers write to; the master reads their events from it
+        poll_interval (float): Seconds between reads of the event log
+
+    Returns:
+        bool: True if a model is available to share
+    """
+    engine = model_manager.get_engine()
+    if engine is None:
+        if not model_manager.load_or_train():
+            return False
+        engine = model_manager.get_engine()
+
+    freeze_engine(engine)
+
+    # Move everything allocated so far into the permanent generation so the
+    # collector never writes to these objects' headers in the workers
+    gc.collect()
+    gc.freeze()
+
+    if user_tracker is not None and user_tracker.event_log:
+        model_manager.before_train = user_tracker.tail_log
+        model_manager.start_feed(user_tracker.tail_log, poll_interval)
+    return True
+
+def init_worker(model_manager, poll_interval=5.0):
+    """
+    Set up a freshly forked worker.
+
+    Workers do not train; they reload the model whenever the trainer saves
+    a new version to the model directory.
+
+    Args:
+        model_manager (ModelManager): Manager inherited from the master
+        poll_interval (float): Seconds between checks for a new saved version
+
+    Returns:
+        bool: True if the follower thread was started
+    """
+    return model_manager.start_follower(poll_interval)
+
+def process_memory(pid='self'):
+    """
+    Read the memory usage of a process from /proc (Linux only).
+
+    Args:
+        pid (int or str): Process ID, or 'self'
+
+    Returns:
+        dict: rss, pss, shared and private memory in kilobytes; empty if
+        /proc is not available
+    """
+    path = f"/proc/{pid}/smaps_rollup"
+    if not os.path.exists(path):
+        return {}
+
+    fields = {}
+    with open(path, 'r') as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
@@ -0,0 +1,139 @@
+"""
+Product Payloads Module for Product Recommendation Engine
+
+This module serializes product records to JSON once per catalog version and
+reuses the bytes in every API response, so answering a recommendation
+request only joins a handful of ready-made payloads instead of copying and
+encoding product dicts.
+
+Payloads are built lazily per product and per field projection (the product
+fields a client asked for) and are all dropped when the data processor's
+catalog_version changes. orjson is used for encoding when installed.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional, faster JSON encoder
+    orjson = None
+
+def dumps(data):
+    """
+    Encode data as compact JSON.
+
+    Args:
+        data: JSON-serializable value
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+def parse_fields(value):
+    """
+    Parse a comma-separated fields= parameter into a projection.
+
+    Args:
+        value (str, optional): Parameter value, e.g. "name,price"
+
+    Returns:
+        tuple: Requested field names in order without duplicates, or None
+            for every field
+    """
+    if not value:
+        return None
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    return fields or None
+
+class ProductPayloads:
+    def __init__(self, data_processor, max_projections=32):
+        """
+        Initialize the payload cache.
+
+        Args:
+            data_processor (DataProcessor): Source of the product records
+            max_projections (int): Field projections kept per catalog version;
+                the least recently used one is dropped beyond this
+        """
+        self.data_processor = data_processor
+        self.max_projections = max_projections
+        # (catalog_version, projection -> {product_id: bytes}); replaced as a
+        # whole when the catalog changes
+        self._tables = (None, OrderedDict())
+        self._lock = threading.Lock()
+
+    def _table(self, fields):
+        """Get the payload table of one projection for the current catalog."""
+        catalog_version = self.data_processor.catalog_version
+        with self._lock:
+            version, tables = self._tables
+            if version != catalog_version:
+                tables = OrderedDict()
+                self._tables = (catalog_version, tables)
+
+            table = tables.get(fields)
+            if table is None:
+                table = tables[fields] = {}
+                while len(tables) > self.max_projections:
+                    tables.popitem(last=False)
+            else:
+                tables.move_to_end(fields)
+            return table
+
+    def get(self, product_ids, fields=None):
+        """
+        Get the serialized payloads of products.
+
+        Args:
+            product_ids (list): Product IDs
+            fields (tuple, optional): Product fields to include; the product
+                ID is always included as "id"
+
+        Returns:
+            list: JSON bytes of each known product, in order
+        """
+        table = self._table(fields)
+        product_data = self.data_processor.product_data
+        payloads = []
+        for product_id in product_ids:
+            payload = table.get(product_id)
+            if payload is None:
+                product = product_data.get(product_id)
+                if product is None:
+                    continue
+                if fields is None:
+                    record = dict(product, id=product_id)
+                else:
+                    record = {field: product[field] for field in fields if field in product}
+                    record['id'] = product_id
+                # Two threads may encode the same product; both results are equal
+                payload = table[product_id] = dumps(record)
+            payloads.append(payload)
+        return payloads
+
+    def encode_recommendations(self, user_id, strategy, product_ids, fields=None):
+        """
+        Build the JSON body of a recommendations response.
+
+        Args:
+            user_id (str): User ID
+            strategy (str): Strategy that produced the recommendations
+            product_ids (list): Recommended product IDs
+            fields (tuple, optional): Product fields to include
+
+        Returns:
+            bytes: Response body
+        """
+        return b''.join((
+            b'{"success":true,"user_id":', dumps(user_id),
+            b',"strategy":', dumps(strategy),
+            b',"recommendations":[', b','.join(self.get(product_ids, fields)), b']}'
+        ))
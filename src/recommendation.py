@@ -9,22 +9,128 @@ Author: Your Name
 Date: May 11, 2025
 """
 
+import os
+import threading
+import weakref
+from collections import namedtuple
+
 import numpy as np
+from scipy.sparse import csr_matrix, diags, issparse
 from sklearn.metrics.pairwise import cosine_similarity
 
+from data_processor import RATING_SCALE
+from metrics import timed
+from similarity import blocked_similarity, top_k_neighbours, update_item_similarities
+from topk import top_k_indices, top_k_keys, top_k_rows
+
+# Memory budget for the dense users x products score block of recommend_batch
+BATCH_SCORE_BYTES = 64 * 1024 * 1024
+
+# Weight of each content feature; every feature is scaled to [0, 1] first
+CONTENT_WEIGHTS = {
+    'preference': 1.0,
+    'price': 1.0,
+    'avg_rating': 1.0,
+    'rating': 1.0
+}
+
+# Strategies accepted by RecommendationEngine.get_recommendations
+STRATEGIES = ('collab', 'content', 'hybrid')
+
+# Everything a request reads from a trained model. A new state is published
+# by replacing one reference, so a reader that takes the state once never
+# combines fields of two different updates (e.g. a new matrix with an old
+# user lookup). user_indices, user_index and row_overrides only ever gain
+# entries and are shared with the states derived from them; a state's users
+# are the first n_users entries of user_indices.
+ModelState = namedtuple('ModelState', [
+    'similarity_matrix',
+    'interaction_matrix',
+    'user_indices',
+    'n_users',
+    'user_index',
+    'product_indices',
+    'product_index',
+    'data_version',
+    'row_overrides',
+    'item_norms_sq',
+    'row_scale_sq'
+], defaults=(None,) * 11)
+
+def _state_property(field):
+    """Expose one ModelState field as an engine attribute; setting it publishes a new state."""
+    def get(self):
+        return getattr(self._state, field)
+    def set(self, value):
+        self._publish(**{field: value})
+    return property(get, set, doc=f"{field} of the current model state")
+
 class RecommendationEngine:
-    def __init__(self, data_processor):
+    similarity_matrix = _state_property('similarity_matrix')
+    interaction_matrix = _state_property('interaction_matrix')
+    user_indices = _state_property('user_indices')
+    user_index = _state_property('user_index')
+    product_indices = _state_property('product_indices')
+    product_index = _state_property('product_index')
+    data_version = _state_property('data_version')
+    item_norms_sq = _state_property('item_norms_sq')
+    
+    def __init__(self, data_processor, sparse=True, n_neighbors=None, block_size=1024,
+                 max_memory_mb=None, similarity_path=None):
         """
         Initialize the recommendation engine.
         
         Args:
             data_processor: DataProcessor instance with loaded data
+            sparse (bool): Work on a CSR interaction matrix instead of a dense array
+            n_neighbors (int, optional): Keep only this many most similar items per
+                item in a sparse model instead of the full item x item matrix
+            block_size (int): Items per block when building the neighbour model
+            max_memory_mb (float, optional): Compute the exact similarity matrix in
+                blocks that fit this budget, stored as float32
+            similarity_path (str, optional): Write the exact similarity matrix to a
+                memory-mapped .npy file at this path (implies blocked training)
         """
         self.data_processor = data_processor
-        self.similarity_matrix = None
-        self.user_indices = None
-        self.product_indices = None
+        self.sparse = sparse
+        self.n_neighbors = n_neighbors
+        self.block_size = block_size
+        self.max_memory_mb = max_memory_mb
+        self.similarity_path = similarity_path
+        self.model_version = 0
+        # Interaction matrices rebuilt because the data moved ahead of the model
+        self.interaction_rebuilds = 0
+        
+        # The similarity model, the interaction matrix and id -> row/column
+        # lookups built during training, reused across requests until the
+        # data processor's version changes. Besides that, the state holds
+        # what incremental updates need: rows changed since the matrix was
+        # built, and the squared norms of the item columns (current, and as
+        # they were when the similarities were computed).
+        self._state = ModelState(user_index={}, product_index={}, row_overrides={})
+        self._init_lock()
         
+        # A writer holding the lock at fork time would leave it locked
+        # forever in the child
+        if hasattr(os, 'register_at_fork'):
+            engine_ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: engine_ref() and engine_ref()._init_lock())
+    
+    def _init_lock(self):
+        """Create the lock that serializes writers of the model state."""
+        self._write_lock = threading.RLock()
+    
+    @property
+    def state(self):
+        """ModelState: The current model state; take it once per request."""
+        return self._state
+    
+    def _publish(self, **changes):
+        """Publish a new state with some fields replaced."""
+        with self._write_lock:
+            self._state = self._state._replace(**changes)
+        
+    @timed('train_collaborative_filter')
     def train_collaborative_filter(self):
         """
         Train collaborative filtering model based on user-item interaction matrix.
@@ -33,22 +139,315 @@ class RecommendationEngine:
             bool: True if training was successful
         """
         # Get user-item interaction matrix
-        matrix, user_indices, product_indices = self.data_processor.get_user_interaction_matrix()
+        data_version = self.data_processor.version
+        matrix, user_indices, product_indices = self.data_processor.get_user_interaction_matrix(sparse=self.sparse)
         
         if matrix is None:
             return False
             
-        # Store indices for future reference
-        self.user_indices = user_indices
-        self.product_indices = product_indices
-        
         # Calculate item-item similarity matrix
         # Add small epsilon to avoid division by zero
-        matrix_norm = matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-10)
-        self.similarity_matrix = cosine_similarity(matrix_norm.T)
+        matrix_norm = self._normalize_rows(matrix)
+        if self.n_neighbors:
+            similarity = top_k_neighbours(matrix_norm, self.n_neighbors, block_size=self.block_size)
+        elif self.max_memory_mb or self.similarity_path:
+            similarity = blocked_similarity(
+                matrix_norm,
+                max_memory_mb=self.max_memory_mb or 256,
+                mmap_path=self.similarity_path
+            )
+        else:
+            similarity = cosine_similarity(matrix_norm.T)
         
+        # Publish the model and its indices together
+        self._publish(
+            similarity_matrix=similarity,
+            product_indices=product_indices,
+            product_index={pid: i for i, pid in enumerate(product_indices)},
+            **self._interaction_fields(matrix, user_indices, data_version),
+            **self._item_norm_fields(matrix_norm)
+        )
         return True
+    
+    def _set_interactions(self, matrix, user_indices, data_version):
+        """
+        Cache the interaction matrix and user lookup for a data version.
+        
+        Args:
+            matrix: Interaction matrix aligned with product_indices
+            user_indices (list): User ID for each matrix row
+            data_version (int): DataProcessor version the matrix was built from
+        """
+        self._publish(**self._interaction_fields(matrix, user_indices, data_version))
+    
+    @staticmethod
+    def _interaction_fields(matrix, user_indices, data_version):
+        """Get the state fields for an interaction matrix of a data version."""
+        return {
+            'interaction_matrix': matrix,
+            'user_indices': user_indices,
+            'n_users': len(user_indices),
+            'user_index': {uid: i for i, uid in enumerate(user_indices)},
+            'data_version': data_version,
+            'row_overrides': {}
+        }
+    
+    @staticmethod
+    def _item_norm_fields(matrix_norm):
+        """
+        Get the squared norms of the row-normalized item columns as state fields.
+        
+        Args:
+            matrix_norm: Row-normalized interaction matrix
+            
+        Returns:
+            dict: item_norms_sq and row_scale_sq
+        """
+        if issparse(matrix_norm):
+            norms_sq = np.asarray(matrix_norm.multiply(matrix_norm).sum(axis=0)).ravel()
+        else:
+            norms_sq = np.square(matrix_norm).sum(axis=0)
+        return {
+            'item_norms_sq': norms_sq.astype(np.float64),
+            'row_scale_sq': np.where(norms_sq > 0, norms_sq, 1.0)
+        }
+    
+    def _refresh_interactions(self):
+        """
+        Rebuild the cached interaction matrix if the underlying data changed.
+        
+        The similarity matrix is only valid for the product set it was trained
+        on, so a changed catalog keeps the old interactions until the next
+        call to train_collaborative_filter. The matrix is built without the
+        lock; concurrent readers keep using the previous state meanwhile.
+        
+        Returns:
+            ModelState: The state to serve the request from
+        """
+        state = self._state
+        data_version = self.data_processor.version
+        if data_version == state.data_version:
+            return state
+            
+        matrix, user_indices, product_indices = self.data_processor.get_user_interaction_matrix(sparse=self.sparse)
+        with self._write_lock:
+            if self._state.data_version != state.data_version:
+                return self._state  # Another thread refreshed first
+            # Build on the latest state; in-place updates may have grown its users
+            state = self._state
+            if matrix is not None and product_indices == state.product_indices:
+                self._state = state._replace(**self._interaction_fields(matrix, user_indices, data_version))
+                self.interaction_rebuilds += 1
+            else:
+                self._state = state._replace(data_version=data_version)
+            return self._state
+    
+    @staticmethod
+    def _normalize_rows(matrix):
+        """
+        Scale each user row to unit length without densifying sparse input.
+        
+        Args:
+            matrix: Dense array or scipy.sparse matrix of ratings
+            
+        Returns:
+            Row-normalized matrix of the same kind as the input
+        """
+        if issparse(matrix):
+            row_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+            return (diags(1.0 / (row_norms + 1e-10)) @ matrix).tocsr()
+        return matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-10)
+    
+    @staticmethod
+    def _user_ratings(matrix, user_idx):
+        """
+        Get the products a user has rated and the ratings they gave.
+        
+        Args:
+            matrix: Dense array or CSR interaction matrix
+            user_idx (int): Row index of the user
+            
+        Returns:
+            tuple: (product column indices, ratings) for positive ratings only
+        """
+        if issparse(matrix):
+            start, end = matrix.indptr[user_idx], matrix.indptr[user_idx + 1]
+            indices = matrix.indices[start:end]
+            ratings = matrix.data[start:end]
+        else:
+            indices = np.arange(matrix.shape[1])
+            ratings = matrix[user_idx]
+        positive = ratings > 0
+        return indices[positive], ratings[positive]
+        
+    def _user_row(self, user_idx, state=None):
+        """
+        Get every stored rating of a user, including incremental updates.
+        
+        Args:
+            user_idx (int): Row index of the user
+            state (ModelState, optional): State to read; defaults to the current one
+            
+        Returns:
+            tuple: (product column indices, ratings)
+        """
+        state = state or self._state
+        override = state.row_overrides.get(user_idx)
+        if override is not None:
+            return override
+        matrix = state.interaction_matrix
+        if user_idx >= matrix.shape[0]:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        if issparse(matrix):
+            start, end = matrix.indptr[user_idx], matrix.indptr[user_idx + 1]
+            return matrix.indices[start:end], matrix.data[start:end]
+        indices = np.flatnonzero(matrix[user_idx])
+        return indices, matrix[user_idx, indices]
+    
+    def _get_user_ratings(self, user_idx, state=None):
+        """
+        Get the products a user has rated positively, including incremental updates.
+        
+        Args:
+            user_idx (int): Row index of the user
+            state (ModelState, optional): State to read; defaults to the current one
+            
+        Returns:
+            tuple: (product column indices, ratings)
+        """
+        indices, ratings = self._user_row(user_idx, state)
+        positive = ratings > 0
+        return indices[positive], ratings[positive]
+    
+    def apply_interaction(self, user_id, interaction):
+        """
+        Update the model in place for one new rating.
+        
+        The user's row is replaced and the similarities of the items in the
+        old and new row are adjusted, at O(items touched x products) cost
+        instead of a full retrain. Similarities are left alone when the model
+        arrays are read-only (e.g. memory-mapped from disk); the user's row is
+        still updated so their own recommendations change immediately.
+        
+        Writers are serialized by a lock. The similarity arrays are updated
+        in place, so a concurrent reader may see some entries before and
+        some after one update; everything else is published as a new state.
+        
+        Args:
+            user_id (str): User ID
+            interaction (dict): Interaction record with product_id and rating
+            
+        Returns:
+            bool: True if the model was updated
+        """
+        if 'rating' not in interaction:
+            return False
+            
+        with self._write_lock:
+            return self._apply_interaction(user_id, interaction)
+    
+    def _apply_interaction(self, user_id, interaction):
+        """Update the model for one new rating; the lock must be held."""
+        state = self._state
+        if state.similarity_matrix is None:
+            return False
+            
+        rating = float(interaction['rating'])
+        if not np.isfinite(rating):
+            return False  # Would spread NaN through the shared similarities
+            
+        product_idx = state.product_index.get(interaction.get('product_id'))
+        if product_idx is None:
+            return False  # Product not known to this model
+            
+        if state.item_norms_sq is None:
+            state = state._replace(**self._item_norm_fields(self._normalize_rows(state.interaction_matrix)))
+            
+        user_idx = state.user_index.get(user_id)
+        if user_idx is None:
+            # Readers of the current state never look up rows past its
+            # n_users, so the shared list and lookup can gain the new user now
+            user_idx = state.n_users
+            if len(state.user_indices) != user_idx:
+                # Only the latest state may grow the shared list
+                state = state._replace(user_indices=state.user_indices[:user_idx])
+            state.user_indices.append(user_id)
+            state.user_index[user_id] = user_idx
+            state = state._replace(n_users=user_idx + 1)
+            
+        # Build the new row; the last rating for a product wins, 0 removes it
+        old_indices, old_ratings = self._user_row(user_idx, state)
+        row = dict(zip(old_indices.tolist(), old_ratings.tolist()))
+        if rating:
+            row[product_idx] = rating
+        else:
+            row.pop(product_idx, None)
+        new_indices = np.array(sorted(row), dtype=np.int64)
+        new_ratings = np.array([row[i] for i in new_indices.tolist()], dtype=np.float64)
+        
+        if self._similarity_writeable(state):
+            touched = np.union1d(old_indices, new_indices).astype(np.int64)
+            old_vector = self._normalized_row(touched, old_indices, old_ratings)
+            new_vector = self._normalized_row(touched, new_indices, new_ratings)
+            delta = np.outer(new_vector, new_vector) - np.outer(old_vector, old_vector)
+            update_item_similarities(state.similarity_matrix, touched, delta, state.item_norms_sq, state.row_scale_sq)
+            
+        # One assignment, so readers see the old row or the new one
+        state.row_overrides[user_idx] = (new_indices, new_ratings)
+        self._state = state
+        return True
+    
+    @staticmethod
+    def _normalized_row(touched, indices, ratings):
+        """
+        Scale a user row to unit length and spread it over the touched items.
+        
+        Args:
+            touched (np.ndarray): Sorted item indices
+            indices (np.ndarray): Item indices of the row, a subset of touched
+            ratings (np.ndarray): Ratings of the row
+            
+        Returns:
+            np.ndarray: Normalized ratings aligned with touched
+        """
+        vector = np.zeros(len(touched))
+        if len(indices):
+            ratings = np.asarray(ratings, dtype=np.float64)
+            vector[np.searchsorted(touched, indices)] = ratings / (np.linalg.norm(ratings) + 1e-10)
+        return vector
+    
+    def _similarity_writeable(self, state=None):
+        """Check whether the similarity arrays can be updated in place."""
+        similarity = (state or self._state).similarity_matrix
+        array = similarity.data if issparse(similarity) else similarity
+        return bool(array.flags.writeable)
+    
+    def _score_items(self, interacted_indices, interacted_ratings, state=None):
+        """
+        Predict a rating for every product from the user's existing ratings.
+        
+        Each prediction is the similarity-weighted average of the user's
+        ratings, computed for all products in one matrix-vector product. This
+        works on both the dense similarity matrix and the sparse neighbour
+        model. Products the user already rated are scored 0.
+        
+        Args:
+            interacted_indices (np.ndarray): Column indices of rated products
+            interacted_ratings (np.ndarray): Ratings for those products
+            state (ModelState, optional): State to read; defaults to the current one
+            
+        Returns:
+            np.ndarray: Predicted rating per product
+        """
+        similarities = (state or self._state).similarity_matrix[:, interacted_indices]
+        weighted = similarities @ interacted_ratings
+        normalizer = np.asarray(abs(similarities).sum(axis=1)).ravel() + 1e-10
         
+        predicted_ratings = weighted / normalizer
+        predicted_ratings[interacted_indices] = 0.0
+        return predicted_ratings
+        
+    @timed('get_collaborative_recommendations')
     def get_collaborative_recommendations(self, user_id, top_n=5):
         """
         Get collaborative filtering based recommendations for a user.
@@ -60,40 +459,201 @@ class RecommendationEngine:
         Returns:
             list: List of recommended product IDs
         """
-        if self.similarity_matrix is None:
+        if self._state.similarity_matrix is None:
             return []
             
-        try:
-            # Get user index
-            user_idx = self.user_indices.index(user_id)
-        except ValueError:
+        # Serve the whole request from one consistent state
+        state = self._refresh_interactions()
+        
+        # Get user index
+        user_idx = state.user_index.get(user_id)
+        if user_idx is None or user_idx >= state.n_users:
             return []  # User not found
             
         # Get user's interaction vector
-        matrix, _, _ = self.data_processor.get_user_interaction_matrix()
-        user_vector = matrix[user_idx]
-        
-        # Products the user has already interacted with
-        interacted_indices = np.where(user_vector > 0)[0]
+        interacted_indices, interacted_ratings = self._get_user_ratings(user_idx, state)
         
         # Calculate predicted ratings for all items
-        predicted_ratings = np.zeros(len(self.product_indices))
+        predicted_ratings = self._score_items(interacted_indices, interacted_ratings, state)
+        
+        # Get top N recommendations
+        recommended_indices = top_k_indices(predicted_ratings, top_n)
+        return [state.product_indices[idx] for idx in recommended_indices]
         
-        for item_idx in range(len(self.product_indices)):
-            if item_idx in interacted_indices:
-                continue  # Skip items the user has already interacted with
-                
-            item_similarities = self.similarity_matrix[item_idx, interacted_indices]
-            user_ratings = user_vector[interacted_indices]
+    def recommend_batch(self, user_ids, top_n=5, batch_size=None):
+        """
+        Get collaborative filtering recommendations for many users.
+        
+        Users are scored in blocks: one sparse x dense product of the block's
+        ratings with the similarity model, seen products masked out, and a
+        row-wise top-N selection. Results match get_collaborative_recommendations
+        and are yielded block by block, so any number of users can be streamed.
+        
+        Args:
+            user_ids (iterable): User IDs to get recommendations for
+            top_n (int): Number of recommendations per user
+            batch_size (int, optional): Users per block; by default as many as
+                fit a BATCH_SCORE_BYTES score block
             
-            # Weighted sum of ratings
-            if len(item_similarities) > 0:
-                predicted_ratings[item_idx] = np.sum(item_similarities * user_ratings) / (np.sum(np.abs(item_similarities)) + 1e-10)
+        Yields:
+            list: (user_id, recommended product IDs) pairs for one block, in
+                input order; unknown users get an empty list
+        """
+        if self._state.similarity_matrix is None:
+            return
+            
+        state = self._state
+        batch_size = batch_size or self._default_batch_size(state)
+        abs_similarity = self._abs_similarity(state)
         
-        # Get top N recommendations
-        recommended_indices = np.argsort(predicted_ratings)[::-1][:top_n]
-        return [self.product_indices[idx] for idx in recommended_indices]
+        block = []
+        for user_id in user_ids:
+            block.append(user_id)
+            if len(block) == batch_size:
+                yield self._recommend_block(block, top_n, abs_similarity)
+                block = []
+        if block:
+            yield self._recommend_block(block, top_n, abs_similarity)
+    
+    def score_batch(self, user_idxs, top_n=5, batch_size=None):
+        """
+        Get the top products of many users by matrix row, as column indices.
+        
+        This is the compact form of recommend_batch for offline jobs that
+        store results as arrays.
+        
+        Args:
+            user_idxs (array-like): Row indices of the users (see user_indices)
+            top_n (int): Number of recommendations per user
+            batch_size (int, optional): Users scored per block
+            
+        Returns:
+            tuple: (indices, scores) arrays of shape (len(user_idxs), k) with
+                k = min(top_n, n_products), best first; indices are columns
+                of product_indices
+        """
+        state = self._state
+        user_idxs = np.asarray(user_idxs, dtype=np.int64)
+        k = min(max(int(top_n), 0), len(state.product_indices))
+        indices = np.empty((len(user_idxs), k), dtype=np.int32)
+        scores = np.empty((len(user_idxs), k), dtype=np.float32)
+        
+        batch_size = batch_size or self._default_batch_size(state)
+        abs_similarity = self._abs_similarity(state)
+        for start in range(0, len(user_idxs), batch_size):
+            block = user_idxs[start:start + batch_size]
+            block_indices, block_scores = self._score_block(block, top_n, abs_similarity, state)
+            indices[start:start + len(block)] = block_indices
+            scores[start:start + len(block)] = block_scores
+        return indices, scores
+    
+    def _default_batch_size(self, state):
+        """Users per block so that a dense score block fits BATCH_SCORE_BYTES."""
+        return max(1, min(4096, BATCH_SCORE_BYTES // (8 * max(len(state.product_indices), 1))))
+    
+    def _abs_similarity(self, state):
+        """
+        Get |S| for the normalizer; no copy when no similarity is negative.
         
+        Models trained on non-negative ratings stay non-negative, since
+        in-place updates clip their rounding noise (see update_item_similarities).
+        """
+        similarity = state.similarity_matrix
+        array = similarity.data if issparse(similarity) else similarity
+        if not array.size or array.min() >= 0:
+            return similarity
+        return abs(similarity)
+    
+    def _recommend_block(self, user_ids, top_n, abs_similarity):
+        """
+        Score one block of users and select their top products.
+        
+        Args:
+            user_ids (list): User IDs in the block
+            top_n (int): Number of recommendations per user
+            abs_similarity: Element-wise absolute value of the similarity model
+            
+        Returns:
+            list: (user_id, recommended product IDs) pairs
+        """
+        state = self._refresh_interactions()
+        n_users = state.n_users
+        known = [
+            (pos, state.user_index[uid]) for pos, uid in enumerate(user_ids)
+            if state.user_index.get(uid, n_users) < n_users
+        ]
+        results = [(uid, []) for uid in user_ids]
+        if not known:
+            return results
+            
+        top_indices, _ = self._score_block([user_idx for _, user_idx in known], top_n, abs_similarity, state)
+        for (pos, _), indices in zip(known, top_indices):
+            results[pos] = (user_ids[pos], [state.product_indices[idx] for idx in indices])
+        return results
+    
+    def _score_block(self, user_idxs, top_n, abs_similarity, state):
+        """
+        Predict ratings for a block of users and select their top products.
+        
+        Args:
+            user_idxs (list): Row indices of the users
+            top_n (int): Number of recommendations per user
+            abs_similarity: Element-wise absolute value of the similarity model
+            state (ModelState): State to read
+            
+        Returns:
+            tuple: (indices, scores) of each user's top products, best first
+        """
+        similarity = state.similarity_matrix
+        ratings = self._ratings_block(user_idxs, state)
+        rated = ratings.copy()
+        rated.data[:] = 1.0
+        
+        # Row u of the result is S[:, rated items] @ ratings, as in _score_items.
+        # Multiply in the model's dtype so a float32 model is never upcast.
+        weighted = self._to_dense(ratings.astype(similarity.dtype) @ similarity.T)
+        normalizer = self._to_dense(rated.astype(similarity.dtype) @ abs_similarity.T) + 1e-10
+        scores = weighted / normalizer
+        
+        # Products a user already rated are never recommended
+        rows = np.repeat(np.arange(ratings.shape[0]), np.diff(ratings.indptr))
+        scores[rows, ratings.indices] = 0.0
+        
+        top_indices = top_k_rows(scores, top_n)
+        return top_indices, np.take_along_axis(scores, top_indices, axis=1)
+    
+    def _ratings_block(self, user_idxs, state):
+        """
+        Stack the positive ratings of several users into a CSR matrix.
+        
+        Args:
+            user_idxs (list): Row indices of the users
+            state (ModelState): State to read
+            
+        Returns:
+            scipy.sparse.csr_matrix: Matrix of shape (len(user_idxs), n_products)
+        """
+        shape = (len(user_idxs), len(state.product_indices))
+        matrix = state.interaction_matrix
+        if not state.row_overrides and max(user_idxs) < matrix.shape[0]:
+            block = csr_matrix(matrix[user_idxs], dtype=np.float64)
+            block.data = np.where(block.data > 0, block.data, 0.0)
+        else:
+            # Rows changed by apply_interaction are not in the matrix
+            rows = [self._get_user_ratings(user_idx, state) for user_idx in user_idxs]
+            indptr = np.concatenate(([0], np.cumsum([len(indices) for indices, _ in rows])))
+            indices = np.concatenate([indices for indices, _ in rows]) if rows else []
+            data = np.concatenate([ratings for _, ratings in rows]) if rows else []
+            block = csr_matrix((np.asarray(data, dtype=np.float64), indices, indptr), shape=shape)
+        block.eliminate_zeros()
+        return block
+    
+    @staticmethod
+    def _to_dense(matrix):
+        """Convert a sparse or dense product to a dense ndarray."""
+        return matrix.toarray() if issparse(matrix) else np.asarray(matrix)
+    
+    @timed('get_content_based_recommendations')
     def get_content_based_recommendations(self, user_id, top_n=5):
         """
         Get content-based recommendations for a user.
@@ -105,29 +665,26 @@ class RecommendationEngine:
         Returns:
             list: List of recommended product IDs
         """
-        # Get user-product feature vectors
-        features = self.data_processor.get_user_product_features(user_id)
+        features, product_ids, category_index = self.data_processor.get_product_feature_matrix()
+        preference_mask = self.data_processor.get_user_preference_mask(user_id)
         
-        if not features:
+        if preference_mask is None or not product_ids:
             return []
             
-        # Calculate scores for each product
-        product_scores = {}
-        for product_id, feature_vector in features.items():
-            if not feature_vector:  # Skip if no features
-                continue
-                
-            # Simple scoring based on feature values
-            # This can be expanded with more sophisticated models
-            score = sum(feature_vector)
-            product_scores[product_id] = score
-            
-        # Sort products by score and return top N
-        sorted_products = sorted(product_scores.items(), key=lambda x: x[1], reverse=True)
-        recommended_products = [p[0] for p in sorted_products[:top_n]]
+        # Score every product at once: preferred category, scaled price and
+        # average rating, plus the user's own rating of the product
+        weights = np.concatenate([
+            preference_mask * CONTENT_WEIGHTS['preference'],
+            [CONTENT_WEIGHTS['price'], CONTENT_WEIGHTS['avg_rating']]
+        ])
+        ratings = self.data_processor.get_user_rating_row(user_id)
+        scores = features @ weights
+        scores[ratings.indices] += ratings.data * (CONTENT_WEIGHTS['rating'] / RATING_SCALE)
         
-        return recommended_products
+        # Select the top N products by score
+        return [product_ids[idx] for idx in top_k_indices(scores, top_n)]
         
+    @timed('get_hybrid_recommendations')
     def get_hybrid_recommendations(self, user_id, top_n=5, collab_weight=0.7):
         """
         Get hybrid recommendations combining collaborative and content-based approaches.
@@ -158,6 +715,52 @@ class RecommendationEngine:
             score = (top_n - i) * content_weight
             product_scores[product_id] = product_scores.get(product_id, 0) + score
             
-        # Sort and return top recommendations
-        sorted_products = sorted(product_scores.items(), key=lambda x: x[1], reverse=True)
-        return [p[0] for p in sorted_products[:top_n]]
\ No newline at end of file
+        # Select the top recommendations
+        return top_k_keys(product_scores, top_n)
+    
+    def get_recommendations(self, user_id, top_n=5, strategy='hybrid', collab_weight=0.7):
+        """
+        Get recommendations for a user with the named strategy.
+        
+        Args:
+            user_id (str): User ID to get recommendations for
+            top_n (int): Number of recommendations to return
+            strategy (str): One of STRATEGIES
+            collab_weight (float): Weight for collaborative filtering (hybrid only)
+            
+        Returns:
+            list: List of recommended product IDs
+            
+        Raises:
+            ValueError: If the strategy is unknown
+        """
+        if strategy == 'collab':
+            return self.get_collaborative_recommendations(user_id, top_n=top_n)
+        if strategy == 'content':
+            return self.get_content_based_recommendations(user_id, top_n=top_n)
+        if strategy == 'hybrid':
+            return self.get_hybrid_recommendations(user_id, top_n=top_n, collab_weight=collab_weight)
+        raise ValueError(f"Unknown recommendation strategy: {strategy}")
+        
+    def model_stats(self):
+        """
+        Get the size of the current model.
+        
+        Returns:
+            dict: 'bytes' held by the similarity and interaction matrices and
+                'nnz', the stored entries of the interaction matrix; both 0
+                before training
+        """
+        state = self.state
+        total_bytes, nnz = 0, 0
+        for matrix in (state.similarity_matrix, state.interaction_matrix):
+            if matrix is None:
+                continue
+            if issparse(matrix):
+                total_bytes += matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+            else:
+                total_bytes += np.asarray(matrix).nbytes
+        if state.interaction_matrix is not None:
+            interactions = state.interaction_matrix
+            nnz = interactions.nnz if issparse(interactions) else int(np.count_nonzero(interactions))
+        return {'bytes': total_bytes, 'nnz': nnz}
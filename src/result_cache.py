@@ -0,0 +1,275 @@
+"""
+Result Cache Module for Product Recommendation Engine
+
+This module caches the top-N recommendation lists served to users. Entries
+are keyed by (user_id, top_n, collab_weight, model_version), so a newly
+published model never serves stale results, and all entries of a user are
+dropped as soon as a new interaction is tracked for them. The cache is
+bounded by entry count and by an estimate of its memory use, evicting the
+least recently used entries first, and entries expire after a TTL.
+
+Results computed while a user's entries are being invalidated must not be
+stored afterwards. Each invalidation bumps a generation counter for the
+user; a caller takes the generation before computing and put discards the
+results if it changed meanwhile.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Rough per-entry bookkeeping cost: OrderedDict node, key tuple, expiry time
+ENTRY_OVERHEAD = 200
+
+# Number of generation counters users are spread over. Users sharing a
+# counter only cost each other a skipped put, and memory stays fixed.
+GENERATION_SLOTS = 4096
+
+def cache_weight(strategy, collab_weight):
+    """
+    Get the collab_weight part of the cache key for a recommendation strategy.
+
+    Hybrid results are cached under their collab weight, so the JSON API
+    shares entries with the HTML page; the other strategies are cached
+    under their name.
+
+    Args:
+        strategy (str): One of recommendation.STRATEGIES
+        collab_weight (float): Weight of collaborative filtering
+
+    Returns:
+        float or str: Value to pass as collab_weight
+    """
+    return collab_weight if strategy == 'hybrid' else strategy
+
+class RecommendationCache:
+    def __init__(self, max_entries=10000, max_bytes=16 * 1024 * 1024, ttl=300, clock=time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum number of cached result lists
+            max_bytes (int): Approximate memory cap for keys and results
+            ttl (float, optional): Seconds an entry stays valid, None for no expiry
+            clock (callable): Returns the current time in seconds
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.nbytes = 0
+
+        # key -> (results, expiry, size); least recently used first
+        self._entries = OrderedDict()
+        self._user_keys = {}
+        self._generations = [0] * GENERATION_SLOTS
+        self._lock = threading.Lock()
+
+    def get(self, user_id, top_n, collab_weight, model_version):
+        """
+        Look up cached recommendations.
+
+        Args:
+            user_id (str): User ID
+            top_n (int): Number of recommendations
+            collab_weight (float): Weight of collaborative filtering
+            model_version (int): Version of the model that produced the results
+
+        Returns:
+            list: Cached product IDs, or None on a miss
+        """
+        key = (user_id, top_n, collab_weight, model_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= self.clock():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0])
+
+    def generation(self, user_id):
+        """
+        Get the invalidation generation of a user.
+
+        Take it before computing results and pass it to put.
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            int: Current generation
+        """
+        return self._generations[hash(user_id) % GENERATION_SLOTS]
+
+    def put(self, user_id, top_n, collab_weight, model_version, results, generation=None):
+        """
+        Store recommendations, evicting least recently used entries if needed.
+
+        Args:
+            user_id (str): User ID
+            top_n (int): Number of recommendations
+            collab_weight (float): Weight of collaborative filtering
+            model_version (int): Version of the model that produced the results
+            results (list): Recommended product IDs
+            generation (int, optional): generation(user_id) taken before the
+                results were computed; they are dropped if the user's entries
+                were invalidated since
+
+        Returns:
+            bool: True if the results were stored
+        """
+        key = (user_id, top_n, collab_weight, model_version)
+        results = tuple(results)
+        size = self._entry_size(key, results)
+        if size > self.max_bytes:
+            return False
+
+        expiry = self.clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if generation is not None and generation != self._generations[hash(user_id) % GENERATION_SLOTS]:
+                return False
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (results, expiry, size)
+            self._user_keys.setdefault(user_id, set()).add(key)
+            self.nbytes += size
+
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            return True
+
+    def get_or_compute(self, user_id, top_n, collab_weight, model_version, compute):
+        """
+        Return cached recommendations, computing and caching them on a miss.
+
+        Args:
+            user_id (str): User ID
+            top_n (int): Number of recommendations
+            collab_weight (float): Weight of collaborative filtering
+            model_version (int): Version of the model that produced the results
+            compute (callable): Produces the recommendations on a miss
+
+        Returns:
+            list: Recommended product IDs
+        """
+        generation = self.generation(user_id)
+        results = self.get(user_id, top_n, collab_weight, model_version)
+        if results is None:
+            results = compute()
+            self.put(user_id, top_n, collab_weight, model_version, results, generation)
+        return results
+
+    async def get_or_compute_async(self, user_id, top_n, collab_weight, model_version, compute):
+        """
+        get_or_compute for callers on an asyncio event loop.
+
+        A hit is answered without leaving the loop; only a miss awaits compute.
+
+        Args:
+            user_id (str): User ID
+            top_n (int): Number of recommendations
+            collab_weight (float): Weight of collaborative filtering
+            model_version (int): Version of the model that produced the results
+            compute (callable): Returns an awaitable of the recommendations,
+                e.g. a call on a thread pool
+
+        Returns:
+            list: Recommended product IDs
+        """
+        generation = self.generation(user_id)
+        results = self.get(user_id, top_n, collab_weight, model_version)
+        if results is None:
+            results = await compute()
+            self.put(user_id, top_n, collab_weight, model_version, results, generation)
+        return results
+
+    def invalidate_user(self, user_id):
+        """
+        Drop every cached result of a user.
+
+        Args:
+            user_id (str): User ID
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            self._generations[hash(user_id) % GENERATION_SLOTS] += 1
+            keys = self._user_keys.get(user_id, ())
+            removed = len(keys)
+            for key in list(keys):
+                self._remove(key)
+            self.invalidations += removed
+            return removed
+
+    def on_interaction(self, user_id, interaction, version=None):
+        """
+        Invalidate a user's results after a new interaction.
+
+        Meant to be registered with UserTracker.add_listener.
+
+        Args:
+            user_id (str): User ID
+            interaction (dict): Interaction record
+            version (int, optional): Store version of the write; unused
+        """
+        self.invalidate_user(user_id)
+
+    def clear(self):
+        """Remove every entry; the counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """
+        Get cache counters.
+
+        Returns:
+            dict: Entries, bytes, hits, misses, evictions and invalidations
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.nbytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        """Remove one entry; the lock must be held."""
+        _, _, size = self._entries.pop(key)
+        self.nbytes -= size
+        user_keys = self._user_keys[key[0]]
+        user_keys.discard(key)
+        if not user_keys:
+            del self._user_keys[key[0]]
+
+    @staticmethod
+    def _entry_size(key, results):
+        """Estimate the memory held by one entry."""
+        return (ENTRY_OVERHEAD + sys.getsizeof(key) + sys.getsizeof(key[0]) +
+                sys.getsizeof(results) + sum(sys.getsizeof(item) for item in results))
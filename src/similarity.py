@@ -0,0 +1,237 @@
+"""
+Item Similarity Module for Product Recommendation Engine
+
+This module computes item-item cosine similarities block by block so that
+peak memory stays bounded for large catalogs. Instead of a dense
+products x products matrix, it can keep only the K most similar neighbours
+of each item in a compact sparse structure.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix, diags, issparse
+
+# Negative Gram entries closer to zero than this after an in-place update
+# are rounding left over from subtracting a user's old ratings
+ROUNDING_TOLERANCE = 1e-9
+
+def item_vectors(matrix_norm):
+    """
+    Scale each item column to unit length for cosine similarity.
+
+    Args:
+        matrix_norm: Row-normalized user x item matrix (dense or sparse)
+
+    Returns:
+        scipy.sparse.csc_matrix: Matrix whose columns are unit-length item
+        vectors; columns with no ratings stay zero
+    """
+    matrix = csc_matrix(matrix_norm)
+    col_norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    scale = np.divide(1.0, col_norms, out=np.zeros_like(col_norms), where=col_norms > 0)
+    return (matrix @ diags(scale)).tocsc()
+
+def block_ranges(n_items, block_size):
+    """
+    Split item indices into contiguous blocks.
+
+    Args:
+        n_items (int): Number of items
+        block_size (int): Maximum items per block
+
+    Yields:
+        tuple: (start, end) bounds of each block
+    """
+    block_size = max(1, int(block_size))
+    for start in range(0, n_items, block_size):
+        yield start, min(start + block_size, n_items)
+
+def block_size_for_budget(row_width, max_memory_mb, itemsize=8):
+    """
+    Get how many item rows fit in one dense block under a memory budget.
+
+    Args:
+        row_width (int): Values held per item row while a block is computed
+        max_memory_mb (float): Memory budget for one block in megabytes
+        itemsize (int): Bytes per similarity value while a block is computed
+
+    Returns:
+        int: Items per block, at least 1
+    """
+    budget = int(max_memory_mb * 2 ** 20)
+    return max(1, budget // max(1, row_width * itemsize))
+
+def blocked_similarity(matrix_norm, max_memory_mb=256, out=None, mmap_path=None, dtype=np.float32):
+    """
+    Compute the exact item x item cosine similarity matrix block by block.
+
+    Only one block of rows is materialized in float64 at a time, sized from
+    max_memory_mb, and each block is written into the output before the
+    next one is computed. The block's item vectors are densified before the
+    product, so the budget covers both the dense vectors (rows x users) and
+    the dense result (rows x items), and no sparse product of unknown size
+    is ever built. The output can be a preallocated array or a
+    memory-mapped .npy file, so the full matrix never has to fit in RAM.
+
+    Args:
+        matrix_norm: Row-normalized user x item matrix (dense or sparse)
+        max_memory_mb (float): Memory budget for one block in megabytes
+        out (np.ndarray, optional): Preallocated items x items array to fill
+        mmap_path (str, optional): Create the output as a memory-mapped .npy
+            file at this path (ignored if out is given)
+        dtype: Floating point type of a newly allocated output
+
+    Returns:
+        np.ndarray: items x items similarity matrix (np.memmap if mmap_path was used)
+
+    Raises:
+        ValueError: If out does not have shape (n_items, n_items)
+    """
+    vectors = item_vectors(matrix_norm)
+    vectors_t = vectors.T.tocsr()
+    n_items = vectors.shape[1]
+
+    if out is None:
+        if mmap_path:
+            out = np.lib.format.open_memmap(mmap_path, mode='w+', dtype=dtype, shape=(n_items, n_items))
+        else:
+            out = np.empty((n_items, n_items), dtype=dtype)
+    elif out.shape != (n_items, n_items):
+        raise ValueError(f"Output must have shape {(n_items, n_items)}, got {out.shape}")
+
+    n_users = vectors.shape[0]
+    block_size = block_size_for_budget(n_items + n_users, max_memory_mb)
+    for start, end in block_ranges(n_items, block_size):
+        out[start:end] = vectors_t[start:end].toarray() @ vectors
+
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
+def top_k_neighbours(matrix_norm, k, block_size=1024, dtype=np.float32):
+    """
+    Compute the K most similar items for every item.
+
+    Similarities are computed for block_size items at a time as a sparse
+    product, so only co-rated item pairs are ever materialized and the
+    working set is bounded by the block rather than the whole catalog.
+    Self-similarities and non-positive similarities are dropped.
+
+    Args:
+        matrix_norm: Row-normalized user x item matrix (dense or sparse)
+        k (int): Number of neighbours to keep per item
+        block_size (int): Number of items processed per block
+        dtype: Floating point type of the stored similarities
+
+    Returns:
+        scipy.sparse.csc_matrix: items x items matrix where column j of row i
+        is non-zero only if j is one of the k nearest neighbours of i. Stored
+        column-major so that scoring can slice the user's rated items cheaply.
+    """
+    vectors = item_vectors(matrix_norm)
+    vectors_t = vectors.T.tocsr()
+    n_items = vectors.shape[1]
+
+    rows, cols, values = [], [], []
+    for start, end in block_ranges(n_items, block_size):
+        block = (vectors_t[start:end] @ vectors).tocoo()
+        block_rows = block.row + start
+
+        # Drop self-similarity and non-positive entries
+        keep = (block.col != block_rows) & (block.data > 0)
+        block_rows, block_cols, block_data = block_rows[keep], block.col[keep], block.data[keep]
+
+        # Order by row, then descending similarity, then column for stable ties
+        order = np.lexsort((block_cols, -block_data, block_rows))
+        block_rows, block_cols, block_data = block_rows[order], block_cols[order], block_data[order]
+
+        # Rank of each entry within its row; keep the first k
+        row_starts = np.searchsorted(block_rows, block_rows, side='left')
+        rank = np.arange(len(block_rows)) - row_starts
+        keep = rank < k
+
+        rows.append(block_rows[keep])
+        cols.append(block_cols[keep])
+        values.append(block_data[keep].astype(dtype))
+
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+    values = np.concatenate(values) if values else np.empty(0, dtype=dtype)
+
+    neighbours = csr_matrix((values, (rows, cols)), shape=(n_items, n_items), dtype=dtype)
+    return neighbours.tocsc()
+
+def similarity_nbytes(similarity):
+    """
+    Get the memory used by a dense or sparse similarity model.
+
+    Args:
+        similarity: np.ndarray or scipy.sparse matrix
+
+    Returns:
+        int: Size in bytes of the underlying arrays
+    """
+    if issparse(similarity):
+        return similarity.data.nbytes + similarity.indices.nbytes + similarity.indptr.nbytes
+    return similarity.nbytes
+
+def _clip_rounding(values):
+    """
+    Zero the tiny negative values rounding leaves in updated Gram entries.
+
+    Non-negative ratings have non-negative similarities, so a model that
+    stays free of negative values can skip the |S| copy when scoring.
+    """
+    values[(values < 0.0) & (values > -ROUNDING_TOLERANCE)] = 0.0
+    return values
+
+def update_item_similarities(similarity, touched, delta, norms_sq, row_scale_sq):
+    """
+    Apply a change in one user's ratings to the item similarities in place.
+
+    Cosine similarity is G[i, j] / sqrt(n[i] * n[j]), where G is the Gram
+    matrix of the row-normalized item columns and n its diagonal. Changing
+    one user's row adds delta to G only for the items that user touched, so
+    only those columns need updating.
+
+    Row i of the stored similarities keeps the scale 1 / sqrt(row_scale_sq[i])
+    fixed at training time. Predictions are weighted averages along a row,
+    so a per-row scale cancels out and rows never need rewriting. For the
+    sparse neighbour model only entries that are already stored are updated;
+    newly co-rated pairs appear after the next full training.
+
+    Args:
+        similarity: Dense items x items array or CSC neighbour matrix, writeable
+        touched (np.ndarray): Sorted item indices whose columns changed
+        delta (np.ndarray): len(touched) x len(touched) change of G
+        norms_sq (np.ndarray): Current diagonal of G; updated in place
+        row_scale_sq (np.ndarray): Per-row scale fixed at training time
+    """
+    old_scale = np.sqrt(norms_sq[touched])
+    new_norms_sq = np.maximum(norms_sq[touched] + np.diag(delta), 0.0)
+    new_scale = np.sqrt(new_norms_sq)
+    inv_new_scale = np.divide(1.0, new_scale, out=np.zeros_like(new_scale), where=new_scale > 1e-12)
+    row_scale = np.sqrt(row_scale_sq)
+
+    if issparse(similarity):
+        for k, col in enumerate(touched):
+            start, end = similarity.indptr[col], similarity.indptr[col + 1]
+            if start == end:
+                continue
+            rows = similarity.indices[start:end]
+            gram = similarity.data[start:end] * row_scale[rows] * old_scale[k]
+
+            # Rows that were touched too also see the change in G
+            pos = np.minimum(np.searchsorted(touched, rows), len(touched) - 1)
+            in_touched = touched[pos] == rows
+            gram[in_touched] = _clip_rounding(gram[in_touched] + delta[pos[in_touched], k])
+
+            similarity.data[start:end] = gram / row_scale[rows] * inv_new_scale[k]
+    else:
+        gram = similarity[:, touched] * row_scale[:, None] * old_scale[None, :]
+        gram[touched, :] = _clip_rounding(gram[touched, :] + delta)
+        similarity[:, touched] = gram / row_scale[:, None] * inv_new_scale[None, :]
+
+    norms_sq[touched] = new_norms_sq
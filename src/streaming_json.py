@@ -0,0 +1,220 @@
+"""
+Streaming JSON Module for Product Recommendation Engine
+
+This module reads the users/products data files one record at a time, so
+loading a multi-GB export never holds more than one user or product (plus a
+read buffer) in memory as Python objects. Two formats are supported:
+
+    JSON      the existing {"users": {id: {...}}, "products": {id: {...}}}
+              document, scanned incrementally with json.JSONDecoder.raw_decode
+    NDJSON    one record per line, {"kind": "user" | "product", "id": ..., ...},
+              selected by a .ndjson or .jsonl file extension
+
+Both yield the same (section, id, record) triples.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import json
+import os
+
+CHUNK_SIZE = 1 << 16
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+SECTIONS = ('users', 'products')
+KIND_TO_SECTION = {'user': 'users', 'product': 'products'}
+WHITESPACE = ' \t\n\r'
+
+class StreamingDecoder:
+    """Incremental reader for one JSON document from a text file."""
+
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        """
+        Initialize the decoder.
+
+        Args:
+            file: Text file object positioned at the start of the document
+            chunk_size (int): Characters read from the file at a time
+        """
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _read(self, size):
+        """Append up to size characters to the buffer, dropping consumed text."""
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        data = self.file.read(size)
+        if not data:
+            self.eof = True
+        self.buffer += data
+
+    def peek(self):
+        """
+        Get the next non-whitespace character without consuming it.
+
+        Returns:
+            str: The character, or '' at the end of the file
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._read(self.chunk_size)
+
+    def expect(self, char):
+        """
+        Consume one structural character.
+
+        Raises:
+            ValueError: If the next character is not char
+        """
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        """
+        Decode the next JSON value.
+
+        A value that reaches the end of the buffer may have been cut off
+        (e.g. a number), so more input is read and decoding is retried, with
+        a growing read size so long values still load in linear time.
+
+        Returns:
+            The decoded value
+
+        Raises:
+            ValueError: If the document is malformed
+        """
+        self.peek()
+        read_size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._read(read_size)
+            read_size *= 2
+
+    def object_items(self):
+        """
+        Iterate over the members of the next JSON object.
+
+        Each value must be consumed (with value() or object_items()) before
+        the iteration continues.
+
+        Yields:
+            str: Member key, with the decoder positioned at its value
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError("Object keys must be strings")
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect('}')
+            return
+
+def is_ndjson(path):
+    """Check whether a data file uses the newline-delimited format."""
+    return os.path.splitext(path)[1].lower() in NDJSON_EXTENSIONS
+
+def iter_records(path, sections=SECTIONS, chunk_size=CHUNK_SIZE):
+    """
+    Stream the user and product records of a data file.
+
+    Args:
+        path (str): Path of a JSON or NDJSON data file
+        sections (tuple): Sections to yield; records of other sections are
+            parsed and dropped one at a time
+        chunk_size (int): Characters read from the file at a time
+
+    Yields:
+        tuple: (section, record id, record dict), section being 'users' or 'products'
+
+    Raises:
+        ValueError: If the file is not a valid data file
+    """
+    if is_ndjson(path):
+        yield from _iter_ndjson_records(path, sections)
+        return
+
+    with open(path, 'r', encoding='utf-8') as file:
+        decoder = StreamingDecoder(file, chunk_size)
+        if decoder.peek() != '{':
+            decoder.value()  # Raises JSONDecodeError if this is not JSON at all
+            raise ValueError("Invalid data format: root must be a dictionary")
+
+        found = set()
+        for section in decoder.object_items():
+            if section not in SECTIONS:
+                decoder.value()
+                continue
+            if decoder.peek() != '{':
+                raise ValueError(f"Invalid data format: '{section}' must be a dictionary")
+            found.add(section)
+            for record_id in decoder.object_items():
+                record = decoder.value()
+                if section in sections:
+                    yield section, record_id, record
+
+        if decoder.peek():
+            raise ValueError("Invalid data format: extra data after the JSON document")
+        if found != set(SECTIONS):
+            raise ValueError("Invalid data format: missing 'users' or 'products' keys")
+
+def _iter_ndjson_records(path, sections):
+    """Stream the records of a newline-delimited data file."""
+    with open(path, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            section = KIND_TO_SECTION.get(record.pop('kind', None)) if isinstance(record, dict) else None
+            if section is None or 'id' not in record:
+                raise ValueError(f"Line {line_number}: expected a record with 'kind' and 'id'")
+            if section in sections:
+                yield section, record.pop('id'), record
+
+def write_ndjson(records, path):
+    """
+    Write (section, id, record) triples as a newline-delimited data file.
+
+    Combined with iter_records this converts a JSON export to NDJSON one
+    record at a time.
+
+    Args:
+        records (iterable): Triples as yielded by iter_records
+        path (str): Output path
+
+    Returns:
+        int: Number of records written
+    """
+    kinds = {section: kind for kind, section in KIND_TO_SECTION.items()}
+    count = 0
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        for section, record_id, record in records:
+            line = {**record, 'kind': kinds[section], 'id': record_id}
+            file.write(json.dumps(line, separators=(',', ':')) + '\n')
+            count += 1
+    os.replace(tmp_path, path)
+    return count
@@ -0,0 +1,97 @@
+"""
+Top-K Selection Module for Product Recommendation Engine
+
+This module selects the highest scoring items without sorting the whole
+catalog. Array scores use np.argpartition and only sort the K winners; dict
+scores use heapq.nlargest.
+
+Ties are broken deterministically: equal scores are ranked by position, so
+the lower array index (or the earlier dict key) comes first.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import heapq
+import numpy as np
+
+def top_k_indices(scores, k):
+    """
+    Get the indices of the k highest scores, best first.
+
+    Args:
+        scores (np.ndarray): 1-D array of scores
+        k (int): Number of indices to return
+
+    Returns:
+        np.ndarray: Up to k indices ordered by descending score, then ascending index
+    """
+    scores = np.asarray(scores)
+    n = scores.shape[0]
+    k = min(max(int(k), 0), n)
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < n:
+        # Everything strictly above the k-th best score is a winner; the
+        # remaining slots go to the lowest indices tied with it
+        kth_score = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > kth_score)
+        tied = np.flatnonzero(scores == kth_score)[:k - len(above)]
+        candidates = np.concatenate((above, tied))
+    else:
+        candidates = np.arange(n)
+
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+def top_k_keys(scores, k):
+    """
+    Get the keys of the k highest values in a dict, best first.
+
+    Args:
+        scores (dict): Mapping of key to score
+        k (int): Number of keys to return
+
+    Returns:
+        list: Up to k keys ordered by descending score, then insertion order
+    """
+    # nlargest is stable, so equal scores keep their insertion order
+    return [key for key, _ in heapq.nlargest(max(int(k), 0), scores.items(), key=lambda item: item[1])]
+
+def top_k_rows(scores, k):
+    """
+    Get the column indices of the k highest scores in every row, best first.
+
+    Applies the same ordering and tie-breaking as top_k_indices to each row
+    of a 2-D array without a Python loop over the rows.
+
+    Args:
+        scores (np.ndarray): 2-D array of scores, one row per query
+        k (int): Number of indices to return per row
+
+    Returns:
+        np.ndarray: Array of shape (n_rows, min(k, n_columns)) of column indices
+    """
+    scores = np.asarray(scores)
+    n_rows, n = scores.shape
+    k = min(max(int(k), 0), n)
+    if k == 0 or n_rows == 0:
+        return np.empty((n_rows, k), dtype=np.intp)
+
+    if k < n:
+        kth_score = -np.partition(-scores, k - 1, axis=1)[:, k - 1:k]
+        above = scores > kth_score
+        tied = scores == kth_score
+        # Fill the slots left after the strictly better scores with the
+        # lowest tied columns
+        slots = k - above.sum(axis=1, keepdims=True)
+        selected = above | (tied & (np.cumsum(tied, axis=1) <= slots))
+        candidates = np.nonzero(selected)[1].reshape(n_rows, k)
+    else:
+        candidates = np.broadcast_to(np.arange(n), (n_rows, n))
+
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    rows = np.repeat(np.arange(n_rows), k)
+    order = np.lexsort((candidates.ravel(), -candidate_scores.ravel(), rows))
+    return candidates.ravel()[order].reshape(n_rows, k)
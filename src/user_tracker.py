@@ -10,18 +10,94 @@ Date: May 11, 2025
 
 import json
 import os
+import threading
+import weakref
+from contextlib import ExitStack, contextmanager, nullcontext
 from datetime import datetime
 
+import numpy as np
+
+from event_log import EventLog
+from interaction_store import InteractionStore, InteractionView
+from metrics import timed
+from streaming_json import iter_records
+
+# Number of lock stripes users are spread over; see UserTracker._user_locks
+LOCK_STRIPES = 64
+
 class UserTracker:
-    def __init__(self, data_path=None):
+    def __init__(self, data_path=None, log_path=None, compact_bytes=16 * 1024 * 1024,
+                 fsync_every=100, fsync_interval=1.0, interaction_store=None):
         """
         Initialize the UserTracker with optional data path.
         
         Args:
             data_path (str, optional): Path to save user interaction data
+            log_path (str, optional): Path of an append-only event log. When set,
+                each tracked interaction is appended to the log instead of
+                rewriting data_path, and the log is compacted into data_path
+                once it grows past compact_bytes.
+            compact_bytes (int): Log size that triggers a compaction on a
+                background thread
+            fsync_every (int): fsync the log after this many events
+            fsync_interval (float): fsync unsynced events after at most this
+                many seconds, also when no further event arrives
+            interaction_store (InteractionStore, optional): Columnar store of
+                the user interactions, typically shared with a DataProcessor
         """
         self.data_path = data_path
-        self.user_interactions = {}
+        self.interaction_store = interaction_store if interaction_store is not None else InteractionStore()
+        # Dict-of-lists view of the store; records are rebuilt on access
+        self.user_interactions = InteractionView(self.interaction_store)
+        self.compact_bytes = compact_bytes
+        self.event_log = None
+        if log_path:
+            self.event_log = EventLog(log_path, fsync_every=fsync_every, fsync_interval=fsync_interval)
+        self.listeners = []
+        self.last_error = None
+        # Bytes of the event log whose events are in the interaction store;
+        # with the data file this identifies the data a model is trained from
+        self.log_offset = 0
+        # Identity of the data file when the log was replayed; compaction
+        # replaces the file, which tells tail_log to reload
+        self._data_file_id = None
+        # Identity of the log file; a log renamed by a compaction that did
+        # not finish also tells tail_log to reload
+        self._log_file_id = None
+        self._init_locks()
+        
+        # Locks held by request threads at fork time would stay locked
+        # forever in the child
+        if hasattr(os, 'register_at_fork'):
+            tracker_ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: tracker_ref() and tracker_ref()._init_locks())
+    
+    def _init_locks(self):
+        """Create the per-user lock stripes."""
+        self._stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._offset_lock = threading.Lock()
+        self._tail_lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._compactor = None
+    
+    @contextmanager
+    def _user_locks(self, user_ids):
+        """
+        Hold the lock stripes of some users.
+        
+        A user's events are stored, logged and passed to listeners under
+        their stripe, so listeners see every user's events in the order they
+        were stored while different users are tracked in parallel. Stripes
+        are taken in index order, so batches cannot deadlock each other.
+        
+        Args:
+            user_ids (iterable): User IDs
+        """
+        stripes = sorted({hash(user_id) % LOCK_STRIPES for user_id in user_ids})
+        with ExitStack() as stack:
+            for stripe in stripes:
+                stack.enter_context(self._stripes[stripe])
+            yield
         
     def load_interactions(self, data_path=None):
         """
@@ -39,19 +115,120 @@ class UserTracker:
             return False
             
         try:
-            with open(path, 'r') as file:
-                data = json.load(file)
-                
-            if 'users' in data:
-                for user_id, user_data in data['users'].items():
-                    if 'interactions' in user_data:
-                        self.user_interactions[user_id] = user_data['interactions']
-                        
+            # No compaction may move events from the log into the file meanwhile
+            with self.event_log.shared_lock() if self.event_log else nullcontext():
+                return self._load_interactions(path)
+            
+        except Exception:
+            return False
+    
+    def _load_interactions(self, path):
+        """Read the data file and replay the log; the caller holds the log's shared lock."""
+        # Stream the users one at a time into a new store; products are skipped
+        store = InteractionStore()
+        for _, user_id, user_data in iter_records(path, sections=('users',)):
+            if 'interactions' in user_data:
+                store.extend_interactions(user_id, user_data['interactions'])
+        self.interaction_store.replace(store)
+        
+        return self._replay_log()
+    
+    def replay_log(self):
+        """
+        Add the events logged since the last compaction to the interactions.
+        
+        load_interactions calls this after reading the data file. When the
+        store is shared with a DataProcessor that already loaded the data
+        file, call only this.
+        
+        Returns:
+            bool: True if replaying was successful
+        """
+        if not self.event_log:
             return True
             
+        try:
+            with self.event_log.shared_lock():
+                return self._replay_log()
+            
         except Exception:
             return False
     
+    def _replay_log(self):
+        """Replay the log; the caller holds the log's shared lock."""
+        if not self.event_log:
+            return True
+            
+        self._data_file_id = self._get_data_file_id()
+        self._log_file_id = self.event_log.file_id()
+        # Events of an interrupted compaction are older than the log's
+        events = list(self.event_log.replay_rotated())
+        logged, end = self.event_log.read_from(0)
+        for event in events + logged:
+            user_id, interaction = self._split_event(event)
+            self.interaction_store.append_interaction(user_id, interaction)
+        self.log_offset = end
+        return True
+    
+    def tail_log(self):
+        """
+        Add the events other processes logged since the last replay or tail.
+        
+        For a process that trains but does not track, like the pre-fork
+        master: workers append to the shared event log and this reads what
+        they wrote. Listeners are not called. If the log was compacted since
+        the last call, the interactions are reloaded from the data file.
+        
+        Returns:
+            int: Number of interactions added
+        """
+        if not self.event_log:
+            return 0
+            
+        with self._tail_lock, self.event_log.shared_lock():
+            store = self.interaction_store
+            before = len(store)
+            log_file_id = self.event_log.file_id()
+            log_renamed = self._log_file_id is not None and log_file_id != self._log_file_id
+            if self._get_data_file_id() != self._data_file_id or log_renamed:
+                try:
+                    if not self.data_path or not self._load_interactions(self.data_path):
+                        return 0
+                except Exception:
+                    return 0
+            else:
+                self._log_file_id = log_file_id
+                events, end = self.event_log.read_from(self.log_offset)
+                for event in events:
+                    user_id, interaction = self._split_event(event)
+                    store.append_interaction(user_id, interaction)
+                self.log_offset = end
+            return max(len(store) - before, 0)
+    
+    def _get_data_file_id(self):
+        """Get the inode, modification time and size of the data file, or None."""
+        try:
+            stat = os.stat(self.data_path)
+        except (OSError, TypeError):
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+    
+    @staticmethod
+    def _split_event(event):
+        """
+        Split a logged event into its user ID and interaction record.
+        
+        Args:
+            event (dict): Event as written to the log
+            
+        Returns:
+            tuple: (user_id, interaction)
+        """
+        interaction = dict(event)
+        user_id = interaction.pop('user_id')
+        return user_id, interaction
+    
+    @timed('save_interactions')
     def save_interactions(self, data_path=None):
         """
         Save user interactions to file.
@@ -82,7 +259,7 @@ class UserTracker:
             for user_id, interactions in self.user_interactions.items():
                 if user_id not in data['users']:
                     data['users'][user_id] = {}
-                data['users'][user_id]['interactions'] = interactions
+                data['users'][user_id]['interactions'] = list(interactions)
                 
             # Save data
             with open(path, 'w') as file:
@@ -93,6 +270,23 @@ class UserTracker:
         except Exception:
             return False
     
+    def add_listener(self, callback):
+        """
+        Register a callback for newly tracked interactions.
+        
+        Args:
+            callback (callable): Called with (user_id, interaction, version)
+                after each interaction has been recorded; version is the
+                interaction store version its write produced
+        """
+        self.listeners.append(callback)
+    
+    def _notify(self, user_id, interaction, version):
+        """Pass a newly tracked interaction to every listener."""
+        for callback in self.listeners:
+            callback(user_id, interaction, version)
+    
+    @timed('track_interaction')
     def track_interaction(self, user_id, product_id, interaction_type, value=None):
         """
         Track a user interaction with a product.
@@ -109,15 +303,91 @@ class UserTracker:
         if not user_id or not product_id:
             return False
             
-        # Initialize user if not exists
-        if user_id not in self.user_interactions:
-            self.user_interactions[user_id] = []
+        with self._user_locks((user_id,)):
+            # Create interaction record; stamped under the lock so that each
+            # user's timestamps follow the order their events are stored in
+            interaction = self._make_interaction(product_id, interaction_type, value)
+            
+            # Add interaction to user's history
+            version = self.interaction_store.append_interaction(user_id, interaction)
             
-        # Create interaction record
+            # Append to the event log, or auto-save if only a data path is set
+            if self.event_log:
+                self._advance_log_offset(self.event_log.append(dict(interaction, user_id=user_id)))
+                self._compact_if_needed()
+            elif self.data_path:
+                self.save_interactions()
+                
+            self._notify(user_id, interaction, version)
+        return True
+    
+    def track_interactions(self, events):
+        """
+        Track a batch of interactions with a single write.
+        
+        Args:
+            events (list): Dicts with user_id, product_id, type and optional
+                value and timestamp keys
+            
+        Returns:
+            int: Number of interactions tracked
+        """
+        tracked = []
+        for event in events:
+            user_id = event.get('user_id')
+            product_id = event.get('product_id')
+            if not user_id or not product_id:
+                continue
+                
+            interaction = self._make_interaction(
+                product_id, event.get('type'), event.get('value'), event.get('timestamp')
+            )
+            tracked.append((user_id, interaction))
+        
+        if not tracked:
+            return 0
+            
+        with self._user_locks(user_id for user_id, _ in tracked):
+            # Each event's own store version, so listeners can match the
+            # notifications to the writes one by one
+            versions = [self.interaction_store.append_interaction(user_id, interaction)
+                        for user_id, interaction in tracked]
+                
+            if self.event_log:
+                self._advance_log_offset(self.event_log.append_many(
+                    [dict(interaction, user_id=user_id) for user_id, interaction in tracked]
+                ))
+                self._compact_if_needed()
+            elif self.data_path:
+                self.save_interactions()
+                
+            for (user_id, interaction), version in zip(tracked, versions):
+                self._notify(user_id, interaction, version)
+        return len(tracked)
+    
+    def _advance_log_offset(self, written):
+        """Count bytes this process appended to the event log."""
+        with self._offset_lock:
+            self.log_offset += written
+    
+    @staticmethod
+    def _make_interaction(product_id, interaction_type, value=None, timestamp=None):
+        """
+        Build an interaction record.
+        
+        Args:
+            product_id (str): Product ID
+            interaction_type (str): Type of interaction (view, click, purchase, rating)
+            value (float, optional): Value associated with the interaction
+            timestamp (str, optional): ISO timestamp; defaults to now
+            
+        Returns:
+            dict: Interaction record
+        """
         interaction = {
             'product_id': product_id,
             'type': interaction_type,
-            'timestamp': datetime.now().isoformat()
+            'timestamp': timestamp or datetime.now().isoformat()
         }
         
         # Add value if provided
@@ -127,15 +397,89 @@ class UserTracker:
             # For ratings, keep as a separate attribute
             if interaction_type == 'rating':
                 interaction['rating'] = float(value)
+                
+        return interaction
+    
+    def _compact_if_needed(self):
+        """
+        Start a background compaction once the log has grown past compact_bytes.
         
-        # Add interaction to user's history
-        self.user_interactions[user_id].append(interaction)
+        Called once per tracked batch; the request never waits for the merge,
+        at most for the rename of the log that starts it.
+        """
+        if not self.data_path or self._compacting():
+            return
+        if self.event_log.size() >= self.compact_bytes:
+            with self._compact_lock:
+                if not self._compacting():
+                    self._compactor = threading.Thread(target=self.compact, name='log-compactor', daemon=True)
+                    self._compactor.start()
+    
+    def _compacting(self):
+        """Check whether a background compaction is running."""
+        compactor = self._compactor
+        return compactor is not None and compactor.is_alive()
+    
+    def compact(self):
+        """
+        Fold the event log into the data file.
+        
+        Appends in every process go on to a fresh log while the events are
+        merged; they only wait for the log to be renamed.
         
-        # Auto-save if data path is set
-        if self.data_path:
-            self.save_interactions()
+        Returns:
+            bool: True if compaction was successful; otherwise the error is
+                kept in last_error
+        """
+        if not self.event_log or not self.data_path:
+            return False
+            
+        try:
+            self.event_log.compact(self._merge_events)
+        except Exception as e:
+            self.last_error = f"Error compacting event log: {str(e)}"
+            return False
             
+        # The log now starts empty; this process no longer matches a
+        # fingerprint of the data file it loaded anyway
+        with self._offset_lock:
+            self.log_offset = 0
         return True
+    
+    def _merge_events(self, events):
+        """
+        Append logged events to the user interactions stored in the data file.
+        
+        The file is rewritten through a temporary file so that a crash never
+        leaves a half-written data file behind.
+        
+        Args:
+            events (list): Events replayed from the log, oldest first
+        """
+        data = {}
+        if os.path.exists(self.data_path):
+            with open(self.data_path, 'r') as file:
+                data = json.load(file)
+        
+        users = data.setdefault('users', {})
+        for event in events:
+            user_id, interaction = self._split_event(event)
+            users.setdefault(user_id, {}).setdefault('interactions', []).append(interaction)
+        
+        temp_path = f"{self.data_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(data, file, indent=2)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.data_path)
+    
+    def close(self):
+        """Wait for a running compaction, then flush and close the event log, if any."""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        if self.event_log:
+            self.event_log.close()
         
     def get_user_interactions(self, user_id, limit=None):
         """
@@ -146,25 +490,50 @@ class UserTracker:
             limit (int, optional): Maximum number of interactions to return
             
         Returns:
-            list: List of interaction records for the user
+            list: List of interaction records for the user, newest first
         """
         if user_id not in self.user_interactions:
             return []
             
-        interactions = self.user_interactions[user_id]
-        
-        # Sort by timestamp (newest first)
-        sorted_interactions = sorted(
-            interactions, 
-            key=lambda x: x.get('timestamp', ''), 
-            reverse=True
-        )
-        
-        # Apply limit if provided
+        # The store keeps each user's events in timestamp order, so the
+        # newest ones are read off the end without sorting
         if limit and isinstance(limit, int) and limit > 0:
-            return sorted_interactions[:limit]
+            return self.interaction_store.records(self.interaction_store.newest_rows(user_id, limit))
+            
+        rows = self.interaction_store.user_rows(user_id)[::-1]
+        return self.interaction_store.records(rows.tolist())
+    
+    def get_user_interactions_page(self, user_id, limit=10, cursor=None):
+        """
+        Get one page of a user's interactions, newest first.
+        
+        Args:
+            user_id (str): User ID
+            limit (int): Maximum number of interactions on the page
+            cursor (str, optional): next_cursor of the previous page; omit for
+                the newest page
             
-        return sorted_interactions
+        Returns:
+            tuple: (interactions, next_cursor) where next_cursor is None on
+                the last page, or (None, None) if the cursor is invalid
+        """
+        before = None
+        if cursor:
+            try:
+                timestamp, sequence = cursor.split(':')
+                before = (int(timestamp), int(sequence))
+            except ValueError:
+                return None, None
+                
+        store = self.interaction_store
+        # Fetch one extra event to find out whether an older page exists
+        rows = store.newest_rows(user_id, limit + 1, before) if limit > 0 else []
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            timestamp, sequence = store.event_key(rows[-1])
+            next_cursor = f"{timestamp}:{sequence}"
+        return store.records(rows), next_cursor
         
     def get_product_interactions(self, product_id):
         """
@@ -176,14 +545,19 @@ class UserTracker:
         Returns:
             list: List of interaction records for the product
         """
+        store = self.interaction_store
+        product_code = store.products.get(product_id)
+        if product_code is None:
+            return []
+            
+        # Scan the product column instead of every user's records
+        rows = np.flatnonzero(store.column('product') == product_code)
+        users = store.column('user')[rows]
         product_interactions = []
-        
-        for user_id, interactions in self.user_interactions.items():
-            for interaction in interactions:
-                if interaction.get('product_id') == product_id:
-                    # Add user ID to interaction data
-                    interaction_copy = interaction.copy()
-                    interaction_copy['user_id'] = user_id
-                    product_interactions.append(interaction_copy)
+        for row, user_code in zip(rows.tolist(), users.tolist()):
+            # Add user ID to interaction data
+            interaction = store.record(row)
+            interaction['user_id'] = store.users[user_code]
+            product_interactions.append(interaction)
         
         return product_interactions
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Test suite for the Flask application.
+
+This module imports the application against a temporary data directory
+and drives its routes with the Flask test client.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import shutil
+import unittest
+import tempfile
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from test_recommendation import make_sample_data
+
+# The app loads its data at import time, so point it at a copy first
+data_dir = tempfile.mkdtemp()
+with open(os.path.join(data_dir, 'sample_data.json'), 'w', encoding='utf-8') as f:
+    json.dump(make_sample_data(), f)
+os.environ['RECOMMENDER_DATA_DIR'] = data_dir
+
+import app as app_module
+
+def tearDownModule():
+    """Stop the background threads and remove the data directory."""
+    app_module.ingest_queue.stop()
+    app_module.model_manager.stop(timeout=1)
+    app_module.user_tracker.close()
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+class TestTrackInteractions(unittest.TestCase):
+    """Test cases for the batch tracking endpoint."""
+
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.queue = app_module.ingest_queue
+
+    def test_batch_is_queued(self):
+        """Test valid events are accepted and invalid ones reported by index."""
+        # Arrange
+        events = [
+            {"user_id": "user1", "product_id": "prod3", "type": "view"},
+            {"user_id": "user1", "type": "view"},
+            {"user_id": "user2", "product_id": "prod1", "type": "rating", "value": 4}
+        ]
+
+        # Act
+        response = self.client.post('/api/track_interactions', json=events)
+
+        # Assert
+        self.assertEqual(response.status_code, 202)
+        body = response.get_json()
+        self.assertFalse(body['success'])
+        self.assertEqual(body['accepted'], 2)
+        self.assertEqual(body['invalid'], 1)
+        self.assertEqual([error['index'] for error in body['errors']], [1])
+        self.assertEqual(body['dropped'], [])
+
+    def test_full_queue_reports_dropped_indices(self):
+        """Test events the full queue refused are listed by their index in the request."""
+        # Arrange
+        events = [
+            {"user_id": "user1", "product_id": "prod3", "type": "view"},
+            {"user_id": "user1", "product_id": "", "type": "view"},
+            {"user_id": "user2", "product_id": "prod4", "type": "view"},
+            {"user_id": "user3", "product_id": "prod5", "type": "view"}
+        ]
+        self.queue.stop()
+        max_size, self.queue.max_size = self.queue.max_size, 1
+
+        # Act
+        try:
+            response = self.client.post('/api/track_interactions', json={"events": events})
+        finally:
+            self.queue.max_size = max_size
+            self.queue.drain()
+            self.queue.start()
+
+        # Assert
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        body = response.get_json()
+        self.assertEqual(body['accepted'], 1)
+        self.assertEqual(body['invalid'], 1)
+        self.assertEqual([error['index'] for error in body['errors']], [1])
+        self.assertEqual(body['dropped'], [2, 3])
+
+class TestIndex(unittest.TestCase):
+    """Test cases for the paged catalog on the home page."""
+
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.cache = app_module.catalog_page_cache
+        self.cache.clear()
+        # Two products per page, so the five sample products span three pages
+        self.page_size, app_module.CATALOG_PAGE_SIZE = app_module.CATALOG_PAGE_SIZE, 2
+
+    def tearDown(self):
+        """Restore the page size and drop the pages rendered with it."""
+        app_module.CATALOG_PAGE_SIZE = self.page_size
+        self.cache.clear()
+
+    def test_unchanged_page_is_not_modified(self):
+        """Test revalidating with the page's ETag gets 304 without a body."""
+        # Arrange
+        first = self.client.get('/')
+
+        # Act
+        response = self.client.get('/', headers={'If-None-Match': first.headers['ETag']})
+
+        # Assert
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers['Cache-Control'], 'no-cache')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+    def test_page_lists_its_products(self):
+        """Test ?page= selects the products of that page in catalog order."""
+        # Act
+        response = self.client.get('/?page=2')
+
+        # Assert
+        html = response.get_data(as_text=True)
+        self.assertIn('Page 2 of 3 (5 products)', html)
+        self.assertIn('Console', html)
+        self.assertIn('Jacket', html)
+        self.assertNotIn('Headphones', html)
+
+    def test_category_filters_products(self):
+        """Test ?category= pages through that category only."""
+        # Act
+        response = self.client.get('/?category=books')
+
+        # Assert
+        html = response.get_data(as_text=True)
+        self.assertIn('Page 1 of 1 (2 products)', html)
+        self.assertIn('Novel', html)
+        self.assertIn('Cookbook', html)
+        self.assertNotIn('Console', html)
+
+    def test_out_of_range_page_is_clamped(self):
+        """Test a page past the end shows the last page instead of an empty one."""
+        # Act
+        past_end = self.client.get('/?page=99')
+        before_start = self.client.get('/?page=0')
+
+        # Assert
+        self.assertIn('Page 3 of 3 (5 products)', past_end.get_data(as_text=True))
+        self.assertIn('Cookbook', past_end.get_data(as_text=True))
+        self.assertIn('Page 1 of 3 (5 products)', before_start.get_data(as_text=True))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_unknown_category_is_rejected(self):
+        """Test an unknown category redirects to the catalog without caching a page."""
+        # Act
+        response = self.client.get('/?category=garden')
+
+        # Assert
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.headers['Location'], '/')
+        self.assertEqual(len(self.cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
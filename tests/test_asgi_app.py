@@ -0,0 +1,225 @@
+"""
+Test suite for the asynchronous serving path.
+
+This module drives the ASGI application directly with in-memory requests
+and checks the responses, the tracking path and overload handling.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import shutil
+import asyncio
+import unittest
+import tempfile
+import threading
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from asgi_app import AsyncApp
+from data_processor import DataProcessor
+from interaction_store import InteractionStore
+from model_manager import ModelManager
+from result_cache import RecommendationCache
+from test_recommendation import make_sample_data
+from user_tracker import UserTracker
+
+def render_stub(user_id, user_name, products):
+    """Render a minimal page listing the recommended product IDs."""
+    return f"{user_name}: " + ",".join(product['id'] for product in products)
+
+async def call(app, method, path, query=b'', body=b''):
+    """Send one request to an ASGI app and collect the response."""
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query, 'headers': []}
+    await app(scope, receive, send)
+    headers = dict(sent[0]['headers'])
+    return sent[0]['status'], headers, b''.join(m.get('body', b'') for m in sent[1:])
+
+class TestAsyncApp(unittest.TestCase):
+    """Test cases for the AsyncApp class."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.data_path = os.path.join(self.temp_dir, 'data.json')
+        with open(self.data_path, 'w', encoding='utf-8') as f:
+            json.dump(make_sample_data(), f)
+
+        store = InteractionStore()
+        self.data_processor = DataProcessor(self.data_path, interaction_store=store)
+        self.data_processor.load_data()
+        self.tracker = UserTracker(self.data_path, log_path=os.path.join(self.temp_dir, 'interactions.log'),
+                                   interaction_store=store)
+        self.manager = ModelManager(self.data_processor, retrain_interval=None, retrain_after=None)
+        self.manager.train()
+        self.cache = RecommendationCache()
+        self.tracker.add_listener(self.manager.on_stored_interaction)
+        self.tracker.add_listener(self.cache.on_interaction)
+        self.app = AsyncApp(self.data_processor, self.manager, self.tracker, self.cache, render_stub,
+                            recommendation_count=3, scoring_workers=2, io_workers=2)
+
+    def tearDown(self):
+        """Clean up after each test."""
+        self.app.scoring.shutdown()
+        self.app.io.shutdown()
+        self.tracker.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_recommendations_are_scored_once_and_cached(self):
+        """Test the page is rendered from scored results and repeat visits hit the cache."""
+        # Arrange
+        expected = self.manager.get_engine().get_hybrid_recommendations("user1", top_n=3, collab_weight=0.7)
+
+        # Act
+        status, headers, body = asyncio.run(call(self.app, 'GET', '/recommendations', b'user_id=user1'))
+        asyncio.run(call(self.app, 'GET', '/recommendations', b'user_id=user1'))
+
+        # Assert
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'], b'text/html; charset=utf-8')
+        self.assertEqual(body.decode('utf-8'), "Alice: " + ",".join(expected))
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_head_request_sends_headers_only(self):
+        """Test HEAD answers with the GET status and headers but no body."""
+        # Arrange
+        _, get_headers, get_body = asyncio.run(call(self.app, 'GET', '/api/recommendations/user1'))
+
+        # Act
+        status, headers, body = asyncio.run(call(self.app, 'HEAD', '/api/recommendations/user1'))
+
+        # Assert
+        self.assertEqual(status, 200)
+        self.assertEqual(headers, get_headers)
+        self.assertEqual(headers[b'content-length'], str(len(get_body)).encode())
+        self.assertEqual(body, b'')
+
+    def test_page_results_computed_across_an_invalidation_are_not_cached(self):
+        """Test a page scored while the user interacts is served but not cached."""
+        # Arrange
+        engine = self.manager.get_engine()
+        score = engine.get_recommendations
+
+        def score_while_tracking(*args):
+            self.tracker.track_interaction("user1", "prod3", "view")
+            return score(*args)
+
+        engine.get_recommendations = score_while_tracking
+
+        # Act
+        status, _, _ = asyncio.run(call(self.app, 'GET', '/recommendations', b'user_id=user1'))
+
+        # Assert
+        self.assertEqual(status, 200)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_unknown_user_redirects_to_index(self):
+        """Test an unknown user is redirected to the home page."""
+        # Act
+        status, headers, _ = asyncio.run(call(self.app, 'GET', '/recommendations', b'user_id=nobody'))
+
+        # Assert
+        self.assertEqual(status, 302)
+        self.assertEqual(headers[b'location'], b'/')
+
+    def test_json_recommendations(self):
+        """Test the JSON API returns the chosen strategy with projected products."""
+        # Arrange
+        expected = self.manager.get_engine().get_collaborative_recommendations("user2", top_n=2)
+
+        # Act
+        status, headers, body = asyncio.run(call(self.app, 'GET', '/api/recommendations/user2',
+                                                 b'top_n=2&strategy=collab&fields=name'))
+        bad_strategy = asyncio.run(call(self.app, 'GET', '/api/recommendations/user2', b'strategy=popular'))
+        unknown_user = asyncio.run(call(self.app, 'GET', '/api/recommendations/nobody'))
+
+        # Assert
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'], b'application/json')
+        response = json.loads(body)
+        self.assertEqual([product['id'] for product in response['recommendations']], expected)
+        self.assertEqual(set(response['recommendations'][0]), {'id', 'name'})
+        self.assertEqual(bad_strategy[0], 400)
+        self.assertEqual(unknown_user[0], 404)
+
+    def test_tracked_interaction_appears_in_history(self):
+        """Test an interaction tracked through the API is returned newest first."""
+        # Arrange
+        event = {"user_id": "user1", "product_id": "prod3", "type": "rating", "value": 5}
+
+        async def track_then_read():
+            tracked = await call(self.app, 'POST', '/api/track_interaction', body=json.dumps(event).encode())
+            history = await call(self.app, 'GET', '/api/user_interactions/user1', b'limit=1')
+            return tracked, history
+
+        # Act
+        (track_status, _, track_body), (status, _, body) = asyncio.run(track_then_read())
+
+        # Assert
+        self.assertEqual(track_status, 200)
+        self.assertEqual(json.loads(track_body), {'success': True})
+        page = json.loads(body)
+        self.assertEqual(status, 200)
+        self.assertEqual(len(page['interactions']), 1)
+        self.assertEqual(page['interactions'][0]['product_id'], "prod3")
+        self.assertEqual(page['interactions'][0]['product_name'], "Console")
+        self.assertIsNotNone(page['next_cursor'])
+
+    def test_invalid_requests_are_rejected(self):
+        """Test malformed bodies, unknown paths and wrong methods get error responses."""
+        # Act
+        missing = asyncio.run(call(self.app, 'POST', '/api/track_interaction', body=b'{"user_id": "user1"}'))
+        not_json = asyncio.run(call(self.app, 'POST', '/api/track_interaction', body=b'not json'))
+        not_found = asyncio.run(call(self.app, 'GET', '/nothing'))
+        wrong_method = asyncio.run(call(self.app, 'GET', '/api/track_interaction'))
+        bad_cursor = asyncio.run(call(self.app, 'GET', '/api/user_interactions/user1', b'cursor=bad'))
+
+        # Assert
+        self.assertEqual(json.loads(missing[2])['error'], 'Missing required fields')
+        self.assertEqual(json.loads(not_json[2])['error'], 'Missing required fields')
+        self.assertEqual(not_found[0], 404)
+        self.assertEqual(wrong_method[0], 405)
+        self.assertEqual(wrong_method[1][b'allow'], b'POST')
+        self.assertEqual(bad_cursor[0], 400)
+
+    def test_full_pool_answers_busy(self):
+        """Test requests are refused with 503 while the tracking pool is full."""
+        # Arrange
+        app = AsyncApp(self.data_processor, self.manager, self.tracker, self.cache, render_stub,
+                       io_workers=1, max_pending=1)
+        release = threading.Event()
+        app.io.executor.submit(release.wait)
+        event = json.dumps({"user_id": "user1", "product_id": "prod1", "type": "view"}).encode()
+
+        async def two_requests():
+            first = asyncio.ensure_future(call(app, 'POST', '/api/track_interaction', body=event))
+            await asyncio.sleep(0.05)
+            second = await call(app, 'POST', '/api/track_interaction', body=event)
+            release.set()
+            return await first, second
+
+        # Act
+        first, second = asyncio.run(two_requests())
+        app.scoring.shutdown()
+        app.io.shutdown()
+
+        # Assert
+        self.assertEqual(first[0], 200)
+        self.assertEqual(second[0], 503)
+        self.assertEqual(second[1][b'retry-after'], b'1')
+
+if __name__ == '__main__':
+    unittest.main()
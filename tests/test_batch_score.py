@@ -0,0 +1,84 @@
+"""
+Test suite for the batch scoring module.
+
+This module tests that sharded offline scoring matches the single-user
+recommendations and resumes from completed shards.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import shutil
+import unittest
+import tempfile
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from batch_score import read_batch_results, run_batch_scoring, shard_path
+from data_processor import DataProcessor
+from model_manager import ModelManager
+from test_recommendation import make_sample_data
+
+class TestBatchScore(unittest.TestCase):
+    """Test cases for offline batch scoring."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.model_dir = os.path.join(self.temp_dir, 'model')
+        self.output_dir = os.path.join(self.temp_dir, 'batch')
+        data_path = os.path.join(self.temp_dir, 'data.json')
+        
+        with open(data_path, 'w', encoding='utf-8') as f:
+            json.dump(make_sample_data(), f)
+        
+        data_processor = DataProcessor(data_path)
+        data_processor.load_data()
+        self.manager = ModelManager(data_processor, retrain_interval=None, retrain_after=None,
+                                    model_dir=self.model_dir)
+        self.manager.train()
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_results_match_single_user_recommendations(self):
+        """Test sharded results equal the engine's per-user recommendations."""
+        # Arrange
+        engine = self.manager.get_engine()
+        
+        # Act
+        summary = run_batch_scoring(self.model_dir, self.output_dir, top_n=2, workers=2, shard_size=2)
+        results = list(read_batch_results(self.output_dir))
+        
+        # Assert
+        self.assertEqual(summary['shards'], 2)
+        self.assertEqual(summary['users'], 3)
+        self.assertEqual(results, [
+            (user_id, engine.get_collaborative_recommendations(user_id, top_n=2))
+            for user_id in engine.user_indices
+        ])
+    
+    def test_resume_skips_completed_shards(self):
+        """Test a rerun only scores shards without a done marker."""
+        # Arrange
+        run_batch_scoring(self.model_dir, self.output_dir, top_n=2, workers=1, shard_size=1)
+        expected = list(read_batch_results(self.output_dir))
+        os.unlink(shard_path(self.output_dir, 1, 'done'))
+        
+        # Act
+        summary = run_batch_scoring(self.model_dir, self.output_dir, top_n=2, workers=1, shard_size=1)
+        
+        # Assert
+        self.assertEqual(summary['shards'], 1)
+        self.assertEqual(summary['skipped'], 2)
+        self.assertEqual(list(read_batch_results(self.output_dir)), expected)
+        with self.assertRaises(ValueError):
+            run_batch_scoring(self.model_dir, self.output_dir, top_n=5, workers=1, shard_size=1)
+
+if __name__ == '__main__':
+    unittest.main()
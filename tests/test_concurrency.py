@@ -0,0 +1,178 @@
+"""
+Test suite for concurrent use of the engine and the tracker.
+
+This module stresses the shared interaction store, the user tracker and the
+served model with many writer and reader threads at once.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import unittest
+import tempfile
+import threading
+import numpy as np
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from data_processor import DataProcessor
+from interaction_store import InteractionStore
+from model_manager import ModelManager
+from test_recommendation import make_sample_data
+from user_tracker import UserTracker
+
+WRITERS = 8
+READERS = 4
+EVENTS_PER_WRITER = 150
+
+class TestConcurrency(unittest.TestCase):
+    """Stress tests for threaded request handling."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.data_path = os.path.join(self.temp_dir, 'data.json')
+        with open(self.data_path, 'w', encoding='utf-8') as f:
+            json.dump(make_sample_data(), f)
+
+        self.store = InteractionStore()
+        self.data_processor = DataProcessor(self.data_path, interaction_store=self.store)
+        self.data_processor.load_data()
+        self.tracker = UserTracker(self.data_path, log_path=os.path.join(self.temp_dir, 'interactions.log'),
+                                   interaction_store=self.store)
+        self.manager = ModelManager(self.data_processor, retrain_interval=None, retrain_after=None)
+        self.manager.train()
+        self.tracker.add_listener(self.manager.on_stored_interaction)
+
+    def tearDown(self):
+        """Clean up after each test."""
+        self.tracker.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_many_threads_track_and_recommend(self):
+        """Test writers and readers in parallel keep store, log, listeners and model consistent."""
+        # Arrange
+        users = ["user1", "user2", "user3", "user4", "new1", "new2"]
+        products = list(self.data_processor.product_data)
+        initial_events = len(self.store)
+        notified = {}
+        notified_lock = threading.Lock()
+
+        def record_notification(user_id, interaction, version):
+            # Called under the user's stripe, so per-user order is the store order
+            with notified_lock:
+                notified.setdefault(user_id, []).append(interaction['timestamp'])
+
+        self.tracker.add_listener(record_notification)
+        errors = []
+        writers_done = threading.Event()
+
+        def writer(seed):
+            rng = random.Random(seed)
+            try:
+                for i in range(EVENTS_PER_WRITER):
+                    user_id = rng.choice(users)
+                    product_id = rng.choice(products)
+                    if i % 10 == 0:
+                        self.tracker.track_interactions([
+                            {"user_id": rng.choice(users), "product_id": rng.choice(products),
+                             "type": "rating", "value": rng.randint(0, 5)}
+                            for _ in range(3)
+                        ])
+                    else:
+                        self.tracker.track_interaction(user_id, product_id, "rating", rng.randint(0, 5))
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        def reader(seed):
+            rng = random.Random(seed)
+            try:
+                while not writers_done.is_set():
+                    engine = self.manager.get_engine()
+                    user_id = rng.choice(users)
+                    engine.get_hybrid_recommendations(user_id, top_n=3)
+                    list(engine.recommend_batch(users, top_n=2))
+                    self.tracker.get_user_interactions(user_id, limit=5)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        writer_threads = [threading.Thread(target=writer, args=(seed,)) for seed in range(WRITERS)]
+        reader_threads = [threading.Thread(target=reader, args=(100 + seed,)) for seed in range(READERS)]
+
+        # Act
+        for thread in reader_threads + writer_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        writers_done.set()
+        for thread in reader_threads:
+            thread.join()
+
+        # Assert
+        self.assertEqual(errors, [])
+        batches = EVENTS_PER_WRITER // 10
+        tracked = WRITERS * (EVENTS_PER_WRITER - batches + batches * 3)
+        self.assertEqual(len(self.store), initial_events + tracked)
+        self.assertEqual(len(list(self.tracker.event_log.replay())), tracked)
+
+        users_column = self.store.column('user')
+        for user_id, timestamps in notified.items():
+            rows = np.flatnonzero(users_column == self.store.users.get(user_id))[-len(timestamps):]
+            self.assertEqual([self.store.record(row)['timestamp'] for row in rows.tolist()], timestamps)
+
+        # Every write was matched to its notification, so the live model
+        # kept up and agrees with the data without another rebuild; readers
+        # landing between a write and its notification may have rebuilt
+        engine = self.manager.get_engine()
+        state = engine.state
+        self.assertEqual(state.data_version, self.data_processor.version)
+        for user_id in users:
+            indices, ratings = engine._user_row(state.user_index[user_id], state)
+            expected = self.data_processor.get_user_rating_row(user_id)
+            self.assertEqual(dict(zip(indices.tolist(), ratings.tolist())),
+                             dict(zip(expected.indices.tolist(), expected.data.tolist())))
+
+    def test_concurrent_writers_never_force_a_rebuild(self):
+        """Test writes of different users notified in any order keep the live model in sync."""
+        # Arrange
+        users = ["user1", "user2", "user3", "user4", "new1", "new2"]
+        products = list(self.data_processor.product_data)
+        engine = self.manager.get_engine()
+        trained_matrix = engine.interaction_matrix
+
+        def writer(seed):
+            rng = random.Random(seed)
+            for i in range(EVENTS_PER_WRITER):
+                if i % 10 == 0:
+                    self.tracker.track_interactions([
+                        {"user_id": rng.choice(users), "product_id": rng.choice(products),
+                         "type": "rating", "value": rng.randint(0, 5)}
+                        for _ in range(3)
+                    ])
+                else:
+                    self.tracker.track_interaction(rng.choice(users), rng.choice(products),
+                                                   "rating", rng.randint(0, 5))
+
+        threads = [threading.Thread(target=writer, args=(seed,)) for seed in range(WRITERS)]
+
+        # Act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        self.assertIs(self.manager.get_engine(), engine)
+        self.assertEqual(engine.data_version, self.data_processor.version)
+        engine.get_hybrid_recommendations("user1", top_n=3)
+        self.assertEqual(engine.interaction_rebuilds, 0)
+        self.assertIs(engine.interaction_matrix, trained_matrix)
+
+if __name__ == '__main__':
+    unittest.main()
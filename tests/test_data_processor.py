@@ -14,6 +14,7 @@ import json
 import unittest
 import tempfile
 import numpy as np
+import scipy.sparse as sp
 
 # Add the src directory to the Python path
 src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -155,6 +156,26 @@ class TestDataProcessor(unittest.TestCase):
         prod2_idx = product_ids.index("prod2")
         self.assertEqual(matrix[user1_idx, prod2_idx], 4.0)  # user1's rating for prod2
     
+    def test_get_user_interaction_matrix_sparse(self):
+        """Test that the sparse interaction matrix matches the dense one."""
+        # Arrange
+        self.data_processor.load_data()
+        self.data_processor.user_interactions["user1"].append(
+            {"product_id": "prod2", "type": "rating", "rating": 2}
+        )
+        
+        # Act
+        dense, dense_users, dense_products = self.data_processor.get_user_interaction_matrix()
+        matrix, user_ids, product_ids = self.data_processor.get_user_interaction_matrix(sparse=True)
+        
+        # Assert
+        self.assertTrue(sp.isspmatrix_csr(matrix) or isinstance(matrix, sp.csr_array))
+        self.assertEqual(user_ids, dense_users)
+        self.assertEqual(product_ids, dense_products)
+        np.testing.assert_array_equal(matrix.toarray(), dense)
+        self.assertEqual(matrix.nnz, 2)  # zero ratings are not stored
+        self.assertEqual(matrix[user_ids.index("user1"), product_ids.index("prod2")], 2.0)
+    
     def test_get_user_product_features(self):
         """Test getting combined features for a user and products."""
         # Arrange
@@ -177,6 +198,48 @@ class TestDataProcessor(unittest.TestCase):
         self.assertEqual(prod1_features[-1], 0.0)  # Rating 0 for prod1
         self.assertEqual(features["prod2"][-1], 4.0)  # Rating 4 for prod2
     
+    def test_get_product_feature_matrix(self):
+        """Test product features are one-hot categories and scaled numbers."""
+        # Arrange
+        self.data_processor.load_data()
+        
+        # Act
+        features, product_ids, category_index = self.data_processor.get_product_feature_matrix()
+        mask = self.data_processor.get_user_preference_mask("user1")
+        ratings = self.data_processor.get_user_rating_row("user1")
+        
+        # Assert
+        self.assertEqual(product_ids, ["prod1", "prod2", "prod3"])
+        self.assertEqual(category_index, {"electronics": 0, "books": 1, "fashion": 2})
+        np.testing.assert_array_equal(features[:, :3], np.eye(3))
+        np.testing.assert_allclose(features[:, 3], [1.0, 0.0, 0.375])  # price, min-max scaled
+        np.testing.assert_allclose(features[:, 4], [0.9, 0.8, 0.96])  # avg_rating / 5
+        np.testing.assert_array_equal(mask, [True, True, False])
+        self.assertIsNone(self.data_processor.get_user_preference_mask("unknown"))
+        np.testing.assert_array_equal(ratings.toarray(), [[0.0, 4.0, 0.0]])
+        self.assertIs(self.data_processor.get_product_feature_matrix()[0], features)
+    
+    def test_get_catalog_page(self):
+        """Test the catalog is paged in order and filtered by category."""
+        # Arrange
+        self.data_processor.load_data()
+        
+        # Act
+        first, total = self.data_processor.get_catalog_page(page=1, page_size=2)
+        last, _ = self.data_processor.get_catalog_page(page=2, page_size=2)
+        books, books_total = self.data_processor.get_catalog_page(page_size=2, category="books")
+        none, none_total = self.data_processor.get_catalog_page(category="garden")
+        
+        # Assert
+        self.assertEqual(total, 3)
+        self.assertEqual([product['id'] for product in first], ["prod1", "prod2"])
+        self.assertEqual(last, [dict(self.sample_data["products"]["prod3"], id="prod3")])
+        self.assertEqual([product['id'] for product in books], ["prod2"])
+        self.assertEqual(books_total, 1)
+        self.assertEqual((none, none_total), ([], 0))
+        self.assertEqual(self.data_processor.get_categories(), ["electronics", "books", "fashion"])
+        self.assertNotIn('id', self.data_processor.product_data["prod1"])
+    
     def test_validate_data_integrity(self):
         """Test data integrity validation."""
         # Arrange
@@ -202,6 +265,90 @@ class TestDataProcessor(unittest.TestCase):
         # Assert
         self.assertFalse(result)
         self.assertIn("non-existent product", self.data_processor.last_error)
+    
+    def test_validate_data_integrity_missing_product_id(self):
+        """Test interactions dropped for lacking a product_id fail validation, also after a snapshot."""
+        # Arrange
+        self.sample_data["users"]["user1"]["interactions"].append({"type": "view"})
+        with open(self.temp_data_file.name, 'w', encoding='utf-8') as f:
+            json.dump(self.sample_data, f)
+        self.data_processor.load_data()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshot_dir = os.path.join(temp_dir, 'snapshot')
+            self.data_processor.save_snapshot(snapshot_dir)
+            restored = DataProcessor(self.temp_data_file.name)
+            restored.load_snapshot(snapshot_dir)
+            
+            # Act
+            result = self.data_processor.validate_data_integrity()
+            restored_result = restored.validate_data_integrity()
+        
+        # Assert
+        self.assertFalse(result)
+        self.assertFalse(restored_result)
+        self.assertIn("Missing product_id in 1 interaction", self.data_processor.last_error)
+    
+    def test_snapshot_round_trip(self):
+        """Test a snapshot reloads the same data until the data file changes."""
+        # Arrange
+        self.data_processor.load_data()
+        expected_matrix, expected_users, _ = self.data_processor.get_user_interaction_matrix()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshot_dir = os.path.join(temp_dir, 'snapshot')
+            
+            # Act
+            saved = self.data_processor.save_snapshot(snapshot_dir)
+            restored = DataProcessor(self.temp_data_file.name)
+            loaded = restored.load_snapshot(snapshot_dir)
+            matrix, user_ids, _ = restored.get_user_interaction_matrix()
+            restored.user_interactions["user2"].append({"product_id": "prod1", "type": "view"})
+            
+            self.sample_data["products"]["prod1"]["price"] = 89.99
+            with open(self.temp_data_file.name, 'w', encoding='utf-8') as f:
+                json.dump(self.sample_data, f)
+            stale = DataProcessor(self.temp_data_file.name).load_snapshot(snapshot_dir)
+        
+        # Assert
+        self.assertTrue(saved)
+        self.assertTrue(loaded)
+        self.assertEqual(restored.product_data, self.data_processor.product_data)
+        self.assertEqual(restored.user_features, self.data_processor.user_features)
+        self.assertEqual(dict(restored.user_interactions), {
+            "user1": self.sample_data["users"]["user1"]["interactions"],
+            "user2": self.sample_data["users"]["user2"]["interactions"] + [{"product_id": "prod1", "type": "view"}]
+        })
+        self.assertEqual(user_ids, expected_users)
+        np.testing.assert_array_equal(matrix, expected_matrix)
+        self.assertFalse(stale)
+    
+    def test_snapshot_keeps_mixed_and_large_ints(self):
+        """Test a snapshot reloads mixed int/float and beyond-int64 fields as parsed."""
+        # Arrange
+        self.sample_data["products"]["prod1"]["price"] = 100
+        self.sample_data["products"]["prod2"]["price"] = 89.99
+        self.sample_data["products"]["prod1"]["sku"] = 2 ** 70
+        self.sample_data["products"]["prod2"]["sku"] = 7
+        with open(self.temp_data_file.name, 'w', encoding='utf-8') as f:
+            json.dump(self.sample_data, f)
+        self.data_processor.load_data()
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshot_dir = os.path.join(temp_dir, 'snapshot')
+            
+            # Act
+            saved = self.data_processor.save_snapshot(snapshot_dir)
+            restored = DataProcessor(self.temp_data_file.name)
+            loaded = restored.load_snapshot(snapshot_dir)
+        
+        # Assert
+        self.assertTrue(saved)
+        self.assertTrue(loaded)
+        self.assertEqual(restored.product_data, self.data_processor.product_data)
+        self.assertIs(type(restored.product_data["prod1"]["price"]), int)
+        self.assertIs(type(restored.product_data["prod2"]["price"]), float)
+        self.assertEqual(restored.product_data["prod1"]["sku"], 2 ** 70)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
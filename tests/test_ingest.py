@@ -0,0 +1,114 @@
+"""
+Test suite for the batched ingestion module.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import shutil
+import unittest
+import tempfile
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from ingest import IngestQueue, validate_event
+from user_tracker import UserTracker
+
+class TestValidateEvent(unittest.TestCase):
+    """Test cases for event validation."""
+    
+    def test_valid_event(self):
+        """Test a valid event is normalized and timestamped."""
+        event, error = validate_event({"user_id": "user1", "product_id": "prod1", "type": "rating", "value": 4})
+        self.assertIsNone(error)
+        self.assertEqual(event["value"], 4)
+        self.assertIn("timestamp", event)
+    
+    def test_invalid_events(self):
+        """Test malformed events are rejected with a reason."""
+        invalid = [
+            "not an object",
+            {"product_id": "prod1", "type": "view"},
+            {"user_id": "user1", "product_id": "", "type": "view"},
+            {"user_id": "user1", "product_id": "prod1", "type": "view", "value": "high"},
+            {"user_id": "user1", "product_id": "prod1", "type": "rating"},
+            {"user_id": "user1", "product_id": "prod1", "type": "rating", "value": float("inf")},
+            json.loads('{"user_id": "user1", "product_id": "prod1", "type": "rating", "value": NaN}'),
+            {"user_id": "u" * 1000, "product_id": "prod1", "type": "view"}
+        ]
+        for event in invalid:
+            normalized, error = validate_event(event)
+            self.assertIsNone(normalized)
+            self.assertIsNotNone(error)
+
+class TestIngestQueue(unittest.TestCase):
+    """Test cases for the IngestQueue class."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.temp_dir, 'interactions.log')
+        self.tracker = UserTracker(os.path.join(self.temp_dir, 'data.json'), log_path=self.log_path)
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        self.tracker.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def make_events(self, count, user_id="user1"):
+        return [validate_event({"user_id": user_id, "product_id": f"prod{i}", "type": "view"})[0] for i in range(count)]
+    
+    def test_submit_applies_backpressure(self):
+        """Test events beyond the queue capacity are rejected."""
+        # Arrange
+        queue = IngestQueue(self.tracker, max_size=5)
+        
+        # Act
+        first = queue.submit(self.make_events(3))
+        second = queue.submit(self.make_events(4))
+        
+        # Assert
+        self.assertEqual((first, second), (3, 2))
+        self.assertEqual(queue.qsize(), 5)
+        self.assertEqual(queue.rejected, 2)
+    
+    def test_drain_writes_in_groups(self):
+        """Test queued events are written to the tracker in batches."""
+        # Arrange
+        batches = []
+        queue = IngestQueue(self.tracker, batch_size=4, on_batch=batches.append)
+        queue.submit(self.make_events(10))
+        
+        # Act
+        written = queue.drain()
+        
+        # Assert
+        self.assertEqual(written, 10)
+        self.assertEqual(batches, [4, 4, 2])
+        self.assertEqual(len(self.tracker.user_interactions["user1"]), 10)
+    
+    def test_background_writer(self):
+        """Test the writer thread persists submitted events to the log."""
+        # Arrange
+        queue = IngestQueue(self.tracker, flush_interval=0.01)
+        queue.start()
+        
+        # Act
+        queue.submit(self.make_events(50, "user1"))
+        queue.submit(self.make_events(50, "user2"))
+        queue.stop(timeout=5)
+        self.tracker.close()
+        
+        # Assert
+        self.assertEqual(queue.written, 100)
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            events = [json.loads(line) for line in f]
+        self.assertEqual(len(events), 100)
+        self.assertEqual(events[0]["timestamp"], self.tracker.user_interactions["user1"][0]["timestamp"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Test suite for the InteractionStore module.
+
+This module tests the compact columnar storage of interactions.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import unittest
+import tempfile
+import numpy as np
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from interaction_store import InteractionStore, load_interaction_store
+from test_recommendation import make_sample_data
+
+class TestInteractionStore(unittest.TestCase):
+    """Test cases for the InteractionStore class."""
+    
+    def test_records_round_trip(self):
+        """Test stored events rebuild the original interaction records."""
+        # Arrange
+        store = InteractionStore(capacity=1)
+        interactions = [
+            {"product_id": "prod1", "type": "rating", "timestamp": "2025-04-01T10:30:15.123456", "value": 4, "rating": 4.0},
+            {"product_id": "prod2", "type": "view", "timestamp": "2025-04-01T11:20:30"},
+            {"product_id": "prod1", "type": "purchase", "value": 19.99, "product_name": "Novel"}
+        ]
+        
+        # Act
+        versions = [store.append_interaction("user1", interaction) for interaction in interactions]
+        
+        # Assert
+        self.assertEqual(versions, [1, 2, 3])
+        self.assertEqual(store.record(0), interactions[0])
+        self.assertEqual(store.record(1), interactions[1])
+        self.assertEqual(store.record(2), {"product_id": "prod1", "type": "purchase", "value": 19.99})
+        self.assertEqual(store.column("product").tolist(), [0, 1, 0])
+        self.assertEqual(list(store.products), ["prod1", "prod2"])
+        self.assertTrue(np.isnan(store.column("rating")[1]))
+        self.assertIsNone(store.append_interaction("user1", {"type": "view"}))
+    
+    def test_timestamps_keep_their_utc_offset(self):
+        """Test timezone-aware timestamps come back with their offset and naive ones stay naive."""
+        # Arrange
+        store = InteractionStore()
+        timestamps = ["2025-05-01T10:00:00Z", "2025-05-01T10:00:00.5+05:30", "2025-05-01T10:00:00"]
+        
+        # Act
+        for timestamp in timestamps:
+            store.append_interaction("user1", {"product_id": "prod1", "type": "view", "timestamp": timestamp})
+        store.extend_interactions("user2", [{"product_id": "prod2", "type": "view", "timestamp": timestamps[0]}])
+        
+        # Assert
+        self.assertEqual([store.record(row)["timestamp"] for row in range(4)], [
+            "2025-05-01T10:00:00+00:00", "2025-05-01T10:00:00.500000+05:30",
+            "2025-05-01T10:00:00", "2025-05-01T10:00:00+00:00"
+        ])
+    
+    def test_load_interaction_store(self):
+        """Test a data file is streamed into the store in file order."""
+        # Arrange
+        data = make_sample_data()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'data.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            
+            # Act
+            store = load_interaction_store(path, chunk_size=16)
+        
+        # Assert
+        expected = [(user_id, i) for user_id, user in data["users"].items() for i in user["interactions"]]
+        self.assertEqual(len(store), len(expected))
+        for row, (user_id, interaction) in enumerate(expected):
+            self.assertEqual(store.users[store.column("user")[row]], user_id)
+            self.assertEqual(store.record(row), interaction)
+    
+    def test_user_rows_and_matrix_export(self):
+        """Test per-user slicing and the matrix export after further appends."""
+        # Arrange
+        store = InteractionStore()
+        store.append("user1", "prod1", "rating", rating=2)
+        store.append("user2", "prod2", "rating", rating=4)
+        store.user_rows("user1")  # Builds the index
+        store.append("user1", "prod1", "rating", rating=5)
+        store.append("user1", "prod9", "rating", rating=3)
+        store.append("user2", "prod2", "rating", rating=0)
+        store.append("user3", "prod1", "view")
+        
+        # Act
+        rows = store.user_rows("user1")
+        matrix = store.to_csr(["prod1", "prod2"])
+        
+        # Assert
+        self.assertEqual(rows.tolist(), [0, 2, 3])
+        self.assertEqual(store.user_rows("unknown").tolist(), [])
+        self.assertEqual(matrix.shape, (3, 2))
+        self.assertEqual(matrix.toarray().tolist(), [[5.0, 0.0], [0.0, 0.0], [0.0, 0.0]])
+        self.assertEqual(matrix.nnz, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+"""
+Test suite for the metrics module.
+
+This module tests histogram accuracy, the timed decorator, the
+Prometheus text rendering and merging the metrics of several processes.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import random
+import shutil
+import unittest
+import tempfile
+import subprocess
+from unittest import mock
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+import metrics
+from metrics import Histogram, MetricsExporter, Registry, bucket_bounds, bucket_index, timed
+
+class TestHistogram(unittest.TestCase):
+    """Test cases for the Histogram class."""
+
+    def test_buckets_hold_values_within_relative_precision(self):
+        """Test every value falls in its bucket and buckets are at most 1/16 wide."""
+        # Arrange
+        rng = random.Random(0)
+        values = list(range(1000)) + [rng.randrange(1 << 44) for _ in range(10000)]
+
+        for value in values:
+            # Act
+            low, high = bucket_bounds(bucket_index(value))
+
+            # Assert
+            self.assertLessEqual(low, value)
+            self.assertLess(value, high)
+            self.assertLessEqual(high - low, max(1, low / 16))
+
+    def test_percentiles(self):
+        """Test percentiles are reported to within the bucket precision."""
+        # Arrange
+        histogram = Histogram()
+
+        # Act
+        for value in range(1, 10001):
+            histogram.record_ns(value * 1000)
+
+        # Assert
+        for q, expected in ((50, 5000000), (99, 9900000), (100, 10000000)):
+            self.assertAlmostEqual(histogram.percentile(q), expected, delta=expected / 16)
+        self.assertEqual(Histogram().percentile(50), 0.0)
+
+class TestTimed(unittest.TestCase):
+    """Test cases for the timed decorator."""
+
+    def test_calls_recorded_including_failures(self):
+        """Test successful and failing calls are both recorded."""
+        # Arrange
+        registry = Registry()
+
+        @timed('work', registry=registry)
+        def work(fail=False):
+            if fail:
+                raise ValueError("failed")
+            return 42
+
+        # Act
+        result = work()
+        with self.assertRaises(ValueError):
+            work(fail=True)
+
+        # Assert
+        histogram = registry.histogram(metrics.LATENCY_METRIC, span='work')
+        self.assertEqual(result, 42)
+        self.assertEqual(sum(histogram.counts), 2)
+        self.assertGreater(histogram.sum_ns, 0)
+        self.assertEqual(work.__name__, 'work')
+
+    def test_disabled_returns_function_unchanged(self):
+        """Test instrumentation adds nothing when metrics are disabled."""
+        # Arrange
+        registry = Registry()
+        def work():
+            return 42
+
+        # Act
+        with mock.patch.object(metrics, 'ENABLED', False):
+            instrumented = timed('work', registry=registry)(work)
+
+        # Assert
+        self.assertIs(instrumented, work)
+        self.assertEqual(registry.render(), '\n')
+
+class TestRegistry(unittest.TestCase):
+    """Test cases for the Registry class."""
+
+    def test_render_prometheus_text(self):
+        """Test histograms, counters and gauges render in the text format."""
+        # Arrange
+        registry = Registry()
+        registry.histogram('latency_seconds', 'Latency.', span='a').record_ns(3000)
+        registry.counter('events_total', 'Events.').inc(2)
+        registry.gauge('hit_ratio', 'Hit ratio.', func=lambda: 0.5, cache='results')
+
+        # Act
+        lines = registry.render().splitlines()
+
+        # Assert
+        self.assertIn('# TYPE latency_seconds histogram', lines)
+        self.assertIn('latency_seconds_bucket{le="1e-05",span="a"} 1', lines)
+        self.assertIn('latency_seconds_bucket{le="+Inf",span="a"} 1', lines)
+        self.assertIn('latency_seconds_count{span="a"} 1', lines)
+        self.assertIn('latency_seconds_sum{span="a"} 3e-06', lines)
+        self.assertIn('# HELP events_total Events.', lines)
+        self.assertIn('events_total 2', lines)
+        self.assertIn('hit_ratio{cache="results"} 0.5', lines)
+
+    def test_same_name_with_other_type_rejected(self):
+        """Test a metric name cannot be reused for a different metric type."""
+        # Arrange
+        registry = Registry()
+        registry.counter('events_total')
+
+        # Act / Assert
+        self.assertIs(registry.counter('events_total'), registry.counter('events_total'))
+        with self.assertRaises(ValueError):
+            registry.gauge('events_total')
+
+    def test_reset_keeps_timed_functions_recording(self):
+        """Test a reset forgets recorded values but not the series timed records into."""
+        # Arrange
+        registry = Registry()
+        work = timed('work', registry=registry)(lambda: None)
+        work()
+        registry.counter('events_total').inc(3)
+
+        # Act
+        registry.reset()
+        work()
+
+        # Assert
+        self.assertEqual(sum(registry.histogram(metrics.LATENCY_METRIC, span='work').counts), 1)
+        self.assertEqual(registry.counter('events_total').value, 0)
+
+def make_registry(latency_ns, events, version):
+    """Build a registry with one series of each metric type."""
+    registry = Registry()
+    registry.histogram('latency_seconds', 'Latency.', span='a').record_ns(latency_ns)
+    registry.counter('events_total', 'Events.').inc(events)
+    registry.gauge('model_version', 'Model version.').set(version)
+    return registry
+
+class TestMetricsExporter(unittest.TestCase):
+    """Test cases for the MetricsExporter class."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def publish_as(self, pid, registry):
+        """Write a registry's metrics as if another process had."""
+        with mock.patch('metrics.os.getpid', return_value=pid):
+            MetricsExporter(registry, self.temp_dir).write()
+
+    def test_scrape_merges_every_process(self):
+        """Test histograms and counters are summed and gauges kept per process."""
+        # Arrange
+        exited = subprocess.Popen([sys.executable, '-c', ''])
+        exited.wait()
+        self.publish_as(os.getppid(), make_registry(3000, 3, 7))
+        self.publish_as(exited.pid, make_registry(3000, 4, 6))
+        exporter = MetricsExporter(make_registry(3000, 2, 8), self.temp_dir, interval=60)
+
+        # Act
+        exporter.start()
+        try:
+            lines = exporter.render().splitlines()
+        finally:
+            exporter.stop(timeout=1)
+
+        # Assert
+        self.assertIn('latency_seconds_count{span="a"} 3', lines)
+        self.assertIn('events_total 9', lines)
+        self.assertIn(f'model_version{{pid="{os.getpid()}"}} 8', lines)
+        self.assertIn(f'model_version{{pid="{os.getppid()}"}} 7', lines)
+        self.assertNotIn(f'model_version{{pid="{exited.pid}"}} 6', lines)
+        self.assertEqual(lines.count('# TYPE events_total counter'), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, f"{os.getpid()}.json")))
+
+    def test_single_process_renders_own_registry(self):
+        """Test an exporter that was never started renders only its registry, unlabelled."""
+        # Arrange
+        registry = make_registry(3000, 2, 8)
+        self.publish_as(os.getppid(), make_registry(3000, 3, 7))
+
+        # Act
+        text = MetricsExporter(registry, self.temp_dir).render()
+
+        # Assert
+        self.assertEqual(text, registry.render())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+Test suite for the ModelManager module.
+
+This module tests that models are trained once, retrained in the background
+and published atomically.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import unittest
+import tempfile
+import time
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from data_processor import DataProcessor
+from model_manager import ModelManager
+from test_recommendation import make_sample_data
+from user_tracker import UserTracker
+
+class TestModelManager(unittest.TestCase):
+    """Test cases for the ModelManager class."""
+    
+    def setUp(self):
+        self.temp_data_file = tempfile.NamedTemporaryFile(delete=False, suffix='.json')
+        self.temp_data_file.close()
+        
+        with open(self.temp_data_file.name, 'w', encoding='utf-8') as f:
+            json.dump(make_sample_data(), f)
+        
+        self.data_processor = DataProcessor(self.temp_data_file.name)
+        self.data_processor.load_data()
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        if os.path.exists(self.temp_data_file.name):
+            os.unlink(self.temp_data_file.name)
+    
+    def test_train_publishes_new_model(self):
+        """Test a successful training run publishes a new model version."""
+        # Arrange
+        manager = ModelManager(self.data_processor, retrain_interval=None, retrain_after=None)
+        
+        # Act
+        result = manager.train()
+        
+        # Assert
+        self.assertTrue(result)
+        self.assertIsNotNone(manager.get_engine())
+        self.assertEqual(manager.model_version, 1)
+        self.assertEqual(manager.get_engine().model_version, 1)
+    
+    def test_failed_training_keeps_previous_model(self):
+        """Test a failed retrain keeps serving the last completed model."""
+        # Arrange
+        manager = ModelManager(self.data_processor, retrain_interval=None, retrain_after=None)
+        manager.train()
+        engine = manager.get_engine()
+        self.data_processor.user_interactions.clear()
+        
+        # Act
+        result = manager.train()
+        
+        # Assert
+        self.assertFalse(result)
+        self.assertIs(manager.get_engine(), engine)
+        self.assertIsNotNone(manager.last_error)
+    
+    def test_retrain_after_interactions(self):
+        """Test the background thread retrains after enough interactions."""
+        # Arrange
+        manager = ModelManager(self.data_processor, retrain_interval=None, retrain_after=3)
+        manager.train()
+        manager.start()
+        
+        try:
+            # Act
+            manager.record_interaction(2)
+            manager.record_interaction()
+            for _ in range(200):
+                if manager.model_version == 2:
+                    break
+                time.sleep(0.01)
+        finally:
+            manager.stop(timeout=1)
+        
+        # Assert
+        self.assertEqual(manager.model_version, 2)
+    
+    def test_tracked_interactions_update_live_model(self):
+        """Test tracked ratings reach the served model without a retrain."""
+        # Arrange
+        manager = ModelManager(self.data_processor, retrain_interval=None, retrain_after=None)
+        manager.train()
+        engine = manager.get_engine()
+        trained_matrix = engine.interaction_matrix
+        tracker = UserTracker(interaction_store=self.data_processor.interaction_store)
+        tracker.add_listener(manager.on_stored_interaction)
+        
+        # Act
+        tracker.track_interaction("user1", "prod3", "rating", 5)
+        tracker.track_interactions([{"user_id": "user4", "product_id": "prod1", "type": "rating", "value": 5}])
+        user1_recommendations = engine.get_collaborative_recommendations("user1", top_n=3)
+        user4_recommendations = engine.get_collaborative_recommendations("user4", top_n=2)
+        
+        # Assert
+        self.assertIs(manager.get_engine(), engine)
+        self.assertEqual(manager.model_version, 1)
+        self.assertIs(engine.interaction_matrix, trained_matrix)
+        self.assertEqual(engine.data_version, self.data_processor.version)
+        self.assertEqual(self.data_processor.user_interactions["user1"][-1]["rating"], 5.0)
+        self.assertNotIn("prod3", user1_recommendations)
+        self.assertEqual(sorted(user4_recommendations), ["prod2", "prod3"])
+    
+    def test_live_model_stays_in_sync_after_batch(self):
+        """Test a multi-event batch is matched write by write instead of forcing a rebuild."""
+        # Arrange
+        manager = ModelManager(self.data_processor, retrain_interval=None, retrain_after=None)
+        manager.train()
+        engine = manager.get_engine()
+        trained_matrix = engine.interaction_matrix
+        tracker = UserTracker(interaction_store=self.data_processor.interaction_store)
+        tracker.add_listener(manager.on_stored_interaction)
+        
+        # Act
+        tracker.track_interactions([
+            {"user_id": "user1", "product_id": "prod3", "type": "rating", "value": 5},
+            {"user_id": "user2", "product_id": "prod4", "type": "view"},
+            {"user_id": "user4", "product_id": "prod1", "type": "rating", "value": 5}
+        ])
+        
+        # Assert
+        self.assertEqual(engine.data_version, self.data_processor.version)
+        self.assertIs(engine.interaction_matrix, trained_matrix)
+        self.assertEqual(sorted(engine.get_collaborative_recommendations("user4", top_n=2)), ["prod2", "prod3"])
+    
+    def test_out_of_order_writes_keep_live_model_in_sync(self):
+        """Test writes notified out of order are matched once the earlier one arrives."""
+        # Arrange
+        manager = ModelManager(self.data_processor, retrain_interval=None, retrain_after=None)
+        manager.train()
+        engine = manager.get_engine()
+        store = self.data_processor.interaction_store
+        first = store.append_interaction("user1", {"product_id": "prod3", "type": "rating", "rating": 5.0})
+        second = store.append_interaction("user2", {"product_id": "prod1", "type": "rating", "rating": 2.0})
+        
+        # Act
+        manager.on_stored_interaction("user2", {"product_id": "prod1", "type": "rating", "rating": 2.0}, second)
+        ahead_version = engine.data_version
+        manager.on_stored_interaction("user1", {"product_id": "prod3", "type": "rating", "rating": 5.0}, first)
+        
+        # Assert
+        self.assertEqual(ahead_version, self.data_processor.version - 2)
+        self.assertEqual(engine.data_version, self.data_processor.version)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+"""
+Test suite for the ModelStore module.
+
+This module tests saving trained models to disk and loading them back as
+memory-mapped arrays.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import shutil
+import unittest
+import tempfile
+import numpy as np
+from unittest import mock
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from data_processor import DataProcessor
+from model_manager import ModelManager
+from model_store import ModelStoreError, get_current_version, load_model, pin_version, save_model, verify_model
+from recommendation import RecommendationEngine
+from test_recommendation import make_sample_data
+
+class TestModelStore(unittest.TestCase):
+    """Test cases for saving and loading models."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.data_path = os.path.join(self.temp_dir, 'data.json')
+        self.model_dir = os.path.join(self.temp_dir, 'model')
+        
+        with open(self.data_path, 'w', encoding='utf-8') as f:
+            json.dump(make_sample_data(), f)
+        
+        self.data_processor = DataProcessor(self.data_path)
+        self.data_processor.load_data()
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def assert_same_recommendations(self, expected_engine, engine):
+        for user_id in ("user1", "user2", "user3"):
+            self.assertEqual(
+                engine.get_collaborative_recommendations(user_id, top_n=3),
+                expected_engine.get_collaborative_recommendations(user_id, top_n=3)
+            )
+    
+    def test_save_and_load_dense_model(self):
+        """Test a dense model round-trips through memory-mapped files."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        engine.model_version = 3
+        
+        # Act
+        save_model(engine, self.model_dir)
+        loaded = load_model(self.model_dir, self.data_processor, verify=True)
+        
+        # Assert
+        self.assertIsInstance(loaded.similarity_matrix, np.memmap)
+        self.assertEqual(loaded.model_version, 3)
+        self.assertEqual(loaded.product_indices, engine.product_indices)
+        np.testing.assert_array_equal(loaded.similarity_matrix, engine.similarity_matrix)
+        self.assert_same_recommendations(engine, loaded)
+    
+    def test_save_and_load_neighbour_model(self):
+        """Test a sparse neighbour model round-trips without copying its arrays."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor, n_neighbors=2)
+        engine.train_collaborative_filter()
+        
+        # Act
+        save_model(engine, self.model_dir)
+        loaded = load_model(self.model_dir, self.data_processor)
+        
+        # Assert
+        self.assertFalse(loaded.similarity_matrix.data.flags.writeable)  # read-only file mapping
+        self.assertEqual((loaded.similarity_matrix != engine.similarity_matrix).nnz, 0)
+        self.assert_same_recommendations(engine, loaded)
+    
+    def test_verify_detects_corruption(self):
+        """Test checksum verification rejects a modified file."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        version_dir = save_model(engine, self.model_dir)
+        with open(os.path.join(version_dir, 'product_ids.json'), 'w') as f:
+            f.write('["tampered"]')
+        
+        # Act / Assert
+        with self.assertRaises(ModelStoreError):
+            verify_model(version_dir)
+        with self.assertRaises(ModelStoreError):
+            load_model(self.model_dir, self.data_processor, verify=True)
+    
+    def test_load_without_saved_model(self):
+        """Test loading from an empty directory raises ModelStoreError."""
+        with self.assertRaises(ModelStoreError):
+            load_model(self.model_dir, self.data_processor)
+    
+    def test_old_versions_are_pruned(self):
+        """Test only the most recent versions are kept and CURRENT points at the newest."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        
+        # Act
+        for version in range(1, 4):
+            engine.model_version = version
+            latest = save_model(engine, self.model_dir, keep=2)
+        
+        # Assert
+        versions = [name for name in os.listdir(self.model_dir) if name.startswith('v')]
+        self.assertEqual(len(versions), 2)
+        self.assertEqual(get_current_version(self.model_dir), os.path.basename(latest))
+    
+    def test_pruning_keeps_latest_saves_when_numbering_restarts(self):
+        """Test versions are pruned by save time even when a new process numbers from 1 again."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        clock = iter(range(1000, 2000))
+        
+        # Act
+        with mock.patch('model_store.time.time', side_effect=lambda: next(clock)):
+            for version in (1, 2, 3, 4, 1, 2, 3):
+                engine.model_version = version
+                latest = save_model(engine, self.model_dir, keep=2)
+        
+        # Assert
+        versions = sorted(name for name in os.listdir(self.model_dir) if name.startswith('v'))
+        self.assertEqual([name.split('-')[0] for name in versions], ['v000002', 'v000003'])
+        self.assertEqual(get_current_version(self.model_dir), os.path.basename(latest))
+    
+    @unittest.skipUnless(hasattr(os, 'fork'), "requires POSIX file locks")
+    def test_pinned_version_is_not_pruned(self):
+        """Test a version in use survives pruning and is removed once released."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        engine.model_version = 1
+        pinned = os.path.basename(save_model(engine, self.model_dir, keep=1))
+        
+        # Act
+        with pin_version(self.model_dir, pinned):
+            engine.model_version = 2
+            save_model(engine, self.model_dir, keep=1)
+            kept = os.path.isdir(os.path.join(self.model_dir, pinned))
+        engine.model_version = 3
+        save_model(engine, self.model_dir, keep=1)
+        
+        # Assert
+        self.assertTrue(kept)
+        self.assertFalse(os.path.exists(os.path.join(self.model_dir, pinned)))
+        with self.assertRaises(ModelStoreError):
+            with pin_version(self.model_dir, pinned):
+                pass
+    
+    def test_model_manager_loads_saved_model(self):
+        """Test a new ModelManager starts from the saved model instead of training."""
+        # Arrange
+        ModelManager(self.data_processor, model_dir=self.model_dir).train()
+        manager = ModelManager(self.data_processor, model_dir=self.model_dir)
+        
+        # Act
+        result = manager.load_or_train()
+        
+        # Assert
+        self.assertTrue(result)
+        self.assertIsNone(manager.last_trained)
+        self.assertEqual(manager.model_version, 1)
+        self.assertIsInstance(manager.get_engine().similarity_matrix, np.memmap)
+
+    def test_data_fingerprint_decides_sync(self):
+        """Test only a model saved with the current data fingerprint counts as in sync."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        fingerprint = {'sha256': 'abc', 'log_bytes': 10}
+        save_model(engine, self.model_dir, data_fingerprint=fingerprint)
+        
+        # Act
+        matching = load_model(self.model_dir, self.data_processor, data_fingerprint=fingerprint)
+        unverified = load_model(self.model_dir, self.data_processor)
+        
+        # Assert
+        self.assertEqual(matching.data_version, self.data_processor.version)
+        self.assertIsNone(unverified.data_version)
+        self.assert_same_recommendations(engine, unverified)
+        with self.assertRaises(ModelStoreError):
+            load_model(self.model_dir, self.data_processor, data_fingerprint=dict(fingerprint, log_bytes=20))
+    
+    def test_load_rejects_changed_catalog(self):
+        """Test a model is not loaded against a catalog with other products."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        save_model(engine, self.model_dir)
+        del self.data_processor.product_data['prod2']
+        
+        # Act / Assert
+        with self.assertRaises(ModelStoreError):
+            load_model(self.model_dir, self.data_processor)
+    
+    def test_model_manager_retrains_when_data_changed(self):
+        """Test a saved model trained from other data is retrained instead of loaded."""
+        # Arrange
+        fingerprint = self.data_processor.source_fingerprint
+        ModelManager(self.data_processor, model_dir=self.model_dir, data_fingerprint=fingerprint).train()
+        with open(self.data_path, 'a', encoding='utf-8') as f:
+            f.write('\n')
+        self.data_processor.load_data()
+        manager = ModelManager(self.data_processor, model_dir=self.model_dir, data_fingerprint=fingerprint)
+        
+        # Act
+        result = manager.load_or_train()
+        
+        # Assert
+        self.assertTrue(result)
+        self.assertIsNotNone(manager.last_trained)
+        self.assertEqual(manager.get_engine().data_version, self.data_processor.version)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Test suite for the PageCache module.
+
+This module tests rendered page reuse, ETags and LRU eviction.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import unittest
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from page_cache import PageCache
+
+class TestPageCache(unittest.TestCase):
+    """Test cases for the PageCache class."""
+
+    def test_page_rendered_once_per_key(self):
+        """Test a page is rendered on the first request and reused after."""
+        # Arrange
+        cache = PageCache()
+        calls = []
+        render = lambda: calls.append(1) or "<p>page 1</p>"
+
+        # Act
+        body, etag = cache.get_or_render((1, None, 1), render)
+        again = cache.get_or_render((1, None, 1), render)
+        other_catalog = cache.get_or_render((2, None, 1), render)
+
+        # Assert
+        self.assertEqual(body, b"<p>page 1</p>")
+        self.assertEqual(again, (body, etag))
+        self.assertEqual(other_catalog[1], etag)  # same content, same ETag
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 2, 'entries': 2})
+
+    def test_etag_follows_content(self):
+        """Test different content gets a different ETag."""
+        # Arrange
+        cache = PageCache()
+
+        # Act
+        _, first = cache.get_or_render(("a",), lambda: "one")
+        _, second = cache.get_or_render(("b",), lambda: "two")
+
+        # Assert
+        self.assertNotEqual(first, second)
+
+    def test_least_recently_used_page_evicted(self):
+        """Test the entry limit evicts the least recently used page."""
+        # Arrange
+        cache = PageCache(max_entries=2)
+        cache.get_or_render((1,), lambda: "one")
+        cache.get_or_render((2,), lambda: "two")
+        cache.get_or_render((1,), lambda: "one")
+
+        # Act
+        cache.get_or_render((3,), lambda: "three")
+        rendered = []
+        cache.get_or_render((2,), lambda: rendered.append(2) or "two")
+
+        # Assert
+        self.assertEqual(rendered, [2])
+        self.assertEqual(len(cache), 2)
+
+if __name__ == '__main__':
+    unittest.main()
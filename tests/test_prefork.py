@@ -0,0 +1,137 @@
+"""
+Test suite for the pre-fork support module.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import unittest
+import tempfile
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from data_processor import DataProcessor
+from model_manager import ModelManager
+from prefork import freeze_engine, prepare_master, process_memory
+from test_recommendation import make_sample_data
+from user_tracker import UserTracker
+
+class TestPrefork(unittest.TestCase):
+    """Test cases for sharing a model across forked workers."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.data_path = os.path.join(self.temp_dir, 'data.json')
+        self.model_dir = os.path.join(self.temp_dir, 'model')
+        
+        with open(self.data_path, 'w', encoding='utf-8') as f:
+            json.dump(make_sample_data(), f)
+        
+        self.data_processor = DataProcessor(self.data_path)
+        self.data_processor.load_data()
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        gc.unfreeze()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_prepare_master_freezes_model(self):
+        """Test the master's model arrays become read-only but still serve requests."""
+        # Arrange
+        manager = ModelManager(self.data_processor, model_dir=self.model_dir)
+        
+        # Act
+        result = prepare_master(manager)
+        engine = manager.get_engine()
+        
+        # Assert
+        self.assertTrue(result)
+        self.assertFalse(engine.similarity_matrix.flags.writeable)
+        self.assertFalse(engine.interaction_matrix.data.flags.writeable)
+        self.assertEqual(len(engine.get_collaborative_recommendations("user1", top_n=2)), 2)
+    
+    def test_freeze_engine_rejects_writes(self):
+        """Test in-place writes to a frozen model raise instead of copying pages."""
+        # Arrange
+        manager = ModelManager(self.data_processor)
+        manager.train()
+        freeze_engine(manager.get_engine())
+        
+        # Act / Assert
+        with self.assertRaises(ValueError):
+            manager.get_engine().similarity_matrix[0, 0] = 0.0
+    
+    def test_follower_loads_new_versions(self):
+        """Test a follower picks up each model version saved by the trainer."""
+        # Arrange
+        trainer = ModelManager(self.data_processor, model_dir=self.model_dir)
+        trainer.train()
+        follower = ModelManager(self.data_processor, model_dir=self.model_dir)
+        follower.load()
+        follower.start_follower(poll_interval=0.01)
+        
+        try:
+            # Act
+            trainer.train()
+            for _ in range(200):
+                if follower.model_version == 2:
+                    break
+                time.sleep(0.01)
+        finally:
+            follower.stop(timeout=1)
+        
+        # Assert
+        self.assertEqual(follower.model_version, 2)
+        self.assertEqual(follower.loaded_version, trainer.loaded_version)
+        self.assertIsNone(follower.get_engine().data_version)  # rebuilt from the follower's own data
+    
+    def test_master_trains_on_events_logged_by_workers(self):
+        """Test the master counts and trains on events another process appended to the log."""
+        # Arrange
+        log_path = os.path.join(self.temp_dir, 'interactions.log')
+        tracker = UserTracker(self.data_path, log_path=log_path,
+                              interaction_store=self.data_processor.interaction_store)
+        tracker.replay_log()
+        manager = ModelManager(self.data_processor, retrain_interval=None, retrain_after=1,
+                               model_dir=self.model_dir)
+        worker = UserTracker(self.data_path, log_path=log_path)
+        worker.load_interactions()
+        
+        # Act
+        prepare_master(manager, tracker, poll_interval=0.01)
+        try:
+            worker.track_interaction("user3", "prod1", "rating", 5)
+            worker.close()
+            for _ in range(200):
+                if manager._retrain_requested.is_set():
+                    break
+                time.sleep(0.01)
+            requested = manager._retrain_requested.is_set()
+            manager.train()
+        finally:
+            manager.stop(timeout=1)
+            tracker.close()
+        
+        # Assert
+        self.assertTrue(requested)
+        engine = manager.get_engine()
+        row = engine.user_index["user3"]
+        self.assertEqual(engine.interaction_matrix[row, engine.product_index["prod1"]], 5.0)
+    
+    @unittest.skipUnless(os.path.exists('/proc/self/smaps_rollup'), "requires Linux /proc")
+    def test_process_memory(self):
+        """Test memory usage is read for the current process."""
+        memory = process_memory()
+        self.assertGreater(memory['rss'], 0)
+        self.assertGreater(memory['pss'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
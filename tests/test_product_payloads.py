@@ -0,0 +1,97 @@
+"""
+Test suite for the ProductPayloads module.
+
+This module tests that product payloads are projected, reused and rebuilt
+when the catalog changes.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import unittest
+import tempfile
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from data_processor import DataProcessor
+from product_payloads import ProductPayloads, parse_fields
+from test_recommendation import make_sample_data
+
+class TestProductPayloads(unittest.TestCase):
+    """Test cases for the ProductPayloads class."""
+
+    def setUp(self):
+        self.temp_data_file = tempfile.NamedTemporaryFile(delete=False, suffix='.json')
+        self.temp_data_file.close()
+
+        with open(self.temp_data_file.name, 'w', encoding='utf-8') as f:
+            json.dump(make_sample_data(), f)
+
+        self.data_processor = DataProcessor(self.temp_data_file.name)
+        self.data_processor.load_data()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        if os.path.exists(self.temp_data_file.name):
+            os.unlink(self.temp_data_file.name)
+
+    def test_full_and_projected_payloads(self):
+        """Test payloads hold every field or only the requested ones, plus the ID."""
+        # Arrange
+        payloads = ProductPayloads(self.data_processor)
+        product = self.data_processor.product_data["prod1"]
+
+        # Act
+        full = payloads.get(["prod1", "missing"])
+        projected = payloads.get(["prod1"], parse_fields("name, price,name,unknown"))
+
+        # Assert
+        self.assertEqual(len(full), 1)
+        self.assertEqual(json.loads(full[0]), dict(product, id="prod1"))
+        self.assertEqual(json.loads(projected[0]), {"name": product["name"], "price": product["price"], "id": "prod1"})
+
+    def test_payloads_reused_until_catalog_changes(self):
+        """Test the same bytes are served until the catalog version changes."""
+        # Arrange
+        payloads = ProductPayloads(self.data_processor)
+        first = payloads.get(["prod1"])[0]
+
+        # Act
+        second = payloads.get(["prod1"])[0]
+        self.data_processor.product_data["prod1"] = dict(self.data_processor.product_data["prod1"], name="Renamed")
+        self.data_processor.user_interactions["user1"].append({"product_id": "prod2", "type": "view", "rating": 0})
+        unchanged = payloads.get(["prod1"])[0]
+        self.data_processor.mark_changed()
+        rebuilt = payloads.get(["prod1"])[0]
+
+        # Assert
+        self.assertIs(second, first)
+        self.assertIs(unchanged, first)
+        self.assertEqual(json.loads(rebuilt)["name"], "Renamed")
+
+    def test_encode_recommendations(self):
+        """Test the response body is valid JSON in recommendation order."""
+        # Arrange
+        payloads = ProductPayloads(self.data_processor)
+
+        # Act
+        body = payloads.encode_recommendations("user1", "hybrid", ["prod3", "prod1"], ("name",))
+
+        # Assert
+        self.assertEqual(json.loads(body), {
+            "success": True,
+            "user_id": "user1",
+            "strategy": "hybrid",
+            "recommendations": [
+                {"name": self.data_processor.product_data["prod3"]["name"], "id": "prod3"},
+                {"name": self.data_processor.product_data["prod1"]["name"], "id": "prod1"}
+            ]
+        })
+
+if __name__ == '__main__':
+    unittest.main()
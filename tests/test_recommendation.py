@@ -0,0 +1,464 @@
+"""
+Test suite for the RecommendationEngine module.
+
+This module tests the collaborative, content-based and hybrid recommenders
+on a small in-memory dataset.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import unittest
+import tempfile
+import numpy as np
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from data_processor import DataProcessor
+from recommendation import RecommendationEngine
+
+def make_sample_data():
+    """Build a small catalog where users overlap on a few products."""
+    return {
+        "users": {
+            "user1": {
+                "name": "Alice",
+                "preferences": ["electronics"],
+                "interactions": [
+                    {"product_id": "prod1", "type": "rating", "rating": 5},
+                    {"product_id": "prod2", "type": "rating", "rating": 3}
+                ]
+            },
+            "user2": {
+                "name": "Bob",
+                "preferences": ["books"],
+                "interactions": [
+                    {"product_id": "prod1", "type": "rating", "rating": 4},
+                    {"product_id": "prod3", "type": "rating", "rating": 5},
+                    {"product_id": "prod4", "type": "view", "rating": 0}
+                ]
+            },
+            "user3": {
+                "name": "Carol",
+                "preferences": ["fashion"],
+                "interactions": [
+                    {"product_id": "prod2", "type": "rating", "rating": 4},
+                    {"product_id": "prod4", "type": "rating", "rating": 2},
+                    {"product_id": "prod5", "type": "rating", "rating": 5}
+                ]
+            }
+        },
+        "products": {
+            "prod1": {"name": "Headphones", "category": "electronics", "price": 129.99, "avg_rating": 4.5},
+            "prod2": {"name": "Novel", "category": "books", "price": 24.99, "avg_rating": 4.2},
+            "prod3": {"name": "Console", "category": "electronics", "price": 399.99, "avg_rating": 4.8},
+            "prod4": {"name": "Jacket", "category": "fashion", "price": 89.99, "avg_rating": 3.9},
+            "prod5": {"name": "Cookbook", "category": "books", "price": 19.99, "avg_rating": 4.6}
+        }
+    }
+
+class TestRecommendationEngine(unittest.TestCase):
+    """Test cases for the RecommendationEngine class."""
+    
+    def setUp(self):
+        self.temp_data_file = tempfile.NamedTemporaryFile(delete=False, suffix='.json')
+        self.temp_data_file.close()
+        
+        with open(self.temp_data_file.name, 'w', encoding='utf-8') as f:
+            json.dump(make_sample_data(), f)
+        
+        self.data_processor = DataProcessor(self.temp_data_file.name)
+        self.data_processor.load_data()
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        if os.path.exists(self.temp_data_file.name):
+            os.unlink(self.temp_data_file.name)
+    
+    def test_train_collaborative_filter(self):
+        """Test training builds an item-item similarity matrix."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        
+        # Act
+        result = engine.train_collaborative_filter()
+        
+        # Assert
+        self.assertTrue(result)
+        self.assertEqual(engine.similarity_matrix.shape, (5, 5))
+    
+    def test_sparse_and_dense_similarity_match(self):
+        """Test the sparse training path reproduces the dense similarities."""
+        # Arrange
+        sparse_engine = RecommendationEngine(self.data_processor, sparse=True)
+        dense_engine = RecommendationEngine(self.data_processor, sparse=False)
+        
+        # Act
+        sparse_engine.train_collaborative_filter()
+        dense_engine.train_collaborative_filter()
+        
+        # Assert
+        np.testing.assert_allclose(sparse_engine.similarity_matrix, dense_engine.similarity_matrix)
+        for user_id in ("user1", "user2", "user3"):
+            self.assertEqual(
+                sparse_engine.get_collaborative_recommendations(user_id, top_n=2),
+                dense_engine.get_collaborative_recommendations(user_id, top_n=2)
+            )
+    
+    def test_vectorized_scores_match_item_loop(self):
+        """Test vectorized scoring reproduces the per-item weighted average."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        
+        for user_id in ("user1", "user2", "user3"):
+            indices, ratings = engine._user_ratings(engine.interaction_matrix, engine.user_index[user_id])
+            expected = np.zeros(len(engine.product_indices))
+            for item_idx in range(len(expected)):
+                if item_idx in indices:
+                    continue
+                sims = engine.similarity_matrix[item_idx, indices]
+                expected[item_idx] = np.sum(sims * ratings) / (np.sum(np.abs(sims)) + 1e-10)
+            
+            # Act
+            scores = engine._score_items(indices, ratings)
+            
+            # Assert
+            np.testing.assert_allclose(scores, expected)
+    
+    def test_neighbour_model_matches_dense_scores(self):
+        """Test the top-K neighbour model equals the dense model when K covers all items."""
+        # Arrange
+        dense_engine = RecommendationEngine(self.data_processor)
+        neighbour_engine = RecommendationEngine(self.data_processor, n_neighbors=4, block_size=2)
+        dense_engine.train_collaborative_filter()
+        neighbour_engine.train_collaborative_filter()
+        
+        for user_id in ("user1", "user2", "user3"):
+            indices, ratings = dense_engine._user_ratings(dense_engine.interaction_matrix, dense_engine.user_index[user_id])
+            
+            # Act
+            expected = dense_engine._score_items(indices, ratings)
+            scores = neighbour_engine._score_items(indices, ratings)
+            
+            # Assert
+            np.testing.assert_allclose(scores, expected, rtol=1e-6)
+    
+    def test_neighbour_model_keeps_k_per_item(self):
+        """Test each item keeps at most K neighbours and never itself."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor, n_neighbors=1)
+        
+        # Act
+        engine.train_collaborative_filter()
+        neighbours = engine.similarity_matrix.tocsr()
+        
+        # Assert
+        self.assertTrue(np.all(np.diff(neighbours.indptr) <= 1))
+        self.assertEqual(neighbours.diagonal().sum(), 0)
+        self.assertEqual(len(engine.get_collaborative_recommendations("user1", top_n=2)), 2)
+    
+    def test_blocked_similarity_matches_full_matrix(self):
+        """Test blocked training under a tiny memory budget matches the single-call result."""
+        # Arrange
+        full_engine = RecommendationEngine(self.data_processor)
+        blocked_engine = RecommendationEngine(self.data_processor, max_memory_mb=0.0001)
+        
+        # Act
+        full_engine.train_collaborative_filter()
+        blocked_engine.train_collaborative_filter()
+        
+        # Assert
+        self.assertEqual(blocked_engine.similarity_matrix.dtype, np.float32)
+        np.testing.assert_allclose(blocked_engine.similarity_matrix, full_engine.similarity_matrix, atol=1e-6)
+    
+    def test_blocked_similarity_memory_mapped(self):
+        """Test blocked training can write the similarity matrix to a memory-mapped file."""
+        # Arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'similarity.npy')
+            engine = RecommendationEngine(self.data_processor, similarity_path=path)
+            
+            # Act
+            engine.train_collaborative_filter()
+            stored = np.load(path, mmap_mode='r')
+            
+            # Assert
+            self.assertIsInstance(engine.similarity_matrix, np.memmap)
+            np.testing.assert_array_equal(stored, engine.similarity_matrix)
+            self.assertEqual(len(engine.get_collaborative_recommendations("user2", top_n=2)), 2)
+            del stored
+            engine.similarity_matrix = None
+    
+    def test_collaborative_recommendations_unknown_user(self):
+        """Test an unknown user gets no collaborative recommendations."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        
+        # Act
+        recommendations = engine.get_collaborative_recommendations("nobody")
+        
+        # Assert
+        self.assertEqual(recommendations, [])
+    
+    def test_collaborative_recommendations_exclude_rated_products(self):
+        """Test recommended products were not already rated by the user."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        
+        # Act
+        recommendations = engine.get_collaborative_recommendations("user1", top_n=2)
+        
+        # Assert
+        self.assertEqual(len(recommendations), 2)
+        self.assertNotIn("prod1", recommendations)
+        self.assertNotIn("prod2", recommendations)
+    
+    def test_interaction_matrix_cached_until_data_changes(self):
+        """Test requests reuse the trained matrix until the data version changes."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        trained_matrix = engine.interaction_matrix
+        
+        # Act
+        engine.get_collaborative_recommendations("user1")
+        cached_matrix = engine.interaction_matrix
+        self.data_processor.user_interactions["user1"].append(
+            {"product_id": "prod3", "type": "rating", "rating": 4}
+        )
+        self.data_processor.mark_changed()
+        recommendations = engine.get_collaborative_recommendations("user1", top_n=2)
+        
+        # Assert
+        self.assertIs(cached_matrix, trained_matrix)
+        self.assertIsNot(engine.interaction_matrix, trained_matrix)
+        self.assertEqual(engine.data_version, self.data_processor.version)
+        self.assertEqual(engine.interaction_matrix[engine.user_index["user1"], engine.product_index["prod3"]], 4.0)
+        self.assertNotIn("prod3", recommendations)
+    
+    def test_apply_interaction_matches_retrained_model(self):
+        """Test incremental updates give the same scores as a full retrain."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        events = [
+            ("user1", {"product_id": "prod3", "type": "rating", "rating": 4.0}),
+            ("user1", {"product_id": "prod1", "type": "rating", "rating": 2.0}),
+            ("user4", {"product_id": "prod2", "type": "rating", "rating": 5.0}),
+            ("user4", {"product_id": "prod5", "type": "rating", "rating": 3.0}),
+            ("user2", {"product_id": "prod3", "type": "rating", "rating": 0.0}),
+            ("user3", {"product_id": "prod9", "type": "rating", "rating": 5.0}),
+            ("user3", {"product_id": "prod1", "type": "view"})
+        ]
+        
+        # Act
+        applied = []
+        for user_id, interaction in events:
+            applied.append(engine.apply_interaction(user_id, interaction))
+            self.data_processor.user_interactions.setdefault(user_id, []).append(interaction)
+        retrained = RecommendationEngine(self.data_processor)
+        retrained.train_collaborative_filter()
+        
+        # Assert
+        self.assertEqual(applied, [True, True, True, True, True, False, False])
+        for user_id in ("user1", "user2", "user3", "user4"):
+            indices, ratings = retrained._get_user_ratings(retrained.user_index[user_id])
+            updated_indices, updated_ratings = engine._get_user_ratings(engine.user_index[user_id])
+            np.testing.assert_array_equal(updated_indices, indices)
+            np.testing.assert_allclose(updated_ratings, ratings)
+            np.testing.assert_allclose(engine._score_items(indices, ratings),
+                                       retrained._score_items(indices, ratings), rtol=1e-6, atol=1e-9)
+            self.assertEqual(
+                engine.get_collaborative_recommendations(user_id, top_n=3),
+                retrained.get_collaborative_recommendations(user_id, top_n=3)
+            )
+    
+    def test_apply_interaction_updates_neighbour_model(self):
+        """Test stored neighbour similarities are updated in place."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor, n_neighbors=4)
+        engine.train_collaborative_filter()
+        interaction = {"product_id": "prod4", "type": "rating", "rating": 5.0}
+        
+        # Act
+        engine.apply_interaction("user3", interaction)
+        self.data_processor.user_interactions["user3"].append(interaction)
+        retrained = RecommendationEngine(self.data_processor, sparse=False)
+        retrained.train_collaborative_filter()
+        
+        # Assert
+        for user_id in ("user1", "user2", "user3"):
+            indices, ratings = retrained._get_user_ratings(retrained.user_index[user_id])
+            np.testing.assert_allclose(engine._score_items(indices, ratings),
+                                       retrained._score_items(indices, ratings), rtol=1e-5, atol=1e-9)
+    
+    def test_apply_interaction_keeps_similarities_non_negative(self):
+        """Test rounding from repeated rating changes never leaves negative similarities."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor, sparse=False)
+        engine.train_collaborative_filter()
+        
+        # Act
+        for rating in (5.0, 3.3, 0.0, 1.7, 0.0, 4.1, 0.0):
+            engine.apply_interaction("user4", {"product_id": "prod4", "rating": rating})
+            engine.apply_interaction("user4", {"product_id": "prod5", "rating": 5.0 - rating})
+            engine.apply_interaction("user5", {"product_id": "prod1", "rating": rating})
+            engine.apply_interaction("user5", {"product_id": "prod5", "rating": 2.9})
+        
+        # Assert
+        self.assertGreaterEqual(engine.similarity_matrix.min(), 0.0)
+        self.assertIs(engine._abs_similarity(engine.state), engine.similarity_matrix)  # no |S| copy
+    
+    def test_apply_interaction_ignores_non_finite_ratings(self):
+        """Test an infinite or NaN rating leaves the model untouched."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor, sparse=False)
+        engine.train_collaborative_filter()
+        similarity = np.array(engine.similarity_matrix)
+        
+        # Act
+        updated = [engine.apply_interaction("user1", {"product_id": "prod3", "rating": rating})
+                   for rating in (float("inf"), float("nan"))]
+        
+        # Assert
+        self.assertEqual(updated, [False, False])
+        self.assertTrue(np.isfinite(engine.similarity_matrix).all())
+        np.testing.assert_array_equal(engine.similarity_matrix, similarity)
+    
+    def test_new_users_share_the_user_list(self):
+        """Test new users are appended to the shared user list without changing older states."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        before = engine.state
+        
+        # Act
+        engine.apply_interaction("user4", {"product_id": "prod2", "type": "rating", "rating": 4.0})
+        engine.apply_interaction("user5", {"product_id": "prod1", "type": "rating", "rating": 5.0})
+        after = engine.state
+        
+        # Assert
+        self.assertIs(after.user_indices, before.user_indices)
+        self.assertEqual(before.n_users, 3)
+        self.assertEqual(after.n_users, 5)
+        self.assertEqual(after.user_indices[after.user_index["user5"]], "user5")
+        self.assertGreaterEqual(before.user_index["user4"], before.n_users)  # unknown to the older state
+        self.assertTrue(engine.get_collaborative_recommendations("user4", top_n=2))
+    
+    def test_recommend_batch_matches_single_user(self):
+        """Test batch recommendations equal the single-user results."""
+        # Arrange
+        engines = [
+            RecommendationEngine(self.data_processor),
+            RecommendationEngine(self.data_processor, sparse=False),
+            RecommendationEngine(self.data_processor, n_neighbors=2)
+        ]
+        user_ids = ["user1", "unknown", "user2", "user3", "user4"]
+        
+        for engine in engines:
+            engine.train_collaborative_filter()
+            engine.apply_interaction("user4", {"product_id": "prod2", "type": "rating", "rating": 4.0})
+            expected = [(user_id, engine.get_collaborative_recommendations(user_id, top_n=3)) for user_id in user_ids]
+            
+            # Act
+            blocks = list(engine.recommend_batch(iter(user_ids), top_n=3, batch_size=2))
+            
+            # Assert
+            self.assertEqual([len(block) for block in blocks], [2, 2, 1])
+            self.assertEqual([pair for block in blocks for pair in block], expected)
+    
+    def test_content_based_scores_match_feature_loop(self):
+        """Test vectorized content scoring ranks products by scaled features."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        products = self.data_processor.product_data
+        prices = [product["price"] for product in products.values()]
+        
+        for user_id, user in make_sample_data()["users"].items():
+            scores = {}
+            for product_id, product in products.items():
+                ratings = [i["rating"] for i in user["interactions"] if i["product_id"] == product_id]
+                scores[product_id] = (
+                    float(product["category"] in user["preferences"]) +
+                    (product["price"] - min(prices)) / (max(prices) - min(prices)) +
+                    product["avg_rating"] / 5.0 +
+                    (ratings[-1] / 5.0 if ratings else 0.0)
+                )
+            expected = sorted(scores, key=lambda product_id: -scores[product_id])[:3]
+            
+            # Act
+            recommendations = engine.get_content_based_recommendations(user_id, top_n=3)
+            
+            # Assert
+            self.assertEqual(recommendations, expected)
+    
+    def test_content_based_price_does_not_dominate(self):
+        """Test an expensive product does not outrank a preferred one on price alone."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        
+        # Act
+        recommendations = engine.get_content_based_recommendations("user3", top_n=1)
+        
+        # Assert
+        self.assertEqual(recommendations, ["prod4"])  # fashion, not the priciest prod3
+        self.assertEqual(engine.get_content_based_recommendations("unknown"), [])
+    
+    def test_hybrid_recommendations(self):
+        """Test hybrid recommendations return the requested number of products."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        
+        # Act
+        recommendations = engine.get_hybrid_recommendations("user2", top_n=3)
+        
+        # Assert
+        self.assertEqual(len(recommendations), 3)
+        self.assertEqual(len(set(recommendations)), 3)
+        for product_id in recommendations:
+            self.assertIn(product_id, self.data_processor.product_data)
+    
+    def test_recommendations_by_strategy(self):
+        """Test get_recommendations dispatches to the named strategy."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        engine.train_collaborative_filter()
+        
+        # Act
+        collab = engine.get_recommendations("user2", top_n=2, strategy='collab')
+        content = engine.get_recommendations("user2", top_n=2, strategy='content')
+        hybrid = engine.get_recommendations("user2", top_n=2, strategy='hybrid', collab_weight=0.5)
+        
+        # Assert
+        self.assertEqual(collab, engine.get_collaborative_recommendations("user2", top_n=2))
+        self.assertEqual(content, engine.get_content_based_recommendations("user2", top_n=2))
+        self.assertEqual(hybrid, engine.get_hybrid_recommendations("user2", top_n=2, collab_weight=0.5))
+        with self.assertRaises(ValueError):
+            engine.get_recommendations("user2", strategy='popular')
+    
+    def test_model_stats(self):
+        """Test model stats report the matrix sizes of the trained model."""
+        # Arrange
+        engine = RecommendationEngine(self.data_processor)
+        untrained = engine.model_stats()
+        engine.train_collaborative_filter()
+        
+        # Act
+        stats = engine.model_stats()
+        
+        # Assert
+        self.assertEqual(untrained, {'bytes': 0, 'nnz': 0})
+        self.assertEqual(stats['nnz'], engine.interaction_matrix.nnz)
+        self.assertGreaterEqual(stats['bytes'], engine.interaction_matrix.data.nbytes)
+
+if __name__ == '__main__':
+    unittest.main()
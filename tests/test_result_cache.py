@@ -0,0 +1,159 @@
+"""
+Test suite for the RecommendationCache module.
+
+This module tests LRU and TTL eviction, the memory cap and invalidation of
+a user's cached recommendations.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import asyncio
+import unittest
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from result_cache import RecommendationCache
+from user_tracker import UserTracker
+
+class FakeClock:
+    """Manually advanced clock for TTL tests."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class TestRecommendationCache(unittest.TestCase):
+    """Test cases for the RecommendationCache class."""
+    
+    def test_hit_and_miss(self):
+        """Test cached results are returned only for the same key."""
+        # Arrange
+        cache = RecommendationCache()
+        calls = []
+        compute = lambda: calls.append(1) or ["prod1", "prod2"]
+        
+        # Act
+        first = cache.get_or_compute("user1", 2, 0.7, 1, compute)
+        second = cache.get_or_compute("user1", 2, 0.7, 1, compute)
+        other_model = cache.get("user1", 2, 0.7, 2)
+        
+        # Assert
+        self.assertEqual(first, ["prod1", "prod2"])
+        self.assertEqual(second, first)
+        self.assertIsNone(other_model)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 2)
+    
+    def test_least_recently_used_entry_evicted(self):
+        """Test the entry limit evicts the least recently used entry."""
+        # Arrange
+        cache = RecommendationCache(max_entries=2)
+        cache.put("user1", 5, 0.7, 1, ["prod1"])
+        cache.put("user2", 5, 0.7, 1, ["prod2"])
+        
+        # Act
+        cache.get("user1", 5, 0.7, 1)
+        cache.put("user3", 5, 0.7, 1, ["prod3"])
+        
+        # Assert
+        self.assertEqual(cache.get("user1", 5, 0.7, 1), ["prod1"])
+        self.assertIsNone(cache.get("user2", 5, 0.7, 1))
+        self.assertEqual(cache.stats()['evictions'], 1)
+    
+    def test_memory_cap(self):
+        """Test the estimated size of the cache stays under max_bytes."""
+        # Arrange
+        max_bytes = 4096
+        cache = RecommendationCache(max_bytes=max_bytes)
+        
+        # Act
+        for i in range(100):
+            cache.put(f"user{i}", 10, 0.7, 1, [f"prod{j}" for j in range(10)])
+        
+        # Assert
+        self.assertLessEqual(cache.nbytes, max_bytes)
+        self.assertGreater(len(cache), 0)
+        self.assertEqual(cache.stats()['evictions'], 100 - len(cache))
+    
+    def test_entries_expire_after_ttl(self):
+        """Test entries are not served after their TTL."""
+        # Arrange
+        clock = FakeClock()
+        cache = RecommendationCache(ttl=10, clock=clock)
+        cache.put("user1", 5, 0.7, 1, ["prod1"])
+        
+        # Act
+        clock.now = 9.0
+        fresh = cache.get("user1", 5, 0.7, 1)
+        clock.now = 10.0
+        expired = cache.get("user1", 5, 0.7, 1)
+        
+        # Assert
+        self.assertEqual(fresh, ["prod1"])
+        self.assertIsNone(expired)
+        self.assertEqual(len(cache), 0)
+    
+    def test_tracked_interaction_invalidates_user(self):
+        """Test a tracked interaction drops only that user's entries."""
+        # Arrange
+        cache = RecommendationCache()
+        cache.put("user1", 5, 0.7, 1, ["prod1"])
+        cache.put("user1", 3, 0.5, 1, ["prod2"])
+        cache.put("user2", 5, 0.7, 1, ["prod3"])
+        tracker = UserTracker()
+        tracker.add_listener(cache.on_interaction)
+        
+        # Act
+        tracker.track_interaction("user1", "prod4", "view")
+        
+        # Assert
+        self.assertIsNone(cache.get("user1", 5, 0.7, 1))
+        self.assertIsNone(cache.get("user1", 3, 0.5, 1))
+        self.assertEqual(cache.get("user2", 5, 0.7, 1), ["prod3"])
+        self.assertEqual(cache.stats()['invalidations'], 2)
+    
+    def test_results_computed_across_an_invalidation_are_not_stored(self):
+        """Test results computed before an interaction was tracked are served once but not cached."""
+        # Arrange
+        cache = RecommendationCache()
+        
+        def compute():
+            # The user interacts while their recommendations are being computed
+            cache.invalidate_user("user1")
+            return ["prod1"]
+        
+        # Act
+        results = cache.get_or_compute("user1", 5, 0.7, 1, compute)
+        
+        # Assert
+        self.assertEqual(results, ["prod1"])
+        self.assertIsNone(cache.get("user1", 5, 0.7, 1))
+        self.assertEqual(cache.get_or_compute("user1", 5, 0.7, 1, lambda: ["prod2"]), ["prod2"])
+        self.assertEqual(cache.get("user1", 5, 0.7, 1), ["prod2"])
+    
+    def test_async_results_computed_across_an_invalidation_are_not_stored(self):
+        """Test the event loop variant drops results computed before an interaction was tracked."""
+        # Arrange
+        cache = RecommendationCache()
+        
+        async def compute():
+            cache.invalidate_user("user1")
+            return ["prod1"]
+        
+        # Act
+        results = asyncio.run(cache.get_or_compute_async("user1", 5, 0.7, 1, compute))
+        
+        # Assert
+        self.assertEqual(results, ["prod1"])
+        self.assertIsNone(cache.get("user1", 5, 0.7, 1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Test suite for the streaming JSON module.
+
+This module tests that data files are read record by record with the same
+result as json.load, for both the JSON and the NDJSON format.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import shutil
+import unittest
+import tempfile
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from data_processor import DataProcessor
+from streaming_json import iter_records, write_ndjson
+from test_recommendation import make_sample_data
+
+class TestStreamingJson(unittest.TestCase):
+    """Test cases for the streaming record reader."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.data = make_sample_data()
+        self.data["users"]['user"é'] = {"name": '{not: "json"}', "interactions": [], "score": 1.5e-3}
+        self.data["extra"] = [1, {"nested": [2, 3]}]
+        self.json_path = os.path.join(self.temp_dir, 'data.json')
+        with open(self.json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def expected_records(self):
+        return [(section, record_id, record)
+                for section in ("users", "products")
+                for record_id, record in self.data[section].items()]
+    
+    def test_records_match_json_load(self):
+        """Test every chunk size yields the records json.load would produce."""
+        for chunk_size in (1, 7, 64, 1 << 16):
+            # Act
+            records = list(iter_records(self.json_path, chunk_size=chunk_size))
+            
+            # Assert
+            self.assertEqual(records, self.expected_records())
+    
+    def test_ndjson_round_trip(self):
+        """Test a JSON file converted to NDJSON loads into the same data."""
+        # Arrange
+        ndjson_path = os.path.join(self.temp_dir, 'data.ndjson')
+        
+        # Act
+        count = write_ndjson(iter_records(self.json_path), ndjson_path)
+        json_processor = DataProcessor(self.json_path)
+        ndjson_processor = DataProcessor(ndjson_path)
+        
+        # Assert
+        self.assertEqual(count, len(self.expected_records()))
+        self.assertEqual(list(iter_records(ndjson_path)), self.expected_records())
+        self.assertTrue(json_processor.load_data())
+        self.assertTrue(ndjson_processor.load_data())
+        self.assertEqual(dict(ndjson_processor.user_interactions), dict(json_processor.user_interactions))
+        self.assertEqual(ndjson_processor.user_features, json_processor.user_features)
+        self.assertEqual(ndjson_processor.product_data, json_processor.product_data)
+    
+    def test_invalid_documents(self):
+        """Test malformed or incomplete documents raise ValueError."""
+        for content in ('[1, 2]', '{"users": {}}', '{"users": {}, "products": {}} x',
+                        '{"users": {"u": {"a": 1}', '{"users": [], "products": {}}'):
+            # Arrange
+            with open(self.json_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            
+            # Act / Assert
+            with self.assertRaises(ValueError):
+                list(iter_records(self.json_path, chunk_size=4))
+
+if __name__ == '__main__':
+    unittest.main()
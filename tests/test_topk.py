@@ -0,0 +1,79 @@
+"""
+Test suite for the top-K selection module.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import unittest
+import numpy as np
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from topk import top_k_indices, top_k_keys, top_k_rows
+
+class TestTopK(unittest.TestCase):
+    """Test cases for the top-K selectors."""
+    
+    def test_top_k_indices_matches_full_sort(self):
+        """Test argpartition selection agrees with a stable full sort."""
+        # Arrange
+        rng = np.random.default_rng(0)
+        scores = rng.integers(0, 20, size=500).astype(float)
+        
+        for k in (1, 6, 50, 500, 600):
+            # Act
+            result = top_k_indices(scores, k)
+            
+            # Assert
+            expected = np.argsort(-scores, kind='stable')[:k]
+            np.testing.assert_array_equal(result, expected)
+    
+    def test_top_k_indices_breaks_ties_by_index(self):
+        """Test tied scores at the cut-off keep the lowest indices."""
+        # Arrange
+        scores = np.array([0.0, 1.0, 0.5, 1.0, 0.5, 0.5])
+        
+        # Act
+        result = top_k_indices(scores, 3)
+        
+        # Assert
+        self.assertEqual(result.tolist(), [1, 3, 2])
+    
+    def test_top_k_indices_empty(self):
+        """Test k of zero or an empty score array returns no indices."""
+        self.assertEqual(len(top_k_indices(np.array([1.0, 2.0]), 0)), 0)
+        self.assertEqual(len(top_k_indices(np.array([]), 5)), 0)
+    
+    def test_top_k_rows_matches_top_k_indices(self):
+        """Test row-wise selection applies the same order and ties to every row."""
+        # Arrange
+        rng = np.random.default_rng(1)
+        scores = rng.integers(0, 5, size=(40, 30)).astype(float)
+        
+        for k in (0, 1, 7, 30, 45):
+            # Act
+            result = top_k_rows(scores, k)
+            
+            # Assert
+            self.assertEqual(result.shape, (40, min(k, 30)))
+            for row, indices in zip(scores, result):
+                np.testing.assert_array_equal(indices, top_k_indices(row, k))
+    
+    def test_top_k_keys(self):
+        """Test dict selection orders by score then insertion order."""
+        # Arrange
+        scores = {"a": 1.0, "b": 3.0, "c": 3.0, "d": 2.0}
+        
+        # Act
+        result = top_k_keys(scores, 3)
+        
+        # Assert
+        self.assertEqual(result, ["b", "c", "d"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,337 @@
+"""
+Test suite for the UserTracker module.
+
+This module tests interaction tracking with the append-only event log.
+
+Author: Your Name
+Date: May 11, 2025
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import shutil
+import unittest
+import tempfile
+
+# Add the src directory to the Python path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, src_path)
+
+from user_tracker import UserTracker
+from test_recommendation import make_sample_data
+
+class TestUserTracker(unittest.TestCase):
+    """Test cases for the UserTracker class."""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.data_path = os.path.join(self.temp_dir, 'data.json')
+        self.log_path = os.path.join(self.temp_dir, 'interactions.log')
+        
+        with open(self.data_path, 'w', encoding='utf-8') as f:
+            json.dump(make_sample_data(), f)
+    
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def read_data_file(self):
+        with open(self.data_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def test_track_interaction_without_log_rewrites_data_file(self):
+        """Test the legacy path still saves to the data file."""
+        # Arrange
+        tracker = UserTracker(self.data_path)
+        tracker.load_interactions()
+        
+        # Act
+        result = tracker.track_interaction("user1", "prod3", "rating", 4)
+        
+        # Assert
+        self.assertTrue(result)
+        interactions = self.read_data_file()["users"]["user1"]["interactions"]
+        self.assertEqual(interactions[-1]["product_id"], "prod3")
+        self.assertEqual(interactions[-1]["rating"], 4.0)
+    
+    def test_track_interaction_appends_to_log(self):
+        """Test events are appended to the log and the data file is left untouched."""
+        # Arrange
+        tracker = UserTracker(self.data_path, log_path=self.log_path)
+        tracker.load_interactions()
+        before = self.read_data_file()
+        
+        # Act
+        tracker.track_interaction("user1", "prod3", "view")
+        tracker.track_interaction("user4", "prod1", "rating", 5)
+        tracker.close()
+        
+        # Assert
+        self.assertEqual(self.read_data_file(), before)
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            events = [json.loads(line) for line in f]
+        self.assertEqual([e["user_id"] for e in events], ["user1", "user4"])
+        self.assertEqual(events[1]["rating"], 5.0)
+    
+    def test_replay_rebuilds_state(self):
+        """Test a new tracker sees events logged by a previous one."""
+        # Arrange
+        writer = UserTracker(self.data_path, log_path=self.log_path)
+        writer.load_interactions()
+        writer.track_interaction("user1", "prod3", "view")
+        writer.track_interaction("user4", "prod1", "rating", 5)
+        writer.close()
+        
+        # Act
+        reader = UserTracker(self.data_path, log_path=self.log_path)
+        reader.load_interactions()
+        
+        # Assert
+        self.assertEqual(reader.user_interactions, writer.user_interactions)
+        self.assertEqual(len(reader.get_user_interactions("user1")), 3)
+    
+    def test_replay_skips_partial_last_line(self):
+        """Test a torn write at the end of the log is ignored."""
+        # Arrange
+        tracker = UserTracker(self.data_path, log_path=self.log_path)
+        tracker.load_interactions()
+        tracker.track_interaction("user1", "prod3", "view")
+        tracker.close()
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write('{"user_id": "user1", "product_id": "pro')
+        
+        # Act
+        reader = UserTracker(self.data_path, log_path=self.log_path)
+        reader.load_interactions()
+        
+        # Assert
+        self.assertEqual(len(reader.user_interactions["user1"]), 3)
+    
+    def test_compact_merges_log_into_data_file(self):
+        """Test compaction moves logged events into the data file and empties the log."""
+        # Arrange
+        tracker = UserTracker(self.data_path, log_path=self.log_path, compact_bytes=200)
+        tracker.load_interactions()
+        
+        # Act
+        for product_id in ("prod3", "prod4", "prod5"):
+            tracker.track_interaction("user1", product_id, "view")
+        tracker.compact()
+        
+        # Assert
+        self.assertEqual(tracker.event_log.size(), 0)
+        interactions = self.read_data_file()["users"]["user1"]["interactions"]
+        self.assertEqual([i["product_id"] for i in interactions[2:]], ["prod3", "prod4", "prod5"])
+        self.assertIn("products", self.read_data_file())
+        
+        reader = UserTracker(self.data_path, log_path=self.log_path)
+        reader.load_interactions()
+        self.assertEqual(reader.user_interactions, tracker.user_interactions)
+    
+    def test_log_is_compacted_in_the_background(self):
+        """Test a log past compact_bytes is merged into the data file by a background thread."""
+        # Arrange
+        tracker = UserTracker(self.data_path, log_path=self.log_path, compact_bytes=200)
+        tracker.load_interactions()
+        
+        # Act
+        for product_id in ("prod3", "prod4", "prod5"):
+            tracker.track_interaction("user1", product_id, "view")
+        tracker.close()
+        
+        # Assert
+        self.assertIsNone(tracker.last_error)
+        self.assertLess(tracker.event_log.size(), 200)
+        interactions = self.read_data_file()["users"]["user1"]["interactions"]
+        self.assertEqual(interactions[2]["product_id"], "prod3")
+    
+    def test_failed_compaction_is_recorded(self):
+        """Test a compaction error is kept in last_error and the events stay in the log."""
+        # Arrange
+        data_path = os.path.join(self.temp_dir, 'missing', 'data.json')
+        tracker = UserTracker(data_path, log_path=self.log_path)
+        tracker.track_interaction("user1", "prod3", "view")
+        
+        # Act
+        result = tracker.compact()
+        
+        # Assert
+        self.assertFalse(result)
+        self.assertIn("Error compacting event log", tracker.last_error)
+        self.assertEqual([e["product_id"] for e in tracker.event_log.replay()], ["prod3"])
+    
+    def test_interrupted_compaction_is_replayed_and_merged_once(self):
+        """Test events of a compaction that failed after renaming the log are neither lost nor duplicated."""
+        # Arrange
+        tracker = UserTracker(self.data_path, log_path=self.log_path)
+        tracker.load_interactions()
+        tracker.track_interaction("user1", "prod3", "view")
+        
+        def crash(events):
+            raise OSError("disk full")
+        
+        # Act
+        with self.assertRaises(OSError):
+            tracker.event_log.compact(crash)
+        tracker.track_interaction("user1", "prod4", "view")
+        reader = UserTracker(self.data_path, log_path=self.log_path)
+        reader.load_interactions()
+        first = tracker.compact()
+        second = tracker.compact()
+        
+        # Assert
+        self.assertEqual([i["product_id"] for i in reader.user_interactions["user1"][2:]], ["prod3", "prod4"])
+        self.assertTrue(first and second)
+        self.assertFalse(os.path.exists(tracker.event_log.rotated_path))
+        interactions = self.read_data_file()["users"]["user1"]["interactions"]
+        self.assertEqual([i["product_id"] for i in interactions[2:]], ["prod3", "prod4"])
+    
+    def test_appends_do_not_wait_for_the_merge(self):
+        """Test events are tracked while a compaction merges the log, and are kept for the next one."""
+        # Arrange
+        tracker = UserTracker(self.data_path, log_path=self.log_path)
+        tracker.load_interactions()
+        tracker.track_interaction("user1", "prod3", "view")
+        merging, release = threading.Event(), threading.Event()
+        merge_events = tracker._merge_events
+        
+        def slow_merge(events):
+            merging.set()
+            release.wait(5)
+            merge_events(events)
+        
+        tracker._merge_events = slow_merge
+        compactor = threading.Thread(target=tracker.compact)
+        
+        # Act
+        compactor.start()
+        merging.wait(5)
+        tracked = tracker.track_interaction("user1", "prod4", "view")
+        pending = [e["product_id"] for e in tracker.event_log.replay()]
+        release.set()
+        compactor.join()
+        
+        # Assert
+        self.assertTrue(tracked)
+        self.assertEqual(pending, ["prod3", "prod4"])
+        interactions = self.read_data_file()["users"]["user1"]["interactions"]
+        self.assertEqual([i["product_id"] for i in interactions[2:]], ["prod3"])
+        self.assertEqual([e["product_id"] for e in tracker.event_log.replay()], ["prod4"])
+    
+    def test_idle_log_is_synced_after_interval(self):
+        """Test unsynced events are synced by the timer when no further event arrives."""
+        # Arrange
+        tracker = UserTracker(self.data_path, log_path=self.log_path, fsync_every=100, fsync_interval=0.05)
+        tracker.track_interaction("user1", "prod3", "view")
+        tracker.track_interaction("user1", "prod4", "view")
+        
+        # Act
+        for _ in range(100):
+            if tracker.event_log._unsynced == 0:
+                break
+            time.sleep(0.01)
+        
+        # Assert
+        self.assertEqual(tracker.event_log._unsynced, 0)
+        tracker.close()
+    
+    def test_tail_log_reads_events_of_other_writers(self):
+        """Test a reader picks up appended events, and reloads once the log is compacted."""
+        # Arrange
+        reader = UserTracker(self.data_path, log_path=self.log_path)
+        reader.load_interactions()
+        writer = UserTracker(self.data_path, log_path=self.log_path)
+        writer.load_interactions()
+        
+        # Act
+        writer.track_interaction("user1", "prod3", "view")
+        writer.track_interaction("user4", "prod1", "rating", 5)
+        appended = reader.tail_log()
+        writer.compact()
+        writer.track_interaction("user2", "prod5", "click")
+        reloaded = reader.tail_log()
+        unchanged = reader.tail_log()
+        
+        # Assert
+        self.assertEqual(appended, 2)
+        self.assertEqual(reloaded, 1)
+        self.assertEqual(unchanged, 0)
+        self.assertEqual(reader.user_interactions, writer.user_interactions)
+    
+    @unittest.skipUnless(hasattr(os, 'fork'), "requires os.fork")
+    def test_concurrent_writers(self):
+        """Test several processes appending to one log lose no events."""
+        # Arrange
+        n_processes, n_events = 4, 200
+        
+        # Act
+        pids = []
+        for worker in range(n_processes):
+            pid = os.fork()
+            if pid == 0:
+                tracker = UserTracker(self.data_path, log_path=self.log_path, fsync_every=50)
+                for i in range(n_events):
+                    tracker.track_interaction(f"worker{worker}", f"prod{i}", "view")
+                tracker.close()
+                os._exit(0)
+            pids.append(pid)
+        for pid in pids:
+            os.waitpid(pid, 0)
+        
+        # Assert
+        reader = UserTracker(self.data_path, log_path=self.log_path)
+        reader.load_interactions()
+        for worker in range(n_processes):
+            products = [i["product_id"] for i in reader.user_interactions[f"worker{worker}"]]
+            self.assertEqual(products, [f"prod{i}" for i in range(n_events)])
+    
+    def test_user_interactions_newest_first_with_pages(self):
+        """Test out-of-order events are returned in time order, page by page."""
+        # Arrange
+        tracker = UserTracker()
+        tracker.track_interaction("user2", "prod1", "view")
+        tracker.get_user_interactions("user2")  # Builds the per-user index
+        timestamps = ["2025-04-0%dT10:00:00" % day for day in (3, 1, 5, 2, 4)]
+        tracker.track_interactions([
+            {"user_id": "user1", "product_id": f"prod{day}", "type": "view", "timestamp": timestamp}
+            for day, timestamp in zip((3, 1, 5, 2, 4), timestamps)
+        ])
+        
+        # Act
+        newest = tracker.get_user_interactions("user1", limit=2)
+        everything = tracker.get_user_interactions("user1")
+        first_page, cursor = tracker.get_user_interactions_page("user1", limit=3)
+        second_page, last_cursor = tracker.get_user_interactions_page("user1", limit=3, cursor=cursor)
+        
+        # Assert
+        self.assertEqual([i["product_id"] for i in newest], ["prod5", "prod4"])
+        self.assertEqual([i["timestamp"] for i in everything], sorted(timestamps, reverse=True))
+        self.assertEqual(first_page + second_page, everything)
+        self.assertIsNone(last_cursor)
+        self.assertEqual(tracker.get_user_interactions_page("user1", cursor="bad"), (None, None))
+    
+    def test_history_cursor_survives_removed_rows(self):
+        """Test a cursor still resumes after the page it came from once rows have moved."""
+        # Arrange
+        tracker = UserTracker()
+        tracker.track_interaction("user2", "prod1", "view")
+        tracker.track_interactions([
+            {"user_id": "user1", "product_id": f"prod{i}", "type": "view", "timestamp": "2025-04-01T10:00:00"}
+            for i in range(1, 5)
+        ])
+        first_page, cursor = tracker.get_user_interactions_page("user1", limit=2)
+        
+        # Act
+        tracker.interaction_store.remove_user("user2")
+        second_page, last_cursor = tracker.get_user_interactions_page("user1", limit=2, cursor=cursor)
+        
+        # Assert
+        self.assertEqual([i["product_id"] for i in first_page], ["prod4", "prod3"])
+        self.assertEqual([i["product_id"] for i in second_page], ["prod2", "prod1"])
+        self.assertIsNone(last_cursor)
+
+if __name__ == '__main__':
+    unittest.main()